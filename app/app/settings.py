@@ -37,6 +37,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     #Other Apps:
     'rest_framework',
     'drf_spectacular',
@@ -82,15 +83,66 @@ WSGI_APPLICATION = 'app.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
 
+# core.db.postgresql acrescenta health checks e um pool de conexões opcional.
+# Com DB_POOL_SIZE > 0 cada processo mantém até esse número de conexões,
+# devolvidas ao pool ao fim de cada requisição (por isso CONN_MAX_AGE = 0);
+# sem pool, a conexão de cada thread é reaproveitada por DB_CONN_MAX_AGE
+# segundos.
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 0))
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'core.db.postgresql',
         'HOST': os.environ.get('DB_HOST'),
         'NAME': os.environ.get('DB_NAME'),
         'USER': os.environ.get('DB_USER'),
         'PASSWORD': os.environ.get('DB_PASS'),
+        'CONN_MAX_AGE': (
+            0 if DB_POOL_SIZE else int(os.environ.get('DB_CONN_MAX_AGE', 60))
+        ),
+        'CONN_HEALTH_CHECKS': (
+            os.environ.get('DB_CONN_HEALTH_CHECKS', '1') == '1'
+        ),
+        'OPTIONS': {},
     }
 }
+if DB_POOL_SIZE:
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'max_size': DB_POOL_SIZE,
+        'timeout': int(os.environ.get('DB_POOL_TIMEOUT', 30)),
+        'max_lifetime': int(os.environ.get('DB_POOL_MAX_LIFETIME', 3600)),
+    }
+
+# Réplicas de leitura (core.db.router), uma por host em DB_REPLICA_HOSTS
+# (separados por vírgula), com as demais configurações do primário. Nos
+# testes elas espelham o banco de teste do primário.
+REPLICA_DATABASES = []
+for index, host in enumerate(
+    filter(None, os.environ.get('DB_REPLICA_HOSTS', '').split(',')), 1,
+):
+    DATABASES[f'replica_{index}'] = {
+        **DATABASES['default'],
+        'HOST': host.strip(),
+        'OPTIONS': dict(DATABASES['default']['OPTIONS']),
+        'TEST': {'MIRROR': 'default'},
+    }
+    REPLICA_DATABASES.append(f'replica_{index}')
+
+DATABASE_ROUTERS = ['core.db.router.ReplicaRouter']
+
+# Modelos lidos das réplicas pelas views de receita (recipe.replicas).
+REPLICA_MODELS = [
+    'core.recipe',
+    'core.tag',
+    'core.ingredient',
+    'core.recipe_tags',
+    'core.recipe_ingredients',
+]
+# Após uma escrita, as leituras do usuário ficam no primário por este tempo,
+# que deve cobrir o atraso da replicação.
+REPLICA_PIN_SECONDS = int(os.environ.get('DB_REPLICA_PIN_SECONDS', 10))
+# Tempo que uma réplica que recusou conexão fica fora do rodízio.
+REPLICA_RETRY_SECONDS = 30
 
 
 # Password validation
@@ -111,6 +163,35 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Hasher das senhas novas: 'argon2', 'bcrypt' (requer o pacote bcrypt) ou
+# 'pbkdf2'. Os outros continuam aceitos e a senha é refeita com o escolhido
+# no próximo login. Compare com: manage.py benchmark_password_hashers.
+PASSWORD_HASHER = os.environ.get('PASSWORD_HASHER', 'argon2')
+_PASSWORD_HASHERS = {
+    'argon2': 'user.hashers.Argon2PasswordHasher',
+    'bcrypt': 'user.hashers.BCryptSHA256PasswordHasher',
+    'pbkdf2': 'user.hashers.PBKDF2PasswordHasher',
+}
+PASSWORD_HASHERS = [_PASSWORD_HASHERS[PASSWORD_HASHER]] + [
+    hasher for name, hasher in _PASSWORD_HASHERS.items()
+    if name != PASSWORD_HASHER
+] + [
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+]
+
+# Custos dos hashers (user.hashers). Os do Argon2 seguem o mínimo recomendado
+# pela OWASP (19 MiB, 2 iterações, 1 thread), bem mais barato por login do
+# que as 260 mil iterações do PBKDF2.
+PASSWORD_ARGON2 = {
+    'time_cost': int(os.environ.get('PASSWORD_ARGON2_TIME_COST', 2)),
+    'memory_cost': int(os.environ.get('PASSWORD_ARGON2_MEMORY_COST', 19456)),
+    'parallelism': int(os.environ.get('PASSWORD_ARGON2_PARALLELISM', 1)),
+}
+PASSWORD_BCRYPT_ROUNDS = int(os.environ.get('PASSWORD_BCRYPT_ROUNDS', 12))
+PASSWORD_PBKDF2_ITERATIONS = int(
+    os.environ.get('PASSWORD_PBKDF2_ITERATIONS', 260000)
+)
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/3.2/topics/i18n/
@@ -144,8 +225,78 @@ AUTH_USER_MODEL = 'core.User'
 
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
-    
+    # Tentativas de login (user.throttling), contadas no cache antes do
+    # hash da senha.
+    'DEFAULT_THROTTLE_RATES': {
+        'login_ip': os.environ.get('LOGIN_RATE_IP', '30/min'),
+        'login_email': os.environ.get('LOGIN_RATE_EMAIL', '5/min'),
+    },
+    # Proxies reversos na frente da app. O limite por IP usa o endereço
+    # que o último deles acrescentou ao X-Forwarded-For; com 0 (padrão) o
+    # header, que o cliente pode forjar, é ignorado e vale o REMOTE_ADDR.
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES', 0)),
+}
+
+# Versões do cache de respostas, invalidação de tokens, limites de login e
+# a marca de leitura no primário (core.db.router) só valem entre processos
+# com um cache central, ex.: CACHE_BACKEND=django.core.cache.backends.
+# memcached.PyMemcacheCache e CACHE_LOCATION=memcached:11211. O LocMemCache
+# padrão é de cada processo e só serve para um único worker.
+CACHE_BACKEND = os.environ.get(
+    'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache',
+)
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
+    }
+}
+if CACHE_BACKEND.endswith('.LocMemCache'):
+    CACHES['default']['OPTIONS'] = {'MAX_ENTRIES': 10000}
+
+# Tempo, em segundos, que as respostas das APIs de receita ficam em cache.
+RECIPE_RESPONSE_CACHE_TIMEOUT = 600
+
+# Variantes geradas para as imagens de receita: nome -> maior lado em pixels.
+RECIPE_IMAGE_VARIANTS = {
+    'thumbnail': 150,
+    'medium': 600,
 }
+RECIPE_IMAGE_QUEUE = 'recipe.images.ThreadPoolImageQueue'
+RECIPE_IMAGE_WORKERS = 2
+
+# Limites das imagens enviadas (recipe.uploads).
+RECIPE_IMAGE_MAX_BYTES = 10 * 1024 * 1024
+RECIPE_IMAGE_MAX_PIXELS = 40_000_000
+
+# Configuração de texto do Postgres usada na busca de receitas. 'simple' não
+# aplica stemming, já que as receitas misturam idiomas.
+RECIPE_SEARCH_CONFIG = 'simple'
+
+# Árvores de prefixos do autocomplete sem pg_trgm (recipe.autocomplete).
+RECIPE_AUTOCOMPLETE_TRIE_MAXSIZE = 256
+RECIPE_AUTOCOMPLETE_TRIE_TTL = 300
+
+# Cache da autenticação por token (user.authentication), em segundos.
+TOKEN_CACHE_TTL = 300
+TOKEN_CACHE_LOCAL_TTL = 30
+TOKEN_CACHE_LOCAL_MAXSIZE = 10000
+
+# Validade dos tokens (user.tokens), em segundos. Cada uso estende a validade
+# para TOKEN_TTL a partir de agora, até TOKEN_MAX_AGE desde a emissão; a
+# nova validade só é gravada quando avança pelo menos TOKEN_SLIDE_INTERVAL.
+TOKEN_TTL = int(os.environ.get('TOKEN_TTL', 7 * 24 * 3600))
+TOKEN_MAX_AGE = int(os.environ.get('TOKEN_MAX_AGE', 30 * 24 * 3600))
+TOKEN_SLIDE_INTERVAL = int(os.environ.get('TOKEN_SLIDE_INTERVAL', 3600))
+
+# Tokens assinados (user.tokens.issue_signed_token), validados sem I/O. São
+# opcionais e, como não podem ser revogados um a um, têm validade curta. O
+# usuário (com a geração de revogação) fica em um LRU local por
+# SIGNED_TOKEN_USER_TTL segundos.
+SIGNED_TOKENS = os.environ.get('SIGNED_TOKENS', '') == '1'
+SIGNED_TOKEN_TTL = int(os.environ.get('SIGNED_TOKEN_TTL', 900))
+SIGNED_TOKEN_USER_TTL = 30
+SIGNED_TOKEN_USER_MAXSIZE = 10000
 
 SPECTACULAR_SETTINGS = {
     'COMPONENT_SPLIT_REQUEST': True,
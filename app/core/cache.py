@@ -0,0 +1,74 @@
+"""
+Cache em memória do processo.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    """Cache LRU com expiração por TTL, seguro para uso entre threads."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Retorna o valor da chave, ou default se ausente ou expirado."""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            value, expires = item
+            if expires <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        """Guarda o valor, descartando o item usado há mais tempo se cheio."""
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class CacheStats:
+    """Contadores de acertos e falhas de um cache."""
+
+    def __init__(self, *counters):
+        self.counters = counters
+        self._lock = threading.Lock()
+        self.reset()
+
+    def incr(self, counter):
+        with self._lock:
+            self._values[counter] += 1
+
+    def reset(self):
+        with self._lock:
+            self._values = dict.fromkeys(self.counters, 0)
+
+    def as_dict(self):
+        """Retorna os contadores e a taxa de acerto (tudo exceto 'misses')."""
+        with self._lock:
+            values = dict(self._values)
+        total = sum(values.values())
+        hits = total - values.get('misses', 0)
+        values['hit_ratio'] = hits / total if total else 0.0
+        return values
@@ -0,0 +1,106 @@
+"""
+Pool de conexões ao banco, compartilhado entre as threads do processo.
+"""
+import os
+import threading
+import time
+
+
+class PoolTimeout(Exception):
+    """Nenhuma conexão ficou livre dentro do tempo de espera."""
+
+
+class ConnectionPool:
+    """Pool de conexões DB-API com tamanho máximo.
+
+    As conexões devolvidas ficam ociosas e são reaproveitadas na ordem
+    inversa (LIFO), então as mais recentes, com menos chance de terem caído,
+    são usadas primeiro. Quando as max_size conexões estão em uso, getconn()
+    espera até `timeout` segundos por uma devolução. Conexões abertas há mais
+    de max_lifetime segundos são fechadas ao serem devolvidas.
+
+    O pool guarda o pid de quem o criou: depois de um fork (workers do
+    gunicorn com --preload, por exemplo) o processo filho não pode usar os
+    sockets do pai, e deve criar outro pool (veja get_pool).
+    """
+
+    def __init__(self, max_size, timeout=30, max_lifetime=3600):
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.pid = os.getpid()
+        self._idle = []
+        self._created = {}
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+
+    def getconn(self, connect):
+        """Retorna (conexão, reaproveitada).
+
+        `connect` é chamado para abrir uma conexão nova quando não há
+        nenhuma ociosa.
+        """
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PoolTimeout(
+                f'No connection available after {self.timeout}s '
+                f'(max_size={self.max_size}).'
+            )
+        try:
+            with self._lock:
+                connection = self._idle.pop() if self._idle else None
+            if connection is not None:
+                return connection, True
+            connection = connect()
+            with self._lock:
+                self._created[id(connection)] = time.monotonic()
+            return connection, False
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def putconn(self, connection, close=False):
+        """Devolve a conexão ao pool, ou a fecha se close=True."""
+        try:
+            with self._lock:
+                created = self._created.get(id(connection), 0)
+                expired = time.monotonic() - created > self.max_lifetime
+                if close or expired or connection.closed:
+                    self._created.pop(id(connection), None)
+                else:
+                    self._idle.append(connection)
+                    return
+            if not connection.closed:
+                connection.close()
+        finally:
+            self._slots.release()
+
+    def closeall(self):
+        """Fecha as conexões ociosas."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+            for connection in idle:
+                self._created.pop(id(connection), None)
+        for connection in idle:
+            connection.close()
+
+    def __len__(self):
+        return len(self._idle)
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+# Pools herdados em um fork. Ficam referenciados para que as conexões do
+# processo pai não sejam fechadas pelo coletor de lixo do filho.
+_inherited = []
+
+
+def get_pool(key, **options):
+    """Pool da chave no processo atual, criado no primeiro uso."""
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is not None and pool.pid != os.getpid():
+            _inherited.append(pool)
+            pool = None
+        if pool is None:
+            pool = _pools[key] = ConnectionPool(**options)
+        return pool
@@ -0,0 +1,115 @@
+"""
+Roteamento das leituras para réplicas do banco.
+"""
+import logging
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections
+
+logger = logging.getLogger(__name__)
+
+PIN_PREFIX = 'db:pin:'
+
+# Réplica usada pelas leituras do contexto atual (requisição ou thread);
+# None mantém tudo no primário.
+_read_alias = ContextVar('read_alias', default=None)
+# Réplicas que falharam ao conectar -> instante até quando são evitadas.
+_unavailable = {}
+
+
+def choose_replica():
+    """Escolhe uma réplica disponível, ou None para usar o primário.
+
+    Uma réplica que não aceita conexão é evitada por REPLICA_RETRY_SECONDS
+    segundos, e a escolha passa para a próxima (ou para o primário).
+    """
+    now = time.monotonic()
+    replicas = [
+        alias for alias in settings.REPLICA_DATABASES
+        if _unavailable.get(alias, 0) <= now
+    ]
+    random.shuffle(replicas)
+    for alias in replicas:
+        try:
+            connections[alias].ensure_connection()
+        except OperationalError:
+            logger.warning('Replica %s unavailable, skipping.', alias)
+            _unavailable[alias] = now + settings.REPLICA_RETRY_SECONDS
+            continue
+        return alias
+    return None
+
+
+def use_replica():
+    """Passa as leituras do contexto atual para uma réplica.
+
+    Retorna o token para reset_replica().
+    """
+    return _read_alias.set(choose_replica())
+
+
+def reset_replica(token):
+    """Desfaz o use_replica() correspondente."""
+    _read_alias.reset(token)
+
+
+@contextmanager
+def replica_reads():
+    """Lê das réplicas dentro do bloco."""
+    token = use_replica()
+    try:
+        yield
+    finally:
+        reset_replica(token)
+
+
+def pin_to_primary(user_id):
+    """Mantém as leituras do usuário no primário por REPLICA_PIN_SECONDS.
+
+    Chamado após as escritas, para que o usuário leia o que acabou de gravar
+    mesmo com atraso na replicação. A marca fica no cache, e não em um
+    cookie, porque os clientes com token costumam não guardá-los; para
+    valer em todos os workers o cache precisa ser central (CACHE_BACKEND).
+    """
+    cache.set(f'{PIN_PREFIX}{user_id}', True, settings.REPLICA_PIN_SECONDS)
+
+
+def is_pinned(user_id):
+    """Verifica se o usuário escreveu há menos de REPLICA_PIN_SECONDS."""
+    return cache.get(f'{PIN_PREFIX}{user_id}', False)
+
+
+class ReplicaRouter:
+    """Envia para a réplica escolhida as leituras dos modelos replicados.
+
+    Só os modelos em REPLICA_MODELS (receitas, tags, ingredientes e os
+    vínculos entre eles) vão para a réplica, e só dentro de use_replica(),
+    que as views de leitura ativam (veja recipe.replicas). Usuários e tokens
+    são sempre lidos do primário, já que um login recém-feito pode ainda não
+    ter sido replicado. As escritas vão sempre para o primário, inclusive as
+    de objetos lidos de uma réplica.
+    """
+
+    def _replicated(self, model):
+        return model._meta.label_lower in settings.REPLICA_MODELS
+
+    def db_for_read(self, model, **hints):
+        if self._replicated(model):
+            return _read_alias.get()
+        return None
+
+    def db_for_write(self, model, **hints):
+        if self._replicated(model):
+            return DEFAULT_DB_ALIAS
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.REPLICA_DATABASES}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
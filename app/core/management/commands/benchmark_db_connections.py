@@ -0,0 +1,129 @@
+"""
+Django command to compare request latency across connection strategies.
+"""
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from core.models import Recipe
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, connections
+
+MODES = {
+    # Nova conexão a cada requisição (o comportamento sem CONN_MAX_AGE).
+    'new': {'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False},
+    # Uma conexão persistente por thread, conferida a cada requisição.
+    'persistent': {'CONN_MAX_AGE': 600, 'CONN_HEALTH_CHECKS': True},
+    # Conexões do pool do processo (só com core.db.postgresql).
+    'pool': {'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': True},
+}
+
+
+class Command(BaseCommand):
+    """Django command to load-test database connection handling."""
+    help = (
+        'Simulate concurrent requests, each running one small recipe query '
+        'between the request_started/request_finished connection handling, '
+        'and report p50/p99 latency for each connection strategy.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests', type=int, default=2000,
+            help='Requests simulated per mode (default: 2000).',
+        )
+        parser.add_argument(
+            '--concurrency', type=int, default=8,
+            help='Threads issuing requests; also the pool size '
+                 '(default: 8).',
+        )
+        parser.add_argument(
+            '--mode', action='append', dest='modes', choices=list(MODES),
+            help='Strategy to measure (default: all).',
+        )
+        parser.add_argument(
+            '--database', default=DEFAULT_DB_ALIAS,
+            help='Database alias to use (default: "default").',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        alias = options['database']
+        for mode in options['modes'] or list(MODES):
+            if mode == 'pool' and not hasattr(connections[alias], 'pool'):
+                self.stderr.write(
+                    'pool: skipped (ENGINE is not core.db.postgresql).'
+                )
+                continue
+            latencies, elapsed = self._run(alias, mode, options)
+            p50, p99 = self._percentiles(latencies)
+            self.stdout.write(
+                f'{mode}: p50 {p50 * 1000:.2f} ms, p99 {p99 * 1000:.2f} ms, '
+                f'{len(latencies) / elapsed:.0f} requests/s'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'{options["requests"]} requests per mode, '
+            f'{options["concurrency"]} threads.'
+        ))
+
+    def _run(self, alias, mode, options):
+        """Run the requests with the mode's settings applied to the alias.
+
+        Worker threads open their own connections, which read the alias
+        settings when they connect, so the settings are changed in place
+        and restored afterwards.
+        """
+        settings_dict = connections.databases[alias]
+        saved = {
+            key: settings_dict.get(key)
+            for key in ('CONN_MAX_AGE', 'CONN_HEALTH_CHECKS', 'OPTIONS')
+        }
+        settings_dict.update(MODES[mode])
+        settings_dict['OPTIONS'] = {
+            key: value for key, value in settings_dict['OPTIONS'].items()
+            if key != 'pool'
+        }
+        if mode == 'pool':
+            settings_dict['OPTIONS']['pool'] = {
+                'max_size': options['concurrency'],
+            }
+
+        concurrency = options['concurrency']
+        share, extra = divmod(options['requests'], concurrency)
+        counts = [share + (i < extra) for i in range(concurrency)]
+        start = time.perf_counter()
+        try:
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                results = list(executor.map(
+                    lambda count: self._requests(alias, count), counts,
+                ))
+            elapsed = time.perf_counter() - start
+            if mode == 'pool':
+                connections[alias].pool.closeall()
+        finally:
+            settings_dict.update(saved)
+        return [latency for result in results for latency in result], elapsed
+
+    def _requests(self, alias, count):
+        """Simulate `count` sequential requests in this thread."""
+        latencies = []
+        try:
+            for _ in range(count):
+                start = time.perf_counter()
+                close_old_connections()
+                list(
+                    Recipe.objects.using(alias).order_by('-id')
+                    .values_list('id', 'title')[:10]
+                )
+                close_old_connections()
+                latencies.append(time.perf_counter() - start)
+        finally:
+            connections.close_all()
+        return latencies
+
+    def _percentiles(self, latencies):
+        """p50 and p99 of the latencies."""
+        if len(latencies) < 2:
+            return latencies[0], latencies[0]
+        cuts = statistics.quantiles(latencies, n=100)
+        return cuts[49], cuts[98]
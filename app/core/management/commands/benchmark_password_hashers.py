@@ -0,0 +1,55 @@
+"""
+Django command to measure the cost of a login for each password hasher.
+"""
+import time
+
+from django.conf import settings
+from django.contrib.auth.hashers import get_hasher, get_hashers
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    """Django command to benchmark password verification."""
+    help = (
+        'Time password verification with the configured hashers and report '
+        'logins/second per core (one verification per login).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rounds', type=int, default=20,
+            help='Verifications timed per hasher (default: 20).',
+        )
+        parser.add_argument(
+            '--hasher', action='append', dest='hashers',
+            help='Algorithm to time, e.g. argon2 (default: every one '
+                 'configured whose library is installed).',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        algorithms = options['hashers'] or [
+            hasher.algorithm for hasher in get_hashers()
+        ]
+        preferred = get_hasher().algorithm
+        for algorithm in algorithms:
+            hasher = get_hasher(algorithm)
+            try:
+                encoded = hasher.encode('benchmark-password', hasher.salt())
+            except ValueError as exc:
+                self.stderr.write(f'{algorithm}: skipped ({exc}).')
+                continue
+
+            start = time.perf_counter()
+            for _ in range(options['rounds']):
+                hasher.verify('benchmark-password', encoded)
+            elapsed = (time.perf_counter() - start) / options['rounds']
+
+            marker = ' (preferred)' if algorithm == preferred else ''
+            self.stdout.write(
+                f'{algorithm}{marker}: {elapsed * 1000:.1f} ms/login, '
+                f'{1 / elapsed:.1f} logins/second per core'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'PASSWORD_HASHER={settings.PASSWORD_HASHER}'
+        ))
@@ -0,0 +1,84 @@
+"""
+Django command to remove recipe images no longer used by any recipe.
+"""
+import os
+from datetime import timedelta
+
+from core.models import Recipe, recipe_image_file_path
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    """Django command to garbage-collect recipe images."""
+    help = (
+        'Delete recipe images (and their resized variants) that are not '
+        'referenced by any recipe, and report the space saved by '
+        'deduplication.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Only report what would be deleted.',
+        )
+        parser.add_argument(
+            '--min-age', type=int, default=3600,
+            help='Keep files modified less than this many seconds ago, '
+                 'which may belong to uploads not yet committed '
+                 '(default: 3600).',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        storage = Recipe._meta.get_field('image').storage
+        directory = os.path.dirname(recipe_image_file_path(None, ''))
+        try:
+            filenames = storage.listdir(directory)[1]
+        except FileNotFoundError:
+            filenames = []
+
+        references = dict(
+            Recipe.objects.exclude(image='').exclude(image__isnull=True)
+            .values_list('image').annotate(count=Count('id'))
+            .values_list('image', 'count')
+        )
+        referenced = {
+            self._owner(os.path.basename(name)) for name in references
+        }
+        cutoff = timezone.now() - timedelta(seconds=options['min_age'])
+
+        removed = freed = 0
+        for filename in filenames:
+            if self._owner(filename) in referenced:
+                continue
+            name = os.path.join(directory, filename)
+            if storage.get_modified_time(name) > cutoff:
+                continue
+            freed += storage.size(name)
+            removed += 1
+            if not options['dry_run']:
+                storage.delete(name)
+
+        saved = sum(
+            storage.size(name) * (count - 1)
+            for name, count in references.items()
+            if count > 1 and storage.exists(name)
+        )
+        shared = sum(1 for count in references.values() if count > 1)
+
+        action = 'Would delete' if options['dry_run'] else 'Deleted'
+        self.stdout.write(f'{action} {removed} files ({freed} bytes).')
+        self.stdout.write(self.style.SUCCESS(
+            f'Deduplication saves {saved} bytes across {shared} shared '
+            'images.'
+        ))
+
+    def _owner(self, filename):
+        """Name of the original image a file belongs to.
+
+        Variants are named after the original (see recipe.images), so
+        '<hash>_thumbnail.webp' belongs to '<hash>.jpg'.
+        """
+        return os.path.splitext(filename)[0].split('_')[0]
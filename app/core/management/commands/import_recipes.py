@@ -0,0 +1,178 @@
+"""
+Django command to import recipes from NDJSON or CSV files.
+"""
+import csv
+import io
+import itertools
+import json
+import os
+import time
+
+from core.models import ImportCheckpoint, Recipe
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from recipe.serializers import RecipeDetailSerializer, RecipeListSerializer
+
+IMPORT_FIELDS = ['title', 'description', 'time_minutes', 'price', 'link']
+RELATED_FIELDS = ['tags', 'ingredients']
+
+
+class CopyRecipeListSerializer(RecipeListSerializer):
+    """Insert recipes with Postgres COPY instead of INSERT.
+
+    COPY does not return the generated ids, so they are reserved from the
+    table sequence first and written explicitly.
+    """
+
+    def _insert_recipes(self, recipes):
+        table = Recipe._meta.db_table
+        fields = [
+            field for field in Recipe._meta.concrete_fields
+            if not field.primary_key
+        ]
+        columns = ', '.join(
+            connection.ops.quote_name(field.column)
+            for field in [Recipe._meta.pk] + fields
+        )
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT nextval(pg_get_serial_sequence(%s, 'id')) "
+                "FROM generate_series(1, %s)",
+                [table, len(recipes)],
+            )
+            for recipe, (pk,) in zip(recipes, cursor.fetchall()):
+                recipe.pk = pk
+
+            # Unquoted empty values are NULL, quoted ones empty strings.
+            buffer = io.StringIO()
+            writer = csv.writer(buffer, quoting=csv.QUOTE_NONNUMERIC)
+            for recipe in recipes:
+                writer.writerow([recipe.pk] + [
+                    field.get_db_prep_save(
+                        field.pre_save(recipe, add=True), connection,
+                    )
+                    for field in fields
+                ])
+            buffer.seek(0)
+            cursor.copy_expert(
+                f'COPY {connection.ops.quote_name(table)} ({columns}) '
+                'FROM STDIN WITH (FORMAT csv)',
+                buffer,
+            )
+
+
+class Command(BaseCommand):
+    """Django command to import recipes in batches."""
+    help = (
+        'Import recipes (with tags and ingredients) for a user from an '
+        'NDJSON or CSV file, in the same layout as the recipe export.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='NDJSON or CSV file to import.')
+        parser.add_argument(
+            '--user', required=True, help='Email of the recipes owner.',
+        )
+        parser.add_argument(
+            '--format', choices=['ndjson', 'csv'],
+            help='File format (default: guessed from the file extension).',
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--checkpoint',
+            help='Name of the checkpoint recording the rows already '
+                 'committed (default: the absolute path of the file).',
+        )
+        parser.add_argument(
+            '--no-copy', action='store_true',
+            help='Do not use COPY even when the database is Postgres.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        try:
+            user = get_user_model().objects.get(email=options['user'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f'User {options["user"]} does not exist.')
+
+        path = options['path']
+        file_format = options['format'] or (
+            'csv' if path.endswith('.csv') else 'ndjson'
+        )
+        checkpoint, _ = ImportCheckpoint.objects.get_or_create(
+            user=user, name=options['checkpoint'] or os.path.abspath(path),
+        )
+        done = checkpoint.rows
+        if done:
+            self.stdout.write(f'Resuming after {done} rows...')
+
+        use_copy = connection.vendor == 'postgresql' and not options['no_copy']
+        list_class = CopyRecipeListSerializer if use_copy else \
+            RecipeListSerializer
+        context = {'user': user}
+
+        start = time.monotonic()
+        imported = failed = 0
+        with open(path, newline='') as file:
+            rows = itertools.islice(
+                self._read_rows(file, file_format), done, None,
+            )
+            while True:
+                batch = list(itertools.islice(rows, options['batch_size']))
+                if not batch:
+                    break
+
+                valid = []
+                for number, row in enumerate(batch, start=done + 1):
+                    serializer = RecipeDetailSerializer(
+                        data=self._to_payload(row), context=context,
+                    )
+                    if serializer.is_valid():
+                        valid.append(serializer.validated_data)
+                    else:
+                        failed += 1
+                        self.stderr.write(f'Row {number}: {serializer.errors}')
+
+                # The checkpoint commits with the batch, so a crash can
+                # neither lose a committed batch nor import it twice.
+                with transaction.atomic():
+                    if valid:
+                        list_class(
+                            child=RecipeDetailSerializer(), context=context,
+                        ).create(valid)
+                    checkpoint.rows = done + len(batch)
+                    checkpoint.save(update_fields=['rows'])
+                done += len(batch)
+                imported += len(valid)
+
+                elapsed = time.monotonic() - start
+                self.stdout.write(
+                    f'{done} rows processed '
+                    f'({imported / elapsed:.0f} rows/second)'
+                )
+
+        checkpoint.delete()
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {imported} recipes, {failed} rows rejected.'
+        ))
+
+    def _read_rows(self, file, file_format):
+        """Yield each row of the file as a dict."""
+        if file_format == 'csv':
+            yield from csv.DictReader(file)
+            return
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
+
+    def _to_payload(self, row):
+        """Convert an exported row into the recipe API payload."""
+        data = {field: row[field] for field in IMPORT_FIELDS if field in row}
+        for field in RELATED_FIELDS:
+            names = row.get(field) or []
+            if isinstance(names, str):
+                names = [name for name in names.split('|') if name]
+            data[field] = [{'name': name} for name in names]
+        return data
@@ -0,0 +1,36 @@
+"""
+Django command to recompute the recipe counters of tags and ingredients.
+"""
+from core.models import Ingredient, Tag
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from recipe.counters import recount
+
+
+class Command(BaseCommand):
+    """Django command to recompute Tag/Ingredient.recipe_count."""
+    help = (
+        'Recompute recipe_count of tags and ingredients from the recipe '
+        'links, with one UPDATE per model.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user', help='Only recompute the items of this user (email).',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        user = None
+        if options['user']:
+            try:
+                user = get_user_model().objects.get(email=options['user'])
+            except get_user_model().DoesNotExist:
+                raise CommandError(f'User {options["user"]} does not exist.')
+
+        for model in (Tag, Ingredient):
+            updated = recount(model, user=user)
+            self.stdout.write(
+                f'{model._meta.verbose_name_plural}: {updated} recounted.'
+            )
+        self.stdout.write(self.style.SUCCESS('Recipe counts recomputed.'))
@@ -0,0 +1,74 @@
+# Generated by Django 3.2.25 on 2026-10-18 05:06
+
+from core.operations import (AddIndexConcurrently,
+                             AddUniqueConstraintConcurrently)
+from django.db import migrations, models, transaction
+
+# Os índices são criados com CONCURRENTLY no Postgres para não bloquear
+# escritas nas tabelas, o que exige uma migration fora de transação.
+
+
+def remove_duplicated_names(apps, schema_editor):
+    """Une tags/ingredientes com o mesmo nome para o mesmo usuário.
+
+    Os vínculos das duplicatas são movidos para o registro mais antigo antes
+    da criação da restrição única em (user, name).
+    """
+    Recipe = apps.get_model('core', 'Recipe')
+    with transaction.atomic(using=schema_editor.connection.alias):
+        for field_name, model_name in (('tags', 'Tag'), ('ingredients', 'Ingredient')):
+            model = apps.get_model('core', model_name)
+            through = getattr(Recipe, field_name).through
+            column = Recipe._meta.get_field(field_name).m2m_reverse_name()
+
+            keep = {}
+            duplicates = {}
+            for obj_id, user_id, name in model.objects.order_by('id').values_list(
+                'id', 'user_id', 'name',
+            ):
+                kept_id = keep.setdefault((user_id, name), obj_id)
+                if kept_id != obj_id:
+                    duplicates[obj_id] = kept_id
+            if not duplicates:
+                continue
+
+            linked = set(
+                through.objects.filter(
+                    **{f'{column}__in': set(duplicates.values())}
+                ).values_list('recipe_id', column)
+            )
+            links = through.objects.filter(**{f'{column}__in': duplicates})
+            for link in links:
+                kept_id = duplicates[getattr(link, column)]
+                if (link.recipe_id, kept_id) in linked:
+                    link.delete()
+                else:
+                    setattr(link, column, kept_id)
+                    link.save()
+                    linked.add((link.recipe_id, kept_id))
+            model.objects.filter(id__in=duplicates).delete()
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('core', '0007_recipe_image'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicated_names, migrations.RunPython.noop),
+        AddIndexConcurrently(
+            model_name='recipe',
+            index=models.Index(fields=['user', '-id'], name='recipe_user_id_desc_idx'),
+        ),
+        AddUniqueConstraintConcurrently(
+            model_name='ingredient',
+            constraint=models.UniqueConstraint(fields=('user', 'name'), name='unique_ingredient_user_name'),
+        ),
+        AddUniqueConstraintConcurrently(
+            model_name='tag',
+            constraint=models.UniqueConstraint(fields=('user', 'name'), name='unique_tag_user_name'),
+        ),
+    ]
@@ -0,0 +1,76 @@
+# Generated by Django 3.2.25 on 2026-10-18 05:17
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.db import migrations
+
+BATCH_SIZE = 10000
+
+
+def fill_search_vectors(apps, schema_editor):
+    """Preenche o search_vector das receitas existentes em lotes de ids.
+
+    O índice GIN é criado depois, o que é mais rápido do que atualizá-lo a
+    cada linha. A expressão é a mesma de recipe.search.search_vector.
+    """
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+
+    Recipe = apps.get_model('core', 'Recipe')
+    names = (
+        "coalesce((SELECT string_agg(t.name, ' ') FROM {table} t "
+        "JOIN {through} l ON l.{column} = t.id "
+        "WHERE l.recipe_id = r.id), '')"
+    )
+    sql = (
+        'UPDATE {recipe} r SET search_vector = '
+        "setweight(to_tsvector(%(config)s, coalesce(r.title, '')), 'A') || "
+        "setweight(to_tsvector(%(config)s, {tags} || ' ' || {ingredients}), "
+        "'B') || "
+        "setweight(to_tsvector(%(config)s, coalesce(r.description, '')), 'C') "
+        'WHERE r.id > %(start)s AND r.id <= %(end)s'
+    ).format(
+        recipe=Recipe._meta.db_table,
+        tags=names.format(
+            table=apps.get_model('core', 'Tag')._meta.db_table,
+            through=Recipe.tags.through._meta.db_table,
+            column='tag_id',
+        ),
+        ingredients=names.format(
+            table=apps.get_model('core', 'Ingredient')._meta.db_table,
+            through=Recipe.ingredients.through._meta.db_table,
+            column='ingredient_id',
+        ),
+    )
+
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT max(id) FROM {Recipe._meta.db_table}')
+        last_id = cursor.fetchone()[0] or 0
+        for start in range(0, last_id, BATCH_SIZE):
+            cursor.execute(sql, {
+                'config': settings.RECIPE_SEARCH_CONFIG,
+                'start': start,
+                'end': start + BATCH_SIZE,
+            })
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_recipe_image_storage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(fill_search_vectors, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='recipe_search_vector_idx'),
+        ),
+    ]
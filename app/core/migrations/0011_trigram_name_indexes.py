@@ -0,0 +1,50 @@
+# Generated by Django 3.2.25 on 2026-10-18 05:40
+
+from django.db import DatabaseError, migrations, transaction
+
+# Índices de trigramas para o autocomplete (recipe.autocomplete). Eles não
+# ficam no Meta dos modelos porque dependem do pg_trgm: sem a extensão (ou
+# sem permissão para criá-la) a migration não falha e o autocomplete usa o
+# fallback em memória.
+TRIGRAM_INDEXES = [
+    ('tag_name_trgm_idx', 'core_tag'),
+    ('ingredient_name_trgm_idx', 'core_ingredient'),
+]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+
+    with connection.cursor() as cursor:
+        try:
+            with transaction.atomic(using=connection.alias):
+                cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        except DatabaseError:
+            return
+        for name, table in TRIGRAM_INDEXES:
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS {name} ON {table} '
+                'USING gin (name gin_trgm_ops)'
+            )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        for name, _ in TRIGRAM_INDEXES:
+            cursor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_recipe_search_vector'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
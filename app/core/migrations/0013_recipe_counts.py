@@ -0,0 +1,52 @@
+# Generated by Django 3.2.25 on 2026-10-18 05:24
+
+from core.operations import AddIndexConcurrently
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_recipe_counts(apps, schema_editor):
+    """Calcula o recipe_count inicial de tags e ingredientes."""
+    Recipe = apps.get_model('core', 'Recipe')
+    for field_name, model_name in (('tags', 'Tag'), ('ingredients', 'Ingredient')):
+        model = apps.get_model('core', model_name)
+        through = getattr(Recipe, field_name).through
+        column = Recipe._meta.get_field(field_name).m2m_reverse_name()
+        counts = through.objects.filter(**{column: OuterRef('pk')}).values(
+            column,
+        ).annotate(count=Count('id')).values('count')
+        model.objects.update(recipe_count=Coalesce(
+            Subquery(counts, output_field=IntegerField()), 0,
+        ))
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('core', '0012_recipe_sort_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ingredient',
+            name='recipe_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='tag',
+            name='recipe_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(fill_recipe_counts, migrations.RunPython.noop),
+        AddIndexConcurrently(
+            model_name='ingredient',
+            index=models.Index(fields=['user', 'recipe_count', 'name'], name='ingredient_user_count_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='tag',
+            index=models.Index(fields=['user', 'recipe_count', 'name'], name='tag_user_count_idx'),
+        ),
+    ]
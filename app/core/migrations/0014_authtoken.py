@@ -0,0 +1,55 @@
+# Generated by Django 3.2.25 on 2026-10-18 05:30
+
+import hashlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+import django.db.models.deletion
+
+
+def copy_legacy_tokens(apps, schema_editor):
+    """Move os tokens do rest_framework.authtoken para a nova tabela.
+
+    Os clientes já logados continuam autenticados, agora com expiração.
+    """
+    Token = apps.get_model('authtoken', 'Token')
+    AuthToken = apps.get_model('core', 'AuthToken')
+    db = schema_editor.connection.alias
+    expires = timezone.now() + timedelta(seconds=settings.TOKEN_TTL)
+    batch = []
+    for key, user_id in Token.objects.using(db).values_list(
+        'key', 'user_id',
+    ).iterator():
+        batch.append(AuthToken(
+            key_hash=hashlib.sha256(key.encode()).hexdigest(),
+            user_id=user_id,
+            expires=expires,
+        ))
+        if len(batch) == 10000:
+            AuthToken.objects.using(db).bulk_create(batch)
+            batch = []
+    AuthToken.objects.using(db).bulk_create(batch)
+    Token.objects.using(db).all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authtoken', '0003_tokenproxy'),
+        ('core', '0013_recipe_counts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthToken',
+            fields=[
+                ('key_hash', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('expires', models.DateTimeField(db_index=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='auth_tokens', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.RunPython(copy_legacy_tokens, migrations.RunPython.noop),
+    ]
@@ -2,19 +2,21 @@
 Modelos do banco de dados
 """
 import os
-import uuid
 
+from core.storage import ContentAddressedStorage
 from django.conf import settings
 from django.contrib.auth.models import (AbstractBaseUser, BaseUserManager,
                                         PermissionsMixin)
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 
 
 def recipe_image_file_path(instance, filename):
-    """Generate file path for new recipe image."""
-    ext = os.path.splitext(filename)[1]
-    filename = f'{uuid.uuid4()}{ext}'
+    """Generate file path for new recipe image.
 
+    O nome do arquivo é trocado pelo hash do conteúdo no storage.
+    """
     return os.path.join('uploads', 'recipe', filename)
 
 class UserManager(BaseUserManager):
@@ -45,6 +47,8 @@ class User(AbstractBaseUser, PermissionsMixin):
     name = models.CharField(max_length=255)
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
+    # Incrementado para revogar os tokens assinados (user.tokens) já emitidos.
+    token_generation = models.PositiveIntegerField(default=0)
 
     objects = UserManager()
 
@@ -64,7 +68,35 @@ class Recipe(models.Model):
     link = models.CharField(max_length=255, blank=True)
     tags = models.ManyToManyField('Tag', default=None, blank=True)
     ingredients = models.ManyToManyField('Ingredient', default=None, blank=True)
-    image = models.ImageField(null=True, upload_to=recipe_image_file_path)
+    image = models.ImageField(
+        null=True,
+        upload_to=recipe_image_file_path,
+        storage=ContentAddressedStorage(),
+    )
+    # Mantido pela app recipe (recipe.search) a cada escrita.
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # Listagem por usuário ordenada por -id (paginação por cursor).
+            models.Index(
+                fields=['user', '-id'], name='recipe_user_id_desc_idx',
+            ),
+            # Filtros de faixa e ordenação por campo (id como desempate).
+            models.Index(
+                fields=['user', 'price', 'id'], name='recipe_user_price_idx',
+            ),
+            models.Index(
+                fields=['user', 'time_minutes', 'id'],
+                name='recipe_user_time_idx',
+            ),
+            models.Index(
+                fields=['user', 'title', 'id'], name='recipe_user_title_idx',
+            ),
+            GinIndex(
+                fields=['search_vector'], name='recipe_search_vector_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.title
@@ -76,6 +108,24 @@ class Tag(models.Model):
         on_delete=models.CASCADE,
     )
     name = models.CharField(max_length=255)
+    # Número de receitas com a tag, mantido pela app recipe (recipe.counters).
+    recipe_count = models.IntegerField(default=0)
+
+    class Meta:
+        # O índice único também atende a listagem por usuário ordenada por
+        # nome.
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'name'], name='unique_tag_user_name',
+            ),
+        ]
+        indexes = [
+            # assigned_only (recipe_count > 0) e ordenação por popularidade.
+            models.Index(
+                fields=['user', 'recipe_count', 'name'],
+                name='tag_user_count_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -87,6 +137,66 @@ class Ingredient(models.Model):
         on_delete=models.CASCADE
     )
     name = models.CharField(max_length=255)
+    recipe_count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'name'], name='unique_ingredient_user_name',
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', 'recipe_count', 'name'],
+                name='ingredient_user_count_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return self.name
+
+
+class AuthToken(models.Model):
+    """Token de autenticação com expiração.
+
+    Só o SHA-256 da chave é guardado, e ele mesmo é a chave primária, então
+    um vazamento da tabela não expõe tokens válidos e cada linha tem um
+    único índice além dos de user e expires.
+    """
+    key_hash = models.CharField(max_length=64, primary_key=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        related_name='auth_tokens',
+        on_delete=models.CASCADE,
+    )
+    created = models.DateTimeField(auto_now_add=True)
+    # Renovado a cada uso (TTL deslizante), até created + TOKEN_MAX_AGE.
+    expires = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return self.key_hash[:8]
+
+
+class ImportCheckpoint(models.Model):
+    """Linhas de um arquivo já importadas pelo comando import_recipes.
+
+    É gravado na mesma transação de cada lote, então uma interrupção entre
+    o commit do lote e o registro do progresso não importa o lote de novo.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+    )
+    name = models.CharField(max_length=255)
+    rows = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'name'],
+                name='unique_importcheckpoint_user_name',
+            ),
+        ]
 
     def __str__(self):
-        return self.name
\ No newline at end of file
+        return f'{self.name}: {self.rows}'
@@ -0,0 +1,62 @@
+"""
+Operações de migration para criar índices sem bloquear escritas.
+"""
+from django.contrib.postgres import operations
+from django.db import migrations
+
+
+class AddIndexConcurrently(operations.AddIndexConcurrently):
+    """AddIndexConcurrently que cai para um AddIndex comum fora do Postgres."""
+
+    def database_forwards(self, app_label, schema_editor, from_state,
+                          to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_forwards(
+                app_label, schema_editor, from_state, to_state,
+            )
+        else:
+            migrations.AddIndex.database_forwards(
+                self, app_label, schema_editor, from_state, to_state,
+            )
+
+    def database_backwards(self, app_label, schema_editor, from_state,
+                           to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_backwards(
+                app_label, schema_editor, from_state, to_state,
+            )
+        else:
+            migrations.AddIndex.database_backwards(
+                self, app_label, schema_editor, from_state, to_state,
+            )
+
+
+class AddUniqueConstraintConcurrently(migrations.AddConstraint):
+    """Cria a restrição única a partir de um índice criado com CONCURRENTLY.
+
+    No Postgres o índice único é criado sem bloquear escritas e depois
+    promovido a restrição com ADD CONSTRAINT ... USING INDEX.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state,
+                          to_state):
+        if schema_editor.connection.vendor != 'postgresql':
+            return super().database_forwards(
+                app_label, schema_editor, from_state, to_state,
+            )
+
+        model = to_state.apps.get_model(app_label, self.model_name)
+        quote = schema_editor.quote_name
+        table = quote(model._meta.db_table)
+        name = quote(self.constraint.name)
+        columns = ', '.join(
+            quote(model._meta.get_field(field).column)
+            for field in self.constraint.fields
+        )
+        schema_editor.execute(
+            f'CREATE UNIQUE INDEX CONCURRENTLY {name} ON {table} ({columns})'
+        )
+        schema_editor.execute(
+            f'ALTER TABLE {table} ADD CONSTRAINT {name} '
+            f'UNIQUE USING INDEX {name}'
+        )
@@ -0,0 +1,50 @@
+"""
+Storage endereçado por conteúdo.
+"""
+import hashlib
+import os
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+
+def content_hash(content):
+    """SHA-256 do conteúdo do arquivo, lido em chunks."""
+    digest = hashlib.sha256()
+    for chunk in content.chunks():
+        digest.update(chunk)
+    content.seek(0)
+    return digest.hexdigest()
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """Nomeia os arquivos pelo hash do conteúdo, sem gravar duplicatas.
+
+    O diretório e a extensão vêm do nome gerado pelo upload_to, mas o nome
+    do arquivo passa a ser o SHA-256 do conteúdo. Se um arquivo com o mesmo
+    hash já existe ele é reaproveitado e nada é gravado, então a mesma imagem
+    enviada para várias receitas ocupa espaço uma única vez.
+
+    Os arquivos podem ser compartilhados, então não são removidos junto com
+    as receitas: o comando gc_recipe_images apaga os que ficaram sem
+    referência. Reaproveitar um arquivo atualiza a data de modificação, para
+    que o --min-age do comando o proteja até o commit do upload.
+    """
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+
+        dirname, filename = os.path.split(name)
+        ext = os.path.splitext(filename)[1].lower()
+        name = os.path.join(dirname, f'{content_hash(content)}{ext}')
+        if self.exists(name):
+            os.utime(self.path(name))
+            return name
+        # Numa corrida entre dois uploads iguais, o segundo recebe um sufixo
+        # do get_available_name e fica duplicado, mas continua correto.
+        return super().save(name, content, max_length)
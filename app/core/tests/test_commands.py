@@ -1,12 +1,26 @@
 """
 Test custom Django management commands.
 """
+import json
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
 from unittest.mock import patch
 
-from django.core.management import call_command
+from core.models import (AuthToken, ImportCheckpoint, Ingredient, Recipe,
+                         Tag)
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import CommandError, call_command
 from django.db.utils import OperationalError
-from django.test import SimpleTestCase
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
 from psycopg2 import OperationalError as Psycopg2OpError
+from recipe.serializers import RecipeListSerializer
 
 
 @patch('core.management.commands.wait_for_db.Command.check')
@@ -31,3 +45,305 @@ class CommandTests(SimpleTestCase):
 
         self.assertEqual(patched_check.call_count, 6)
         patched_check.assert_called_with(databases=['default'])
+
+
+class ImportRecipesCommandTests(TestCase):
+    """Test the import_recipes command."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'import@example.com',
+            'testpass123',
+        )
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def _write(self, name, content):
+        path = os.path.join(self.tmpdir.name, name)
+        with open(path, 'w') as file:
+            file.write(content)
+        return path
+
+    def _import(self, path, **options):
+        call_command(
+            'import_recipes', path, user=self.user.email,
+            stdout=StringIO(), stderr=StringIO(), **options,
+        )
+
+    def _ndjson(self, count):
+        return ''.join(
+            json.dumps({
+                'title': f'Recipe {i}',
+                'time_minutes': 10,
+                'price': '5.25',
+                'tags': ['Dinner'],
+                'ingredients': ['Salt', f'Ingredient {i}'],
+            }) + '\n'
+            for i in range(count)
+        )
+
+    def test_import_ndjson(self):
+        """Test importing recipes from NDJSON in batches."""
+        path = self._write('recipes.ndjson', self._ndjson(5))
+
+        self._import(path, batch_size=2)
+
+        recipes = Recipe.objects.filter(user=self.user)
+        self.assertEqual(recipes.count(), 5)
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 1)
+        self.assertEqual(Ingredient.objects.filter(user=self.user).count(), 6)
+        recipe = recipes.get(title='Recipe 3')
+        self.assertEqual(
+            sorted(i.name for i in recipe.ingredients.all()),
+            ['Ingredient 3', 'Salt'],
+        )
+        self.assertFalse(ImportCheckpoint.objects.exists())
+
+    def test_import_csv(self):
+        """Test importing recipes from CSV."""
+        path = self._write(
+            'recipes.csv',
+            'id,title,description,time_minutes,price,link,tags,ingredients\n'
+            '7,Curry,Spicy,30,4.50,,Thai|Dinner,Rice\n'
+            '8,Toast,,5,1.00,,,\n',
+        )
+
+        self._import(path)
+
+        curry = Recipe.objects.get(user=self.user, title='Curry')
+        self.assertEqual(curry.description, 'Spicy')
+        self.assertEqual(
+            sorted(t.name for t in curry.tags.all()), ['Dinner', 'Thai'],
+        )
+        toast = Recipe.objects.get(user=self.user, title='Toast')
+        self.assertEqual(toast.tags.count(), 0)
+
+    def test_import_skips_invalid_rows(self):
+        """Test invalid rows are reported and the others imported."""
+        path = self._write(
+            'recipes.ndjson',
+            self._ndjson(1) + json.dumps({'title': 'No time'}) + '\n',
+        )
+        stderr = StringIO()
+
+        call_command(
+            'import_recipes', path, user=self.user.email,
+            stdout=StringIO(), stderr=stderr,
+        )
+
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 1)
+        self.assertIn('Row 2', stderr.getvalue())
+
+    def test_import_resumes_from_checkpoint(self):
+        """Test a new run skips the rows committed by a previous one."""
+        path = self._write('recipes.ndjson', self._ndjson(5))
+        ImportCheckpoint.objects.create(
+            user=self.user, name=os.path.abspath(path), rows=3,
+        )
+
+        self._import(path)
+
+        titles = Recipe.objects.filter(user=self.user).values_list(
+            'title', flat=True,
+        )
+        self.assertEqual(sorted(titles), ['Recipe 3', 'Recipe 4'])
+
+    def test_import_checkpoint_commits_with_batch(self):
+        """Test a failed batch rolls back with its checkpoint."""
+        path = self._write('recipes.ndjson', self._ndjson(5))
+        create = RecipeListSerializer.create
+        calls = []
+
+        def fail_second_batch(serializer, validated_data):
+            calls.append(len(validated_data))
+            if len(calls) == 2:
+                raise RuntimeError('crash')
+            return create(serializer, validated_data)
+
+        with patch.object(RecipeListSerializer, 'create', fail_second_batch):
+            with self.assertRaises(RuntimeError):
+                self._import(path, batch_size=2)
+
+        checkpoint = ImportCheckpoint.objects.get(user=self.user)
+        self.assertEqual(checkpoint.rows, 2)
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 2)
+
+        self._import(path, batch_size=2)
+
+        titles = Recipe.objects.filter(user=self.user).values_list(
+            'title', flat=True,
+        )
+        self.assertEqual(sorted(titles), [f'Recipe {i}' for i in range(5)])
+
+    def test_import_unknown_user(self):
+        """Test importing for a user that does not exist."""
+        path = self._write('recipes.ndjson', self._ndjson(1))
+
+        with self.assertRaises(CommandError):
+            call_command('import_recipes', path, user='nobody@example.com')
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class GcRecipeImagesCommandTests(TestCase):
+    """Test the gc_recipe_images command."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'gc@example.com',
+            'testpass123',
+        )
+        self.storage = Recipe._meta.get_field('image').storage
+        self.addCleanup(shutil.rmtree, settings.MEDIA_ROOT, True)
+
+    def _recipe(self, image=None):
+        recipe = Recipe.objects.create(
+            user=self.user, title='Recipe', time_minutes=5, price='1.00',
+        )
+        if image is not None:
+            recipe.image.save('photo.jpg', ContentFile(image))
+        return recipe
+
+    def _gc(self, *args):
+        out = StringIO()
+        call_command('gc_recipe_images', '--min-age=0', *args, stdout=out)
+        return out.getvalue()
+
+    def test_deletes_orphaned_images_and_variants(self):
+        """Test unreferenced images and their variants are deleted."""
+        kept = self._recipe(b'kept').image.name
+        orphan = self._recipe(b'orphan')
+        orphan_name = orphan.image.name
+        variant = orphan_name.replace('.jpg', '_thumbnail.webp')
+        default_storage.save(variant, ContentFile(b'variant'))
+        Recipe.objects.filter(id=orphan.id).delete()
+
+        dry_run = self._gc('--dry-run')
+        self.assertIn('Would delete', dry_run)
+        self.assertTrue(self.storage.exists(orphan_name))
+
+        out = self._gc()
+
+        self.assertIn('Deleted 2 files', out)
+
+        self.assertTrue(self.storage.exists(kept))
+        self.assertFalse(self.storage.exists(orphan_name))
+        self.assertEqual(
+            self.storage.listdir('uploads/recipe')[1],
+            [kept.split('/')[-1]],
+        )
+
+    def test_keeps_recent_files(self):
+        """Test files newer than --min-age are kept."""
+        recipe = self._recipe(b'recent')
+        name = recipe.image.name
+        Recipe.objects.filter(id=recipe.id).delete()
+
+        out = StringIO()
+        call_command('gc_recipe_images', stdout=out)
+
+        self.assertTrue(self.storage.exists(name))
+
+    def test_reports_bytes_saved(self):
+        """Test the space saved by shared images is reported."""
+        self._recipe(b'x' * 100)
+        self._recipe(b'x' * 100)
+        self._recipe(b'x' * 100)
+
+        out = self._gc()
+
+        self.assertIn('saves 200 bytes across 1 shared images', out)
+
+
+class RecountRecipeCountsCommandTests(TestCase):
+    """Test the recount_recipe_counts command."""
+
+    def test_recount(self):
+        """Test drifted counters are recomputed from the links."""
+        user = get_user_model().objects.create_user(
+            'recount@example.com',
+            'testpass123',
+        )
+        tag = Tag.objects.create(user=user, name='Vegan')
+        unused = Tag.objects.create(user=user, name='Unused')
+        ingredient = Ingredient.objects.create(user=user, name='Salt')
+        for title in ['Soup', 'Salad']:
+            recipe = Recipe.objects.create(
+                user=user, title=title, time_minutes=5, price='1.00',
+            )
+            recipe.tags.add(tag)
+            recipe.ingredients.add(ingredient)
+        Tag.objects.update(recipe_count=7)
+        Ingredient.objects.update(recipe_count=0)
+
+        call_command('recount_recipe_counts', stdout=StringIO())
+
+        for obj, count in ((tag, 2), (unused, 0), (ingredient, 2)):
+            obj.refresh_from_db()
+            self.assertEqual(obj.recipe_count, count)
+
+
+class PurgeExpiredTokensCommandTests(TestCase):
+    """Test the purge_expired_tokens command."""
+
+    def test_purge_in_batches(self):
+        """Test only expired tokens are deleted, across several batches."""
+        user = get_user_model().objects.create_user(
+            'purge@example.com',
+            'testpass123',
+        )
+        now = timezone.now()
+        AuthToken.objects.bulk_create([
+            AuthToken(
+                key_hash=f'{i:064x}',
+                user=user,
+                expires=now + timedelta(days=-1 if i < 25 else 1),
+            )
+            for i in range(30)
+        ])
+        out = StringIO()
+
+        with self.assertNumQueries(3):
+            call_command('purge_expired_tokens', '--batch-size=10', stdout=out)
+
+        self.assertIn('Deleted 25 expired tokens', out.getvalue())
+        self.assertEqual(AuthToken.objects.count(), 5)
+        self.assertFalse(AuthToken.objects.filter(expires__lte=now).exists())
+
+
+class BenchmarkPasswordHashersCommandTests(SimpleTestCase):
+    """Test the benchmark_password_hashers command."""
+
+    @override_settings(PASSWORD_PBKDF2_ITERATIONS=1000)
+    def test_reports_logins_per_second(self):
+        """Test a line is reported for each requested hasher."""
+        out = StringIO()
+
+        call_command(
+            'benchmark_password_hashers', '--rounds=2',
+            '--hasher=argon2', '--hasher=pbkdf2_sha256', stdout=out,
+        )
+
+        lines = out.getvalue().splitlines()
+        self.assertTrue(lines[0].startswith('argon2 (preferred): '))
+        self.assertTrue(lines[1].startswith('pbkdf2_sha256: '))
+        self.assertIn('logins/second per core', lines[1])
+
+
+class BenchmarkDbConnectionsCommandTests(SimpleTestCase):
+    """Test the benchmark_db_connections command."""
+    databases = {'default'}
+
+    def test_reports_latency_per_mode(self):
+        """Test a p50/p99 line is reported for each requested mode."""
+        out = StringIO()
+
+        call_command(
+            'benchmark_db_connections', '--requests=20', '--concurrency=2',
+            '--mode=new', '--mode=persistent', stdout=out,
+        )
+
+        lines = out.getvalue().splitlines()
+        self.assertTrue(lines[0].startswith('new: p50 '))
+        self.assertTrue(lines[1].startswith('persistent: p50 '))
+        self.assertIn('p99', lines[1])
+        self.assertIn('20 requests per mode', lines[2])
@@ -0,0 +1,284 @@
+"""
+Tests for the connection pool and the PostgreSQL backend.
+"""
+import threading
+from types import SimpleNamespace
+from unittest import skipUnless
+from unittest.mock import Mock, patch
+
+from core.db import pool as pool_module
+from core.db import router
+from core.db.pool import ConnectionPool, PoolTimeout, get_pool
+from core.db.postgresql.base import DatabaseWrapper
+from core.models import AuthToken, Recipe, Tag
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS, connection
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from psycopg2.extensions import (TRANSACTION_STATUS_IDLE,
+                                 TRANSACTION_STATUS_INTRANS)
+
+
+class FakeConnection:
+    """DB-API connection stand-in tracking closes and rollbacks."""
+
+    isolation_level = None
+
+    def __init__(self):
+        self.closed = 0
+        self.rollbacks = 0
+        self.info = SimpleNamespace(
+            transaction_status=TRANSACTION_STATUS_IDLE,
+        )
+
+    def close(self):
+        self.closed = 1
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.info.transaction_status = TRANSACTION_STATUS_IDLE
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    """Test ConnectionPool."""
+
+    def test_reuses_returned_connections(self):
+        """Test returned connections are handed out again, newest first."""
+        pool = ConnectionPool(max_size=2)
+        first, reused = pool.getconn(FakeConnection)
+        self.assertFalse(reused)
+        second, _ = pool.getconn(FakeConnection)
+        pool.putconn(first)
+        pool.putconn(second)
+
+        conn, reused = pool.getconn(FakeConnection)
+
+        self.assertTrue(reused)
+        self.assertIs(conn, second)
+        self.assertEqual(len(pool), 1)
+
+    def test_closes_discarded_and_broken_connections(self):
+        """Test connections closed or marked for closing are not kept."""
+        pool = ConnectionPool(max_size=2)
+        discarded, _ = pool.getconn(FakeConnection)
+        broken, _ = pool.getconn(FakeConnection)
+        broken.closed = 2
+
+        pool.putconn(discarded, close=True)
+        pool.putconn(broken)
+
+        self.assertTrue(discarded.closed)
+        self.assertEqual(len(pool), 0)
+
+    def test_closes_connections_past_max_lifetime(self):
+        """Test old connections are closed when returned."""
+        pool = ConnectionPool(max_size=1, max_lifetime=0)
+        conn, _ = pool.getconn(FakeConnection)
+
+        pool.putconn(conn)
+
+        self.assertTrue(conn.closed)
+        self.assertEqual(len(pool), 0)
+
+    def test_waits_for_a_free_connection(self):
+        """Test getconn blocks at max_size until a connection returns."""
+        pool = ConnectionPool(max_size=1, timeout=0.01)
+        conn, _ = pool.getconn(FakeConnection)
+        with self.assertRaises(PoolTimeout):
+            pool.getconn(FakeConnection)
+
+        pool.timeout = 5
+        threading.Timer(0.05, pool.putconn, [conn]).start()
+        again, reused = pool.getconn(FakeConnection)
+
+        self.assertIs(again, conn)
+        self.assertTrue(reused)
+
+    def test_failed_connect_releases_slot(self):
+        """Test a connection error does not use up the pool."""
+        pool = ConnectionPool(max_size=1, timeout=0.01)
+
+        def fail():
+            raise OSError('refused')
+
+        with self.assertRaises(OSError):
+            pool.getconn(fail)
+        conn, _ = pool.getconn(FakeConnection)
+        self.assertIsNotNone(conn)
+
+    def test_new_pool_after_fork(self):
+        """Test a forked process gets its own pool."""
+        with patch.dict(pool_module._pools, clear=True):
+            pool = get_pool('fork-test', max_size=1)
+            self.assertIs(get_pool('fork-test', max_size=1), pool)
+
+            with patch('os.getpid', return_value=pool.pid + 1):
+                child = get_pool('fork-test', max_size=1)
+
+            self.assertIsNot(child, pool)
+            self.assertIn(pool, pool_module._inherited)
+            pool_module._inherited.remove(pool)
+
+
+class DatabaseWrapperTests(SimpleTestCase):
+    """Test the health checks and pooling of core.db.postgresql."""
+
+    def _wrapper(self, **options):
+        settings_dict = {
+            **connection.settings_dict,
+            'ENGINE': 'core.db.postgresql',
+            'OPTIONS': options,
+            'CONN_HEALTH_CHECKS': True,
+        }
+        return DatabaseWrapper(settings_dict, alias='health-check-test')
+
+    def test_health_check_once_per_request(self):
+        """Test a dead connection is closed before its first use only."""
+        wrapper = self._wrapper()
+        wrapper.health_check_enabled = True
+        wrapper.autocommit = True
+        wrapper.connection = conn = FakeConnection()
+
+        with patch.object(wrapper, 'is_usable', return_value=True) as usable:
+            wrapper.close_if_health_check_failed()
+            wrapper.close_if_health_check_failed()
+            self.assertEqual(usable.call_count, 1)
+
+            wrapper.close_if_unusable_or_obsolete()
+            usable.return_value = False
+            wrapper.close_if_health_check_failed()
+
+        self.assertEqual(usable.call_count, 2)
+        self.assertIsNone(wrapper.connection)
+        self.assertTrue(conn.closed)
+
+    def test_health_check_disabled(self):
+        """Test no check is made without CONN_HEALTH_CHECKS."""
+        wrapper = self._wrapper()
+        wrapper.connection = FakeConnection()
+
+        with patch.object(wrapper, 'is_usable') as usable:
+            wrapper.close_if_health_check_failed()
+
+        usable.assert_not_called()
+
+    @patch('django.db.backends.postgresql.base.DatabaseWrapper'
+           '.get_new_connection')
+    def test_pooled_connection_is_returned_and_reused(self, connect):
+        """Test closing returns the connection, which is then reused."""
+        connect.side_effect = lambda params: FakeConnection()
+        with patch.dict(pool_module._pools, clear=True):
+            wrapper = self._wrapper(pool={'max_size': 1})
+            wrapper.connection = wrapper.get_new_connection({})
+            self.assertTrue(wrapper.health_check_done)
+            wrapper.connection.info.transaction_status = \
+                TRANSACTION_STATUS_INTRANS
+            conn = wrapper.connection
+
+            wrapper._close()
+
+            self.assertEqual(conn.rollbacks, 1)
+            self.assertFalse(conn.closed)
+            self.assertIs(wrapper.get_new_connection({}), conn)
+            self.assertFalse(wrapper.health_check_done)
+            self.assertEqual(connect.call_count, 1)
+
+    @patch('django.db.backends.postgresql.base.DatabaseWrapper'
+           '.get_new_connection')
+    def test_connection_closed_in_atomic_is_discarded(self, connect):
+        """Test a connection closed inside atomic() is not pooled."""
+        connect.side_effect = lambda params: FakeConnection()
+        with patch.dict(pool_module._pools, clear=True):
+            wrapper = self._wrapper(pool={'max_size': 1})
+            wrapper.connection = conn = wrapper.get_new_connection({})
+            wrapper.in_atomic_block = True
+
+            wrapper._close()
+
+            self.assertTrue(conn.closed)
+            self.assertEqual(len(wrapper.pool), 0)
+
+    def test_pool_option_not_passed_to_psycopg2(self):
+        """Test the pool settings are removed from the connect params."""
+        wrapper = self._wrapper(pool={'max_size': 1}, sslmode='disable')
+        wrapper.settings_dict['NAME'] = 'recipes'
+
+        params = wrapper.get_connection_params()
+
+        self.assertNotIn('pool', params)
+        self.assertEqual(params['sslmode'], 'disable')
+
+
+@override_settings(REPLICA_DATABASES=['replica_a', 'replica_b'])
+class ReplicaRouterTests(SimpleTestCase):
+    """Test ReplicaRouter and the replica selection."""
+
+    def setUp(self):
+        router._unavailable.clear()
+        self.router = router.ReplicaRouter()
+        self.connections = {'replica_a': Mock(), 'replica_b': Mock()}
+        patcher = patch.object(router, 'connections', self.connections)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_reads_use_primary_outside_replica_reads(self):
+        """Test nothing is routed to a replica by default."""
+        self.assertIsNone(self.router.db_for_read(Recipe))
+
+    def test_replicated_models_only(self):
+        """Test only recipe models are read from the replica."""
+        with patch('random.shuffle'), router.replica_reads():
+            self.assertEqual(self.router.db_for_read(Recipe), 'replica_a')
+            self.assertEqual(
+                self.router.db_for_read(Recipe.tags.through), 'replica_a',
+            )
+            self.assertIsNone(self.router.db_for_read(get_user_model()))
+            self.assertIsNone(self.router.db_for_read(AuthToken))
+        self.assertIsNone(self.router.db_for_read(Recipe))
+
+    def test_writes_go_to_primary(self):
+        """Test objects read from a replica are saved to the primary."""
+        self.assertEqual(self.router.db_for_write(Tag), DEFAULT_DB_ALIAS)
+        self.assertIsNone(self.router.db_for_write(AuthToken))
+
+    def test_skips_unavailable_replica(self):
+        """Test a replica refusing connections is skipped for a while."""
+        self.connections['replica_a'].ensure_connection.side_effect = \
+            router.OperationalError
+
+        with patch('random.shuffle'), self.assertLogs(router.logger):
+            self.assertEqual(router.choose_replica(), 'replica_b')
+        self.assertIn('replica_a', router._unavailable)
+
+        with override_settings(REPLICA_DATABASES=['replica_a']):
+            self.assertIsNone(router.choose_replica())
+        self.assertEqual(
+            self.connections['replica_a'].ensure_connection.call_count, 1,
+        )
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Needs a PostgreSQL server.')
+class PooledConnectionTests(TransactionTestCase):
+    """Test pooled connections against the real database."""
+
+    def test_reconnect_reuses_server_connection(self):
+        """Test close/connect keeps the same backend process."""
+        settings_dict = {
+            **connection.settings_dict,
+            'ENGINE': 'core.db.postgresql',
+            'OPTIONS': {
+                **connection.settings_dict['OPTIONS'], 'pool': {'max_size': 1},
+            },
+            'CONN_MAX_AGE': 0,
+        }
+        wrapper = DatabaseWrapper(settings_dict, alias='pool-test')
+        self.addCleanup(lambda: wrapper.pool.closeall())
+
+        def backend_pid():
+            with wrapper.cursor() as cursor:
+                cursor.execute('SELECT pg_backend_pid()')
+                return cursor.fetchone()[0]
+
+        first = backend_pid()
+        wrapper.close()
+        self.assertEqual(backend_pid(), first)
+        wrapper.close()
@@ -2,10 +2,12 @@
 Tests for models.
 """
 from decimal import Decimal
-from unittest.mock import patch
+from unittest import skipUnless
 
 from core import models
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import SearchQuery
+from django.db import IntegrityError, connection, transaction
 from django.test import TestCase
 
 
@@ -83,11 +85,72 @@ class ModelTests(TestCase):
 
         self.assertEqual(str(ingredient), ingredient.name)
 
-    @patch('core.models.uuid.uuid4')
-    def test_recipe_file_name_uuid(self, mock_uuid):
+    def test_tag_and_ingredient_names_unique_per_user(self):
+        """Names of tags and ingredients are unique for each user."""
+        user = create_user()
+        other_user = create_user(email='other@example.com')
+        for model in (models.Tag, models.Ingredient):
+            model.objects.create(user=user, name='Name')
+            model.objects.create(user=other_user, name='Name')
+
+            with self.assertRaises(IntegrityError), transaction.atomic():
+                model.objects.create(user=user, name='Name')
+
+    def test_recipe_file_name(self):
         """Test generating image path."""
-        uuid = 'test-uuid'
-        mock_uuid.return_value = uuid
         file_path = models.recipe_image_file_path(None, 'example.jpg')
 
-        self.assertEqual(file_path, f'uploads/recipe/{uuid}.jpg')
\ No newline at end of file
+        self.assertEqual(file_path, 'uploads/recipe/example.jpg')
+
+
+@skipUnless(connection.vendor == 'postgresql', 'EXPLAIN output is Postgres.')
+class IndexUsageTests(TestCase):
+    """Test the per-user list queries are served by the indexes."""
+
+    def setUp(self):
+        self.user = create_user()
+        with connection.cursor() as cursor:
+            # Com poucas linhas o planejador preferiria um seq scan.
+            cursor.execute('SET LOCAL enable_seqscan = off')
+
+    def test_recipe_list_uses_index(self):
+        """Recipes by user ordered by -id use recipe_user_id_desc_idx."""
+        plan = models.Recipe.objects.filter(
+            user=self.user,
+        ).order_by('-id').explain()
+
+        self.assertIn('recipe_user_id_desc_idx', plan)
+
+    def test_recipe_sort_keys_use_index(self):
+        """Each allowed sort key is served by a (user, field, id) index."""
+        for field, index in (
+            ('price', 'recipe_user_price_idx'),
+            ('time_minutes', 'recipe_user_time_idx'),
+            ('title', 'recipe_user_title_idx'),
+        ):
+            for ordering in ((field, 'id'), (f'-{field}', '-id')):
+                plan = models.Recipe.objects.filter(
+                    user=self.user,
+                ).order_by(*ordering).explain()
+
+                self.assertIn(index, plan)
+
+    def test_tag_and_ingredient_lists_use_index(self):
+        """Tags/ingredients by user ordered by -name use the unique index."""
+        for model, index in (
+            (models.Tag, 'unique_tag_user_name'),
+            (models.Ingredient, 'unique_ingredient_user_name'),
+        ):
+            plan = model.objects.filter(
+                user=self.user,
+            ).order_by('-name').explain()
+
+            self.assertIn(index, plan)
+
+    def test_recipe_search_uses_gin_index(self):
+        """Full-text search is served by recipe_search_vector_idx."""
+        plan = models.Recipe.objects.filter(
+            search_vector=SearchQuery('lemon', config='simple'),
+        ).explain()
+
+        self.assertIn('recipe_search_vector_idx', plan)
@@ -0,0 +1,47 @@
+"""
+Tests for the content-addressed storage.
+"""
+import hashlib
+import os
+import tempfile
+
+from core.storage import ContentAddressedStorage
+from django.core.files.base import ContentFile
+from django.test import SimpleTestCase
+
+
+class ContentAddressedStorageTests(SimpleTestCase):
+    """Test ContentAddressedStorage."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.storage = ContentAddressedStorage(location=self.tmpdir.name)
+
+    def test_names_file_by_content_hash(self):
+        """Test the file name is the hash of the content."""
+        name = self.storage.save('images/photo.PNG', ContentFile(b'data'))
+
+        digest = hashlib.sha256(b'data').hexdigest()
+        self.assertEqual(name, f'images/{digest}.png')
+        with self.storage.open(name) as file:
+            self.assertEqual(file.read(), b'data')
+
+    def test_identical_content_is_stored_once(self):
+        """Test saving the same content twice reuses the file."""
+        first = self.storage.save('images/a.jpg', ContentFile(b'same'))
+        second = self.storage.save('images/b.jpg', ContentFile(b'same'))
+        other = self.storage.save('images/c.jpg', ContentFile(b'other'))
+
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other)
+        self.assertEqual(len(self.storage.listdir('images')[1]), 2)
+
+    def test_reusing_a_file_refreshes_its_mtime(self):
+        """Test a reused file looks recent to gc_recipe_images."""
+        name = self.storage.save('images/a.jpg', ContentFile(b'same'))
+        os.utime(self.storage.path(name), (0, 0))
+
+        self.storage.save('images/b.jpg', ContentFile(b'same'))
+
+        self.assertGreater(os.path.getmtime(self.storage.path(name)), 0)
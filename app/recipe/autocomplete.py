@@ -0,0 +1,132 @@
+"""
+Autocomplete dos nomes de tags e ingredientes.
+"""
+import re
+
+from core.cache import LRUCache
+from django.conf import settings
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db import connections
+from django.db.models import Case, IntegerField, Q, Value, When
+from recipe.cache import get_user_version
+
+# Árvores montadas para o fallback, por (modelo, usuário, versão dos dados).
+tries = LRUCache(
+    maxsize=settings.RECIPE_AUTOCOMPLETE_TRIE_MAXSIZE,
+    ttl=settings.RECIPE_AUTOCOMPLETE_TRIE_TTL,
+)
+_trigram_available = {}
+
+
+def trigram_available(using='default'):
+    """Verifica (uma vez por processo) se o pg_trgm está instalado."""
+    if using not in _trigram_available:
+        connection = connections[using]
+        available = False
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'"
+                )
+                available = cursor.fetchone() is not None
+        _trigram_available[using] = available
+    return _trigram_available[using]
+
+
+class Trie:
+    """Árvore de prefixos sobre os nomes, sem diferenciar maiúsculas.
+
+    Cada nome é indexado pelo início do nome e pelo início de cada palavra,
+    então "fe" encontra "Feijão" e "Arroz com feijão". Os nomes que começam
+    com o texto buscado vêm antes dos que só têm uma palavra com ele.
+    """
+
+    def __init__(self, items=()):
+        self.root = {}
+        for item_id, name in items:
+            self.insert(item_id, name)
+
+    def insert(self, item_id, name):
+        key = name.casefold()
+        starts = [0] + [
+            match.end() for match in re.finditer(r'\W+', key)
+            if match.end() < len(key)
+        ]
+        for start in dict.fromkeys(starts):
+            node = self.root
+            for char in key[start:]:
+                node = node.setdefault(char, {})
+            rank = 0 if start == 0 else 1
+            node.setdefault(None, []).append((rank, name, item_id))
+
+    def search(self, prefix, limit):
+        """Retorna até `limit` pares (id, nome) que completam o prefixo."""
+        node = self.root
+        for char in prefix.casefold():
+            node = node.get(char)
+            if node is None:
+                return []
+
+        matches = []
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            matches.extend(node.get(None, []))
+            stack.extend(
+                child for char, child in node.items() if char is not None
+            )
+
+        seen = set()
+        results = []
+        for _, name, item_id in sorted(matches):
+            if item_id not in seen:
+                seen.add(item_id)
+                results.append((item_id, name))
+                if len(results) == limit:
+                    break
+        return results
+
+
+def _trigram_search(queryset, text, limit):
+    """Busca por prefixo ou similaridade usando os índices do pg_trgm.
+
+    O prefixo é testado com uma regex ancorada (~*), que o índice GIN de
+    trigramas atende, ao contrário do UPPER(...) LIKE do istartswith.
+    """
+    prefix = f'^{re.escape(text)}'
+    return list(
+        queryset.filter(
+            Q(name__iregex=prefix) | Q(name__trigram_similar=text)
+        ).annotate(
+            is_prefix=Case(
+                When(name__iregex=prefix, then=Value(0)),
+                default=Value(1),
+                output_field=IntegerField(),
+            ),
+            similarity=TrigramSimilarity('name', text),
+        ).order_by('is_prefix', '-similarity', 'name')
+        .values_list('id', 'name')[:limit]
+    )
+
+
+def _trie_search(queryset, user_id, text, limit):
+    """Busca por prefixo em uma Trie mantida em memória por usuário."""
+    key = (queryset.model._meta.label, user_id, get_user_version(user_id))
+    trie = tries.get(key)
+    if trie is None:
+        trie = Trie(queryset.values_list('id', 'name').iterator())
+        tries.set(key, trie)
+    return trie.search(text, limit)
+
+
+def suggest(queryset, user_id, text, limit):
+    """Sugere até `limit` itens do usuário cujo nome completa o texto.
+
+    Com o pg_trgm a busca também aceita erros de digitação; sem ele, usa
+    uma Trie em memória invalidada pela versão dos dados do usuário (veja
+    recipe.cache), que só casa prefixos.
+    """
+    queryset = queryset.filter(user_id=user_id)
+    if trigram_available(queryset.db):
+        return _trigram_search(queryset, text, limit)
+    return _trie_search(queryset, user_id, text, limit)
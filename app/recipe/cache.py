@@ -0,0 +1,154 @@
+"""
+Cache das respostas das APIs de receita, versionado por usuário.
+"""
+import hashlib
+import time
+import uuid
+
+from core.cache import CacheStats
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+from rest_framework import status
+from rest_framework.response import Response
+
+VERSION_PREFIX = 'recipe:version:'
+RESPONSE_PREFIX = 'recipe:response:'
+
+response_cache_stats = CacheStats('hits', 'misses')
+
+
+def _set_user_version(user_id):
+    version = f'{time.time_ns()}-{uuid.uuid4().hex[:8]}'
+    cache.set(f'{VERSION_PREFIX}{user_id}', version, None)
+    return version
+
+
+def bump_user_version(user_id):
+    """Gera uma nova versão dos dados de receita do usuário.
+
+    As chaves das respostas incluem a versão, então qualquer escrita torna
+    inacessíveis as respostas cacheadas antes dela. A versão começa com o
+    instante da escrita em nanossegundos.
+
+    Dentro de uma transação a versão é gerada de novo após o commit: uma
+    leitura concorrente ainda vê as linhas antigas e as guardaria sob a
+    versão gerada antes do commit.
+    """
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: _set_user_version(user_id))
+    return _set_user_version(user_id)
+
+
+def get_user_version(user_id):
+    """Retorna a versão atual dos dados do usuário, criando se preciso."""
+    version = cache.get(f'{VERSION_PREFIX}{user_id}')
+    if version is None:
+        version = bump_user_version(user_id)
+    return version
+
+
+def version_timestamp(version):
+    """Instante, em segundos, da escrita que gerou a versão."""
+    return int(version.split('-', 1)[0]) // 10 ** 9
+
+
+class CachedResponseMixin:
+    """Cacheia respostas de leitura por usuário e responde GETs condicionais.
+
+    A chave combina usuário, versão dos dados, view, caminho e parâmetros da
+    query. Receitas, tags e ingredientes geram uma nova versão do usuário a
+    cada escrita (veja recipe.signals), então uma resposta antiga nunca é
+    servida. O limite de entradas e a expiração vêm do backend de cache e de
+    RECIPE_RESPONSE_CACHE_TIMEOUT.
+
+    O mesmo hash é usado como ETag e o instante da versão como
+    Last-Modified, então um cliente com a versão atual recebe 304 sem que o
+    corpo seja montado nem as tabelas de receita consultadas. Como
+    Last-Modified tem resolução de segundos, If-None-Match tem prioridade.
+    """
+
+    def _response_digest(self, request, version):
+        params = sorted(request.query_params.lists())
+        raw = (
+            f'{version}:{self.basename}:{self.action}:{request.path}:'
+            f'{request.accepted_renderer.format}:{params}'
+        )
+        return hashlib.md5(raw.encode()).hexdigest()
+
+    def _if_none_match(self, request):
+        """ETags de If-None-Match, sem o prefixo W/."""
+        return [
+            tag[2:] if tag.startswith('W/') else tag
+            for tag in parse_etags(request.headers.get('If-None-Match', ''))
+        ]
+
+    def _not_modified(self, request, etag, last_modified):
+        """Verifica If-None-Match e, na ausência dele, If-Modified-Since.
+
+        "*" só vale se o recurso existe, o que só se sabe depois da view
+        (veja _cached_response).
+        """
+        if request.headers.get('If-None-Match'):
+            return etag in self._if_none_match(request)
+
+        if_modified_since = parse_http_date_safe(
+            request.headers.get('If-Modified-Since', ''),
+        )
+        return (
+            if_modified_since is not None
+            and last_modified <= if_modified_since
+        )
+
+    def _cached_response(self, handler, request, *args, **kwargs):
+        version = get_user_version(request.user.id)
+        digest = self._response_digest(request, version)
+        etag = f'"{digest}"'
+        last_modified = version_timestamp(version)
+
+        if self._not_modified(request, etag, last_modified):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            key = f'{RESPONSE_PREFIX}{request.user.id}:{digest}'
+            data = cache.get(key)
+            if data is not None:
+                response_cache_stats.incr('hits')
+                response = Response(data)
+            else:
+                response_cache_stats.incr('misses')
+                response = handler(request, *args, **kwargs)
+                if response.status_code == status.HTTP_200_OK:
+                    cache.set(
+                        key, response.data,
+                        settings.RECIPE_RESPONSE_CACHE_TIMEOUT,
+                    )
+            # Só respostas 200 são cacheadas, então aqui o recurso existe.
+            if (
+                response.status_code == status.HTTP_200_OK
+                and '*' in self._if_none_match(request)
+            ):
+                response = Response(status=status.HTTP_304_NOT_MODIFIED)
+
+        if response.status_code in (
+            status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED,
+        ):
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+        return response
+
+
+class CachedListMixin(CachedResponseMixin):
+    """Cacheia a action list."""
+
+    def list(self, request, *args, **kwargs):
+        return self._cached_response(super().list, request, *args, **kwargs)
+
+
+class CachedRetrieveMixin(CachedResponseMixin):
+    """Cacheia a action retrieve."""
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._cached_response(
+            super().retrieve, request, *args, **kwargs,
+        )
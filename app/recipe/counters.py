@@ -0,0 +1,93 @@
+"""
+Contadores de uso (recipe_count) das tags e ingredientes.
+"""
+from collections import defaultdict
+
+from core.models import Ingredient, Recipe, Tag
+from django.db.models import (Count, Exists, F, IntegerField, OuterRef,
+                              Subquery)
+from django.db.models.functions import Coalesce
+
+# Tabela intermediária -> (modelo contado, coluna do modelo na tabela).
+COUNTED_LINKS = {
+    Recipe.tags.through: (Tag, 'tag_id'),
+    Recipe.ingredients.through: (Ingredient, 'ingredient_id'),
+}
+
+
+def apply_count_deltas(model, deltas):
+    """Soma a cada objeto a variação do seu recipe_count.
+
+    As atualizações usam F(), então escritas concorrentes não se perdem.
+    Objetos com a mesma variação são atualizados em uma única query.
+    """
+    by_delta = defaultdict(list)
+    for pk, delta in deltas.items():
+        if delta:
+            by_delta[delta].append(pk)
+    for delta, pks in by_delta.items():
+        model.objects.filter(pk__in=pks).update(
+            recipe_count=F('recipe_count') + delta,
+        )
+
+
+def linked_ids(through, instance, reverse, pk_set=None):
+    """Ids do outro lado dos vínculos existentes do objeto.
+
+    Com reverse=False o objeto é uma receita e os ids são das tags ou
+    ingredientes; com reverse=True, o contrário.
+    """
+    _, column = COUNTED_LINKS[through]
+    own, other = (column, 'recipe_id') if reverse else ('recipe_id', column)
+    links = through.objects.filter(**{own: instance.pk})
+    if pk_set is not None:
+        links = links.filter(**{f'{other}__in': pk_set})
+    return list(links.values_list(other, flat=True))
+
+
+def decrement_for_recipe(recipe):
+    """Desconta a receita dos contadores das suas tags e ingredientes.
+
+    Deve rodar antes que a exclusão da receita remova os vínculos.
+    """
+    for through, (model, column) in COUNTED_LINKS.items():
+        links = through.objects.filter(
+            recipe_id=recipe.pk, **{column: OuterRef('pk')}
+        )
+        model.objects.filter(Exists(links)).update(
+            recipe_count=F('recipe_count') - 1,
+        )
+
+
+def decrement_for_recipes(recipe_ids):
+    """Desconta várias receitas dos contadores de uma vez.
+
+    Uma query de agregação por tabela intermediária dá quantas das receitas
+    usam cada tag/ingrediente. Deve rodar antes que os vínculos sejam
+    removidos.
+    """
+    for through, (model, column) in COUNTED_LINKS.items():
+        counts = through.objects.filter(recipe_id__in=recipe_ids) \
+            .values_list(column).annotate(count=Count('id'))
+        apply_count_deltas(model, {pk: -count for pk, count in counts})
+
+
+def recount(model, user=None):
+    """Recalcula o recipe_count a partir das tabelas intermediárias.
+
+    Uma única query UPDATE com uma subquery de contagem por modelo.
+    Retorna quantos objetos foram atualizados.
+    """
+    through, column = next(
+        (through, column)
+        for through, (counted, column) in COUNTED_LINKS.items()
+        if counted is model
+    )
+    counts = through.objects.filter(**{column: OuterRef('pk')}) \
+        .values(column).annotate(count=Count('id')).values('count')
+    queryset = model.objects.all()
+    if user is not None:
+        queryset = queryset.filter(user=user)
+    return queryset.update(recipe_count=Coalesce(
+        Subquery(counts, output_field=IntegerField()), 0,
+    ))
@@ -0,0 +1,133 @@
+"""
+Geração das variantes redimensionadas das imagens de receita.
+"""
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils.module_loading import import_string
+from PIL import Image, ImageOps, features
+from recipe.cache import bump_user_version
+
+logger = logging.getLogger(__name__)
+
+IMAGE_FORMATS = {'webp': 'WEBP', 'jpeg': 'JPEG'}
+
+
+def available_formats():
+    """Formatos de saída suportados pelo Pillow instalado."""
+    return [
+        ext for ext in IMAGE_FORMATS
+        if ext != 'webp' or features.check('webp')
+    ]
+
+
+def variant_name(image_name, variant, ext):
+    """Caminho da variante, derivado do nome da imagem original."""
+    base = os.path.splitext(image_name)[0]
+    return f'{base}_{variant}.{ext}'
+
+
+def variant_names(image_name):
+    """Mapeia variante -> formato -> caminho no storage."""
+    return {
+        variant: {
+            ext: variant_name(image_name, variant, ext)
+            for ext in available_formats()
+        }
+        for variant in settings.RECIPE_IMAGE_VARIANTS
+    }
+
+
+def generate_variants(image_name, user_id):
+    """Gera as variantes de uma imagem já salva no storage.
+
+    As imagens são nomeadas pelo conteúdo (veja core.storage), então
+    variantes já existentes de uma imagem compartilhada são reaproveitadas.
+    Ao terminar, invalida o cache de respostas do usuário para que as URLs
+    das variantes apareçam nos detalhes da receita.
+    """
+    missing = {
+        variant: {
+            ext: name for ext, name in names.items()
+            if not default_storage.exists(name)
+        }
+        for variant, names in variant_names(image_name).items()
+    }
+
+    if any(missing.values()):
+        with default_storage.open(image_name) as file:
+            image = Image.open(file)
+            image = ImageOps.exif_transpose(image).convert('RGB')
+
+        for variant, size in settings.RECIPE_IMAGE_VARIANTS.items():
+            if not missing[variant]:
+                continue
+            resized = image.copy()
+            resized.thumbnail((size, size))
+            for ext, name in missing[variant].items():
+                buffer = BytesIO()
+                resized.save(buffer, format=IMAGE_FORMATS[ext], quality=85)
+                default_storage.save(name, ContentFile(buffer.getvalue()))
+
+    bump_user_version(user_id)
+
+
+class InlineImageQueue:
+    """Executa a tarefa na hora, na própria thread (útil nos testes)."""
+
+    def submit(self, func, *args):
+        func(*args)
+
+
+class ThreadPoolImageQueue:
+    """Executa as tarefas em um pool de threads do próprio processo."""
+    _executor = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def _get_executor(cls):
+        with cls._lock:
+            if cls._executor is None:
+                cls._executor = ThreadPoolExecutor(
+                    max_workers=settings.RECIPE_IMAGE_WORKERS,
+                    thread_name_prefix='recipe-images',
+                )
+            return cls._executor
+
+    def submit(self, func, *args):
+        future = self._get_executor().submit(func, *args)
+        future.add_done_callback(self._log_failure)
+
+    def _log_failure(self, future):
+        if future.exception() is not None:
+            logger.error(
+                'Recipe image task failed.', exc_info=future.exception(),
+            )
+
+
+def get_image_queue():
+    """Fila configurada em RECIPE_IMAGE_QUEUE."""
+    return import_string(settings.RECIPE_IMAGE_QUEUE)()
+
+
+def schedule_variants(recipe):
+    """Agenda a geração das variantes após o commit da transação atual.
+
+    A requisição de upload só salva o original, então a latência dela não
+    depende do tamanho da imagem.
+    """
+    if not recipe.image:
+        return
+    image_name, user_id = recipe.image.name, recipe.user_id
+    transaction.on_commit(
+        lambda: get_image_queue().submit(
+            generate_variants, image_name, user_id,
+        )
+    )
@@ -0,0 +1,137 @@
+"""
+Paginação para as APIs de receita.
+"""
+import base64
+import binascii
+import json
+from decimal import Decimal
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+from rest_framework.utils.urls import replace_query_param
+
+
+class RecipeCursorPagination(CursorPagination):
+    """Paginação por cursor (keyset) composto sobre a ordenação da view.
+
+    O cursor guarda os valores de todos os campos da ordenação do último
+    item da página (ex.: preço e id), e a próxima página é buscada com
+    `preço > p OR (preço = p AND id > i)`. O custo de cada página é
+    proporcional ao tamanho da página, mesmo com muitos empates no primeiro
+    campo, e a consulta é atendida pelos índices (user, campo, id).
+
+    A ordenação vem do queryset da view (ex.: por relevância na busca) e
+    precisa terminar em um campo único, como o id; os campos não podem ter
+    valores nulos.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = '-id'
+
+    def get_ordering(self, request, queryset, view):
+        ordering = queryset.query.order_by
+        if ordering and all(isinstance(field, str) for field in ordering):
+            return tuple(ordering)
+        return super().get_ordering(request, queryset, view)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        reverse, position = self.cursor or (False, None)
+
+        ordering = self.ordering
+        if reverse:
+            ordering = tuple(_flip(field) for field in ordering)
+        if position is not None:
+            queryset = queryset.filter(_after(ordering, position))
+        results = list(queryset.order_by(*ordering)[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor((False, self._position(self.page[-1])))
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor((True, self._position(self.page[0])))
+
+    def _position(self, item):
+        """Valores dos campos da ordenação no item, serializáveis em JSON."""
+        values = []
+        for field in self.ordering:
+            value = getattr(item, field.lstrip('-'))
+            values.append(str(value) if isinstance(value, Decimal) else value)
+        return values
+
+    def encode_cursor(self, cursor):
+        reverse, position = cursor
+        raw = json.dumps({
+            'o': list(self.ordering), 'r': int(reverse), 'p': position,
+        }, separators=(',', ':'))
+        encoded = base64.urlsafe_b64encode(raw.encode()).decode()
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, encoded,
+        )
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            data = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            reverse, position = bool(data['r']), data['p']
+            valid = (
+                data['o'] == list(self.ordering)
+                and isinstance(position, list)
+                and len(position) == len(self.ordering)
+                and all(
+                    isinstance(value, (int, float, str))
+                    for value in position
+                )
+            )
+        except (TypeError, ValueError, KeyError, binascii.Error):
+            valid = False
+        if not valid:
+            raise NotFound(self.invalid_cursor_message)
+        return reverse, position
+
+
+def _flip(field):
+    return field[1:] if field.startswith('-') else f'-{field}'
+
+
+def _after(ordering, position):
+    """Condição para os itens que vêm depois da posição na ordenação.
+
+    Para (campo, id) é `campo > v OR (campo = v AND id > i)`, com `campo >=
+    v` repetido à parte para que o banco limite a varredura do índice.
+    """
+    condition = Q()
+    equal = {}
+    for field, value in zip(ordering, position):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        condition |= Q(**equal, **{f'{name}__{lookup}': value})
+        equal[name] = value
+    if len(ordering) > 1:
+        first = ordering[0]
+        lookup = 'lte' if first.startswith('-') else 'gte'
+        condition &= Q(**{f'{first.lstrip("-")}__{lookup}': position[0]})
+    return condition
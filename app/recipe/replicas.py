@@ -0,0 +1,37 @@
+"""
+Leituras das APIs de receita nas réplicas do banco.
+"""
+from core.db.router import (is_pinned, pin_to_primary, reset_replica,
+                            use_replica)
+from django.conf import settings
+from rest_framework.permissions import SAFE_METHODS
+
+
+class ReplicaReadMixin:
+    """Atende as leituras da view pelas réplicas (veja core.db.router).
+
+    A réplica só é ativada depois da autenticação, que consulta o primário,
+    e quando o usuário não escreveu nos últimos REPLICA_PIN_SECONDS. As
+    escritas renovam essa marca no início e de novo ao terminar, para que a
+    janela conte a partir do commit.
+    """
+    _replica_token = None
+    _writer_id = None
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if not settings.REPLICA_DATABASES:
+            return
+        if request.method not in SAFE_METHODS:
+            self._writer_id = request.user.id
+            pin_to_primary(self._writer_id)
+        elif not is_pinned(request.user.id):
+            self._replica_token = use_replica()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if self._replica_token is not None:
+            reset_replica(self._replica_token)
+            self._replica_token = None
+        if self._writer_id is not None:
+            pin_to_primary(self._writer_id)
+        return super().finalize_response(request, response, *args, **kwargs)
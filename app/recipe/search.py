@@ -0,0 +1,96 @@
+"""
+Busca textual nas receitas.
+"""
+from core.models import Ingredient, Recipe, Tag
+from django.conf import settings
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            SearchVector)
+from django.db import connection
+from django.db.models import (Case, Exists, F, FloatField, OuterRef, Q,
+                              Subquery, TextField, Value, When)
+from django.db.models.functions import Cast
+
+
+def is_supported():
+    """A busca com tsvector só existe no Postgres."""
+    return connection.vendor == 'postgresql'
+
+
+def _names(model):
+    """Nomes das tags/ingredientes da receita, separados por espaço."""
+    return Subquery(
+        model.objects.filter(recipe=OuterRef('pk'))
+        .values('recipe')
+        .annotate(names=StringAgg('name', delimiter=' '))
+        .values('names'),
+        output_field=TextField(),
+    )
+
+
+def search_vector():
+    """Vetor da receita: título (A), tags e ingredientes (B), descrição (C)."""
+    config = settings.RECIPE_SEARCH_CONFIG
+    return (
+        SearchVector('title', weight='A', config=config)
+        + SearchVector(
+            _names(Tag), _names(Ingredient), weight='B', config=config,
+        )
+        + SearchVector('description', weight='C', config=config)
+    )
+
+
+def update_search_vectors(recipe_ids):
+    """Recalcula o search_vector das receitas em uma única query.
+
+    Chamado a cada escrita (veja recipe.signals e RecipeListSerializer), de
+    modo que o vetor guardado acompanha título, descrição e vínculos sem
+    precisar ser calculado na leitura.
+    """
+    if not is_supported():
+        return
+    recipe_ids = list(recipe_ids)
+    if recipe_ids:
+        Recipe.objects.filter(id__in=recipe_ids).update(
+            search_vector=search_vector(),
+        )
+
+
+def search_recipes(queryset, text):
+    """Filtra as receitas pelo texto e anota a relevância em `rank`.
+
+    No Postgres a busca usa o search_vector (índice GIN) e a sintaxe de
+    websearch ("frango -curry"). Nos outros bancos, usados nos testes
+    locais, cada termo precisa aparecer no título, na descrição ou no nome
+    de uma tag ou ingrediente, e o rank conta os termos presentes no título.
+    """
+    if is_supported():
+        query = SearchQuery(
+            text, search_type='websearch',
+            config=settings.RECIPE_SEARCH_CONFIG,
+        )
+        # ts_rank devolve real; convertido para double precision, o valor
+        # lido pelo Python volta idêntico no filtro do cursor da paginação.
+        return queryset.filter(search_vector=query).annotate(
+            rank=Cast(SearchRank(F('search_vector'), query), FloatField()),
+        )
+
+    terms = text.split()
+    rank = Value(0.0, output_field=FloatField())
+    for term in terms:
+        queryset = queryset.filter(
+            Q(title__icontains=term)
+            | Q(description__icontains=term)
+            | Q(Exists(Tag.objects.filter(
+                recipe=OuterRef('pk'), name__icontains=term,
+            )))
+            | Q(Exists(Ingredient.objects.filter(
+                recipe=OuterRef('pk'), name__icontains=term,
+            )))
+        )
+        rank = rank + Case(
+            When(title__icontains=term, then=Value(1.0)),
+            default=Value(0.0),
+            output_field=FloatField(),
+        )
+    return queryset.annotate(rank=rank)
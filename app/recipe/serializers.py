@@ -1,24 +1,192 @@
 """
 Serializer for recipe APIs
 """
+from collections import Counter
+
 from core.models import Ingredient, Recipe, Tag
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.utils.translation import gettext as _
+from drf_spectacular.utils import OpenApiTypes, extend_schema_field
+from recipe import counters, images
+from recipe.cache import bump_user_version
+from recipe.search import update_search_vectors
 from rest_framework import serializers
 
 
-class TagSerializer(serializers.ModelSerializer):
+class RecipeAttrSerializer(serializers.ModelSerializer):
+    """Base dos serializers de Tag e Ingredient."""
+
+    def validate_name(self, value):
+        """Recusa renomear para o nome de outro item do mesmo usuário.
+
+        O DRF não gera validadores para as UniqueConstraint (user, name), e
+        sem esta checagem a colisão viraria um IntegrityError (500). Aninhado
+        em uma receita (sem instance) o nome só referencia o item.
+        """
+        if self.instance is None:
+            return value
+        duplicate = self.Meta.model.objects.filter(
+            user_id=self.instance.user_id, name=value,
+        ).exclude(pk=self.instance.pk)
+        if duplicate.exists():
+            raise serializers.ValidationError(
+                _('An item with this name already exists.'),
+            )
+        return value
+
+
+class TagSerializer(RecipeAttrSerializer):
+    """Serializer for tags."""
 
     class Meta:
         model = Tag
         fields = ['id', 'name']
         read_only_fields = ['id']
 
-class IngredientSerializer(serializers.ModelSerializer):
+
+class IngredientSerializer(RecipeAttrSerializer):
+    """Serializer for ingredients."""
 
     class Meta:
         model = Ingredient
         fields = ['id', 'name']
         read_only_fields = ['id']
 
+
+class TagCountSerializer(TagSerializer):
+    """Tag com o número de receitas que a usam."""
+
+    class Meta(TagSerializer.Meta):
+        fields = TagSerializer.Meta.fields + ['recipe_count']
+        read_only_fields = fields
+
+
+class IngredientCountSerializer(IngredientSerializer):
+    """Ingrediente com o número de receitas que o usam."""
+
+    class Meta(IngredientSerializer.Meta):
+        fields = IngredientSerializer.Meta.fields + ['recipe_count']
+        read_only_fields = fields
+
+
+class RecipeListSerializer(serializers.ListSerializer):
+    """Grava lotes de receitas com um número constante de queries.
+
+    Tags e ingredientes de todo o lote são resolvidos de uma vez e os
+    vínculos many-to-many são gravados direto nas tabelas intermediárias.
+    """
+    m2m_models = {'tags': Tag, 'ingredients': Ingredient}
+
+    def _pop_related(self, validated_data):
+        """Separa os campos many-to-many e resolve os objetos do lote todo."""
+        related = [
+            {
+                field: data.pop(field)
+                for field in self.m2m_models if field in data
+            }
+            for data in validated_data
+        ]
+        objs = {}
+        for field, model in self.m2m_models.items():
+            items = [
+                item for fields in related for item in fields.get(field, [])
+            ]
+            objs[field] = {
+                obj.name: obj
+                for obj in self.child._get_or_create_attrs(model, items)
+            }
+        return related, objs
+
+    def _sync_links(self, recipes, related, objs):
+        """Sincroniza os vínculos das receitas com os dados enviados.
+
+        Apenas as receitas cujo payload trouxe o campo são alteradas, e só a
+        diferença em relação aos vínculos atuais é removida/inserida.
+        """
+        for field in self.m2m_models:
+            wanted = {
+                recipe.id: {
+                    objs[field][item['name']].id for item in fields[field]
+                }
+                for recipe, fields in zip(recipes, related) if field in fields
+            }
+            if not wanted:
+                continue
+
+            m2m_field = Recipe._meta.get_field(field)
+            through = m2m_field.remote_field.through
+            recipe_column = m2m_field.m2m_column_name()
+            related_column = m2m_field.m2m_reverse_name()
+            current = through.objects.filter(
+                **{f'{recipe_column}__in': wanted}
+            ).values_list('id', recipe_column, related_column)
+
+            stale = []
+            deltas = Counter()
+            for link_id, recipe_id, related_id in current:
+                if related_id in wanted[recipe_id]:
+                    wanted[recipe_id].discard(related_id)
+                else:
+                    stale.append(link_id)
+                    deltas[related_id] -= 1
+            if stale:
+                through.objects.filter(id__in=stale).delete()
+            through.objects.bulk_create([
+                through(**{
+                    recipe_column: recipe_id,
+                    related_column: related_id,
+                })
+                for recipe_id, related_ids in wanted.items()
+                for related_id in related_ids
+            ])
+            # As escritas diretas na tabela intermediária não disparam o
+            # m2m_changed que mantém os contadores.
+            for related_ids in wanted.values():
+                deltas.update(related_ids)
+            counters.apply_count_deltas(self.m2m_models[field], deltas)
+
+    def _insert_recipes(self, recipes):
+        """Insere as receitas no banco, preenchendo as pks."""
+        if connection.features.can_return_rows_from_bulk_insert:
+            Recipe.objects.bulk_create(recipes)
+        else:
+            # Sem as pks retornadas não há como gravar os vínculos em lote.
+            for recipe in recipes:
+                recipe.save()
+
+    @transaction.atomic
+    def create(self, validated_data):
+        """Criar um lote de receitas"""
+        auth_user = self.child._get_auth_user()
+        related, objs = self._pop_related(validated_data)
+        recipes = [Recipe(user=auth_user, **data) for data in validated_data]
+        self._insert_recipes(recipes)
+        self._sync_links(recipes, related, objs)
+        # Escritas em lote não disparam os sinais que invalidam o cache e
+        # mantêm o vetor de busca.
+        update_search_vectors(recipe.pk for recipe in recipes)
+        bump_user_version(auth_user.id)
+
+        return recipes
+
+    @transaction.atomic
+    def update(self, instance, validated_data):
+        """Atualizar um lote de receitas, alinhado com validated_data"""
+        related, objs = self._pop_related(validated_data)
+        fields = set()
+        for recipe, data in zip(instance, validated_data):
+            for attr, value in data.items():
+                setattr(recipe, attr, value)
+                fields.add(attr)
+        if fields:
+            Recipe.objects.bulk_update(instance, fields)
+        self._sync_links(instance, related, objs)
+        update_search_vectors(recipe.pk for recipe in instance)
+        bump_user_version(self.child._get_auth_user().id)
+
+        return instance
+
 class RecipeSerializer(serializers.ModelSerializer):
     tags = TagSerializer(many=True, required=False)
     ingredients = IngredientSerializer(many=True, required=False)
@@ -26,25 +194,54 @@ class RecipeSerializer(serializers.ModelSerializer):
         model = Recipe
         fields =  ['id', 'title', 'time_minutes', 'price', 'link', 'tags', 'ingredients']
         read_only_fields = ['id']
+        list_serializer_class = RecipeListSerializer
+
+    def _get_auth_user(self):
+        """Dono das receitas: o usuário do contexto ou o da requisição."""
+        if 'user' in self.context:
+            return self.context['user']
+        return self.context['request'].user
+
+    def _get_or_create_attrs(self, model, items):
+        """Recupera ou cria em lote as tags/ingredientes do usuário.
+
+        Em vez de um get_or_create por item, faz uma busca pelos nomes
+        existentes e um único bulk_create para os que faltam. A restrição
+        única em (user, name) com ignore_conflicts torna seguro o caso de
+        requisições concorrentes criando o mesmo nome: a busca final retorna
+        o registro que venceu a disputa.
+        """
+        auth_user = self._get_auth_user()
+        names = list(dict.fromkeys(item['name'] for item in items))
+        if not names:
+            return []
+
+        queryset = model.objects.filter(user=auth_user, name__in=names)
+        objs = {obj.name: obj for obj in queryset}
+        if len(objs) < len(names):
+            model.objects.bulk_create(
+                [
+                    model(user=auth_user, name=name)
+                    for name in names if name not in objs
+                ],
+                ignore_conflicts=True,
+            )
+            bump_user_version(auth_user.id)
+            # ignore_conflicts não retorna as pks dos registros criados.
+            objs = {obj.name: obj for obj in queryset.all()}
+
+        return [objs[name] for name in names]
 
     def _get_or_create_tags(self, tags, recipe):
         """Lidar com recuperar ou criar tags quando necessário"""
-        auth_user = self.context['request'].user
-        for tag in tags:
-            tag_obj, created = Tag.objects.get_or_create(
-                user=auth_user,
-                **tag,
-            )
-            recipe.tags.add(tag_obj)
+        recipe.tags.add(*self._get_or_create_attrs(Tag, tags))
+
     def _get_or_create_ingredients(self, ingredients, recipe):
-        auth_user = self.context['request'].user
-        for ingredient in ingredients:
-            ingredient_obj, created = Ingredient.objects.get_or_create(
-                user=auth_user,
-                **ingredient
-            )
-            recipe.ingredients.add(ingredient_obj)
+        recipe.ingredients.add(
+            *self._get_or_create_attrs(Ingredient, ingredients)
+        )
 
+    @transaction.atomic
     def create(self, validated_data): #Explicação I
         """Criar uma receita"""
         tags = validated_data.pop('tags', []) #Explicação II
@@ -55,18 +252,21 @@ class RecipeSerializer(serializers.ModelSerializer):
 
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         """Atualizar uma receita"""
         tags = validated_data.pop('tags', None)
         ingredients = validated_data.pop('ingredients', None)
         
+        # set() compara com os vínculos atuais e só remove/insere a diferença,
+        # em vez de limpar e reescrever toda a tabela intermediária.
         if tags is not None:
-            instance.tags.clear()
-            self._get_or_create_tags(tags, instance)
+            instance.tags.set(self._get_or_create_attrs(Tag, tags))
         
         if ingredients is not None:
-            instance.ingredients.clear()
-            self._get_or_create_ingredients(ingredients, instance)
+            instance.ingredients.set(
+                self._get_or_create_attrs(Ingredient, ingredients)
+            )
 
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
@@ -75,9 +275,29 @@ class RecipeSerializer(serializers.ModelSerializer):
         return instance
 
 class RecipeDetailSerializer(RecipeSerializer):
+    image_variants = serializers.SerializerMethodField()
     
     class Meta(RecipeSerializer.Meta):
-        fields = RecipeSerializer.Meta.fields + ['description', 'image']
+        fields = RecipeSerializer.Meta.fields + [
+            'description', 'image', 'image_variants',
+        ]
+
+    @extend_schema_field(OpenApiTypes.OBJECT)
+    def get_image_variants(self, recipe):
+        """URLs das variantes redimensionadas que já foram geradas."""
+        if not recipe.image:
+            return {}
+        request = self.context.get('request')
+        variants = {}
+        for variant, names in images.variant_names(recipe.image.name).items():
+            for ext, name in names.items():
+                if not default_storage.exists(name):
+                    continue
+                url = default_storage.url(name)
+                if request is not None:
+                    url = request.build_absolute_uri(url)
+                variants.setdefault(variant, {})[ext] = url
+        return variants
 
 class RecipeImageSerializer(serializers.ModelSerializer):
     class Meta:
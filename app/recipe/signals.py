@@ -0,0 +1,110 @@
+"""
+Sinais que mantêm cache, busca e contadores das receitas.
+"""
+from core.models import Ingredient, Recipe, Tag
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete)
+from django.dispatch import receiver
+from recipe import counters
+from recipe.cache import bump_user_version
+from recipe.search import is_supported, update_search_vectors
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def bump_version_on_write(sender, instance, **kwargs):
+    """Invalida as respostas do dono do objeto alterado."""
+    bump_user_version(instance.user_id)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def bump_version_on_link_change(sender, instance, action, **kwargs):
+    """Invalida as respostas quando os vínculos de uma receita mudam."""
+    if action.startswith('post_'):
+        bump_user_version(instance.user_id)
+
+
+@receiver(post_save, sender=Recipe)
+def update_search_vector_on_save(sender, instance, **kwargs):
+    """Recalcula o vetor de busca da receita gravada."""
+    update_search_vectors([instance.id])
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def update_search_vector_on_link_change(sender, instance, action, reverse,
+                                        pk_set, **kwargs):
+    """Recalcula o vetor das receitas cujas tags/ingredientes mudaram."""
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        update_search_vectors([instance.id])
+    elif pk_set:
+        update_search_vectors(pk_set)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+def update_search_vector_on_rename(sender, instance, created, **kwargs):
+    """Recalcula o vetor das receitas que usam a tag/ingrediente gravado."""
+    if not created:
+        update_search_vectors(
+            instance.recipe_set.values_list('id', flat=True),
+        )
+
+
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=Ingredient)
+def collect_recipes_on_delete(sender, instance, **kwargs):
+    """Guarda as receitas vinculadas antes que o CASCADE remova os vínculos."""
+    if is_supported():
+        instance._search_recipe_ids = list(
+            instance.recipe_set.values_list('id', flat=True),
+        )
+
+
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def update_search_vector_on_delete(sender, instance, **kwargs):
+    """Recalcula o vetor das receitas que usavam o objeto excluído."""
+    update_search_vectors(getattr(instance, '_search_recipe_ids', []))
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def update_recipe_counts_on_link_change(sender, instance, action, reverse,
+                                        pk_set, **kwargs):
+    """Mantém o recipe_count das tags/ingredientes vinculados ou removidos.
+
+    Em remove() e clear() os vínculos que de fato existiam são lidos antes
+    da remoção; em add() o pk_set já traz só os vínculos novos.
+    """
+    if action in ('pre_remove', 'pre_clear'):
+        instance._counted_links = counters.linked_ids(
+            sender, instance, reverse, pk_set,
+        )
+        return
+    if action == 'post_add':
+        linked, delta = pk_set, 1
+    elif action in ('post_remove', 'post_clear'):
+        linked, delta = instance.__dict__.pop('_counted_links', []), -1
+    else:
+        return
+
+    model, _ = counters.COUNTED_LINKS[sender]
+    if reverse:
+        deltas = {instance.pk: delta * len(linked)}
+    else:
+        deltas = {pk: delta for pk in linked}
+    counters.apply_count_deltas(model, deltas)
+
+
+@receiver(pre_delete, sender=Recipe)
+def update_recipe_counts_on_delete(sender, instance, **kwargs):
+    """Desconta a receita excluída antes que o CASCADE remova os vínculos."""
+    counters.decrement_for_recipe(instance)
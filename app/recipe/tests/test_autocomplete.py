@@ -0,0 +1,70 @@
+"""
+Testes para o autocomplete de tags e ingredientes.
+"""
+from unittest import skipUnless
+
+from core.models import Ingredient
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from recipe.autocomplete import Trie, suggest, trigram_available
+
+
+class TrieTests(SimpleTestCase):
+    """Teste: Busca por prefixo na Trie."""
+
+    def setUp(self):
+        self.trie = Trie([
+            (1, 'Feijão'),
+            (2, 'Arroz com feijão'),
+            (3, 'Farofa'),
+            (4, 'Feijão-preto'),
+        ])
+
+    def test_prefix_of_name_before_prefix_of_word(self):
+        self.assertEqual(self.trie.search('fei', 10), [
+            (1, 'Feijão'), (4, 'Feijão-preto'), (2, 'Arroz com feijão'),
+        ])
+
+    def test_case_insensitive(self):
+        self.assertEqual(self.trie.search('FAR', 10), [(3, 'Farofa')])
+
+    def test_word_prefix(self):
+        self.assertEqual(self.trie.search('pre', 10), [(4, 'Feijão-preto')])
+
+    def test_limit(self):
+        self.assertEqual(len(self.trie.search('f', 2)), 2)
+
+    def test_no_match(self):
+        self.assertEqual(self.trie.search('xyz', 10), [])
+
+
+@skipUnless(connection.vendor == 'postgresql', 'pg_trgm is Postgres only.')
+class TrigramAutocompleteTests(TestCase):
+    """Teste: Com o pg_trgm as sugestões toleram erros de digitação."""
+
+    def setUp(self):
+        if not trigram_available():
+            self.skipTest('pg_trgm is not installed.')
+        self.user = get_user_model().objects.create_user(
+            'user@example.com', 'password123',
+        )
+
+    def test_fuzzy_match(self):
+        tomato = Ingredient.objects.create(user=self.user, name='Tomatoes')
+        Ingredient.objects.create(user=self.user, name='Onion')
+
+        results = suggest(
+            Ingredient.objects.all(), self.user.id, 'tomatos', 10,
+        )
+
+        self.assertEqual(results, [(tomato.id, 'Tomatoes')])
+
+    def test_uses_trigram_index(self):
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        plan = Ingredient.objects.filter(
+            name__trigram_similar='tomato',
+        ).explain()
+
+        self.assertIn('ingredient_name_trgm_idx', plan)
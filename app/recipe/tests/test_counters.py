@@ -0,0 +1,140 @@
+"""
+Testes para os contadores de uso de tags e ingredientes.
+"""
+from decimal import Decimal
+
+from core.models import Ingredient, Recipe, Tag
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from recipe.serializers import RecipeDetailSerializer
+from rest_framework import status
+from rest_framework.test import APIClient
+
+RECIPES_URL = reverse('recipe:recipe-list')
+BULK_URL = reverse('recipe:recipe-bulk')
+
+
+def detail_url(recipe_id):
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+class RecipeCountTests(TestCase):
+    """Teste: O recipe_count acompanha os vínculos das receitas."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'user@example.com', 'password123',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def assertCounts(self, model, expected):
+        self.assertEqual(
+            dict(model.objects.values_list('name', 'recipe_count')),
+            expected,
+        )
+
+    def _recipe(self, **params):
+        return Recipe.objects.create(
+            user=self.user, title='Recipe', time_minutes=5,
+            price=Decimal('1.00'), **params,
+        )
+
+    def test_counts_follow_api_writes(self):
+        payload = {
+            'title': 'Curry', 'time_minutes': 30, 'price': '5.00',
+            'tags': [{'name': 'Indian'}, {'name': 'Dinner'}],
+            'ingredients': [{'name': 'Rice'}],
+        }
+        first = self.client.post(RECIPES_URL, payload, format='json')
+        self.client.post(RECIPES_URL, payload, format='json')
+        self.assertCounts(Tag, {'Indian': 2, 'Dinner': 2})
+        self.assertCounts(Ingredient, {'Rice': 2})
+
+        self.client.patch(
+            detail_url(first.data['id']),
+            {'tags': [{'name': 'Dinner'}, {'name': 'Spicy'}]},
+            format='json',
+        )
+        self.assertCounts(Tag, {'Indian': 1, 'Dinner': 2, 'Spicy': 1})
+
+        res = self.client.delete(detail_url(first.data['id']))
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertCounts(Tag, {'Indian': 1, 'Dinner': 1, 'Spicy': 0})
+        self.assertCounts(Ingredient, {'Rice': 1})
+
+    def test_counts_follow_bulk_writes(self):
+        res = self.client.post(BULK_URL, [
+            {'title': 'A', 'time_minutes': 5, 'price': '1.00',
+             'tags': [{'name': 'Quick'}]},
+            {'title': 'B', 'time_minutes': 5, 'price': '1.00',
+             'tags': [{'name': 'Quick'}, {'name': 'Cheap'}]},
+        ], format='json')
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertCounts(Tag, {'Quick': 2, 'Cheap': 1})
+
+        ids = {recipe['title']: recipe['id'] for recipe in res.data['results']}
+        self.client.patch(BULK_URL, [
+            {'id': ids['A'], 'tags': [{'name': 'Cheap'}]},
+        ], format='json')
+        self.assertCounts(Tag, {'Quick': 1, 'Cheap': 2})
+
+        self.client.delete(BULK_URL, list(ids.values()), format='json')
+        self.assertCounts(Tag, {'Quick': 0, 'Cheap': 0})
+
+    def test_bulk_delete_counts_in_constant_queries(self):
+        tags = [
+            Tag.objects.create(user=self.user, name=name)
+            for name in ('Quick', 'Cheap')
+        ]
+        salt = Ingredient.objects.create(user=self.user, name='Salt')
+        recipes = [self._recipe() for _ in range(100)]
+        for recipe in recipes:
+            recipe.tags.add(*tags)
+            recipe.ingredients.add(salt)
+        keep = recipes.pop()
+
+        # Leitura, 2 x (agregação + UPDATE), 3 DELETEs e o savepoint.
+        with self.assertNumQueries(10):
+            res = self.client.delete(
+                BULK_URL, [recipe.id for recipe in recipes], format='json',
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertCounts(Tag, {'Quick': 1, 'Cheap': 1})
+        self.assertCounts(Ingredient, {'Salt': 1})
+        self.assertEqual(list(Recipe.objects.all()), [keep])
+        self.assertEqual(keep.tags.count(), 2)
+
+    def test_counts_follow_direct_link_changes(self):
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        other = Tag.objects.create(user=self.user, name='Other')
+        recipes = [self._recipe() for _ in range(3)]
+
+        recipes[0].tags.add(tag, other)
+        recipes[0].tags.add(tag)
+        tag.recipe_set.add(recipes[1], recipes[2])
+        self.assertCounts(Tag, {'Vegan': 3, 'Other': 1})
+
+        recipes[1].tags.remove(tag, other)
+        self.assertCounts(Tag, {'Vegan': 2, 'Other': 1})
+
+        recipes[0].tags.clear()
+        self.assertCounts(Tag, {'Vegan': 1, 'Other': 0})
+
+        tag.recipe_set.clear()
+        self.assertCounts(Tag, {'Vegan': 0, 'Other': 0})
+
+    def test_counts_with_list_serializer(self):
+        serializer = RecipeDetailSerializer(
+            data=[
+                {'title': 'A', 'time_minutes': 5, 'price': '1.00',
+                 'ingredients': [{'name': 'Salt'}]},
+            ] * 3,
+            many=True, context={'user': self.user},
+        )
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+
+        self.assertCounts(Ingredient, {'Salt': 3})
@@ -9,6 +9,7 @@ from rest_framework import status
 from rest_framework.test import APIClient
 
 INGREDIENTS_URL = reverse('recipe:ingredient-list')
+AUTOCOMPLETE_URL = reverse('recipe:ingredient-autocomplete')
 
 def detail_url(ingredient_id):
     return reverse('recipe:ingredient-detail', args=[ingredient_id])
@@ -76,6 +77,21 @@ class PrivateIngredientApiTests(TestCase):
         ingredient.refresh_from_db()
         self.assertEqual(ingredient.name, payload['name'])
     
+    def test_rename_to_existing_name(self):
+        """Teste: Renomear para o nome de outro ingrediente retorna 400"""
+        ingredient = Ingredient.objects.create(user=self.user, name='Salt')
+        Ingredient.objects.create(user=self.user, name='Vanilla')
+
+        res = self.client.put(detail_url(ingredient.id), {'name': 'Vanilla'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('name', res.data)
+        ingredient.refresh_from_db()
+        self.assertEqual(ingredient.name, 'Salt')
+
+        res = self.client.patch(detail_url(ingredient.id), {'name': 'Salt'})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
     def test_delete_ingredient(self):
         """Teste: Deletar ingrediente"""
         i1 = Ingredient.objects.create(user=self.user, name='Salt')
@@ -131,4 +147,70 @@ class PrivateIngredientApiTests(TestCase):
 
         res = self.client.get(INGREDIENTS_URL, {'assigned_only': 1})
 
-        self.assertEqual(len(res.data), 1)
\ No newline at end of file
+        self.assertEqual(len(res.data), 1)
+
+    def test_assigned_only_with_counts(self):
+        """Teste: Ingredientes usados, com o número de receitas"""
+        salt = Ingredient.objects.create(user=self.user, name='Salt')
+        Ingredient.objects.create(user=self.user, name='Sugar')
+        for title in ['Soup', 'Bread']:
+            recipe = Recipe.objects.create(
+                user=self.user, title=title, time_minutes=5,
+                price=Decimal('4.50'),
+            )
+            recipe.ingredients.add(salt)
+
+        res = self.client.get(
+            INGREDIENTS_URL, {'assigned_only': 1, 'with_counts': 1},
+        )
+
+        self.assertEqual(
+            res.data, [{'id': salt.id, 'name': 'Salt', 'recipe_count': 2}],
+        )
+
+    def test_autocomplete(self):
+        """Teste: Sugestões por prefixo, começando pelo início do nome"""
+        tomato = Ingredient.objects.create(user=self.user, name='Tomato')
+        cherry = Ingredient.objects.create(
+            user=self.user, name='Cherry tomatoes',
+        )
+        Ingredient.objects.create(user=self.user, name='Potato')
+        other_user = create_user(email='other@example.com')
+        Ingredient.objects.create(user=other_user, name='Tomato paste')
+
+        res = self.client.get(AUTOCOMPLETE_URL, {'q': 'tom'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, [
+            {'id': tomato.id, 'name': 'Tomato'},
+            {'id': cherry.id, 'name': 'Cherry tomatoes'},
+        ])
+
+    def test_autocomplete_limit(self):
+        """Teste: O número de sugestões respeita o limit"""
+        for name in ['Salt', 'Salmon', 'Salad', 'Salsa']:
+            Ingredient.objects.create(user=self.user, name=name)
+
+        res = self.client.get(AUTOCOMPLETE_URL, {'q': 'sal', 'limit': 2})
+
+        self.assertEqual(
+            [item['name'] for item in res.data], ['Salad', 'Salmon'],
+        )
+
+    def test_autocomplete_sees_new_items(self):
+        """Teste: Itens criados depois de uma busca aparecem nas sugestões"""
+        Ingredient.objects.create(user=self.user, name='Basil')
+        self.client.get(AUTOCOMPLETE_URL, {'q': 'ba'})
+
+        Ingredient.objects.create(user=self.user, name='Bacon')
+        res = self.client.get(AUTOCOMPLETE_URL, {'q': 'ba'})
+
+        self.assertEqual(
+            [item['name'] for item in res.data], ['Bacon', 'Basil'],
+        )
+
+    def test_autocomplete_requires_query(self):
+        """Teste: O parâmetro q é obrigatório"""
+        res = self.client.get(AUTOCOMPLETE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -1,17 +1,34 @@
+import csv
+import hashlib
+import io
+import json
 import os
 import tempfile
 from decimal import Decimal
+from unittest import skipUnless
+from unittest.mock import patch
 
 from core.models import Ingredient, Recipe, Tag
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.files.storage import default_storage
+from django.core.files.uploadhandler import StopUpload
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from PIL import Image
+from recipe.images import variant_names
+from recipe.search import update_search_vectors
 from recipe.serializers import RecipeDetailSerializer, RecipeSerializer
+from recipe.uploads import BoundedImageUploadHandler
+from recipe.views import RecipeViewSet
 from rest_framework import status
 from rest_framework.test import APIClient
 
 RECIPES_URL = reverse('recipe:recipe-list')
+BULK_URL = reverse('recipe:recipe-bulk')
+EXPORT_URL = reverse('recipe:recipe-export')
 
 def image_upload_url(recipe_id):
     """Create and return a recipe detail URL."""
@@ -68,7 +85,7 @@ class PrivateRecipeAPITests(TestCase):
         serializer = RecipeSerializer(recipes, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_recipe_list_limited_to_user(self):
         """Testa se a lista de receitas é limitada a usuários autenticados."""
@@ -84,7 +101,7 @@ class PrivateRecipeAPITests(TestCase):
         recipes = Recipe.objects.filter(user=self.user)
         serializer = RecipeSerializer(recipes, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
     
     def test_get_recipe_detail(self):
         """Testa o GET para uma receita específica."""
@@ -304,9 +321,9 @@ class PrivateRecipeAPITests(TestCase):
         s1 = RecipeSerializer(r1)
         s2 = RecipeSerializer(r2)
         s3 = RecipeSerializer(r3)
-        self.assertIn(s1.data, res.data)
-        self.assertIn(s2.data, res.data)
-        self.assertNotIn(s3.data, res.data)
+        self.assertIn(s1.data, res.data['results'])
+        self.assertIn(s2.data, res.data['results'])
+        self.assertNotIn(s3.data, res.data['results'])
     
     def test_filter_by_ingredients(self):
         """Test filtering recipes by ingredients."""
@@ -324,9 +341,553 @@ class PrivateRecipeAPITests(TestCase):
         s1 = RecipeSerializer(r1)
         s2 = RecipeSerializer(r2)
         s3 = RecipeSerializer(r3)
-        self.assertIn(s1.data, res.data)
-        self.assertIn(s2.data, res.data)
-        self.assertNotIn(s3.data, res.data)
+        self.assertIn(s1.data, res.data['results'])
+        self.assertIn(s2.data, res.data['results'])
+        self.assertNotIn(s3.data, res.data['results'])
+
+    def test_filter_does_not_duplicate_recipes(self):
+        """Teste: Receita com várias tags filtradas aparece uma vez só."""
+        recipe = create_recipe(user=self.user)
+        tag1 = Tag.objects.create(user=self.user, name='Vegan')
+        tag2 = Tag.objects.create(user=self.user, name='Dinner')
+        ingredient = Ingredient.objects.create(user=self.user, name='Salt')
+        recipe.tags.add(tag1, tag2)
+        recipe.ingredients.add(ingredient)
+
+        params = {'tags': f'{tag1.id},{tag2.id}', 'ingredients': ingredient.id}
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(RECIPES_URL, params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([r['id'] for r in res.data['results']], [recipe.id])
+        self.assertFalse(
+            any('DISTINCT' in q['sql'].upper() for q in ctx.captured_queries)
+        )
+
+    def test_filter_match_all(self):
+        """Teste: match=all retorna apenas receitas com todas as tags."""
+        tag1 = Tag.objects.create(user=self.user, name='Vegan')
+        tag2 = Tag.objects.create(user=self.user, name='Dinner')
+        both = create_recipe(user=self.user, title='Both')
+        both.tags.add(tag1, tag2)
+        only_one = create_recipe(user=self.user, title='Only one')
+        only_one.tags.add(tag1)
+
+        params = {'tags': f'{tag1.id},{tag2.id}', 'match': 'all'}
+        res = self.client.get(RECIPES_URL, params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([r['id'] for r in res.data['results']], [both.id])
+
+        params['match'] = 'any'
+        res = self.client.get(RECIPES_URL, params)
+        ids = {r['id'] for r in res.data['results']}
+        self.assertEqual(ids, {both.id, only_one.id})
+
+    def test_filter_invalid_match(self):
+        """Teste: Valor inválido para match retorna erro."""
+        res = self.client.get(RECIPES_URL, {'match': 'some'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_filter_invalid_ids(self):
+        """Teste: Ids inválidos em tags/ingredients retornam erro."""
+        for params in ({'tags': 'abc'}, {'ingredients': '1,x'}):
+            res = self.client.get(RECIPES_URL, params)
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertEqual(set(res.data), set(params))
+
+    def test_list_is_cursor_paginated(self):
+        """Teste: A listagem é paginada por cursor seguindo o id."""
+        recipes = [create_recipe(user=self.user) for _ in range(5)]
+
+        res = self.client.get(RECIPES_URL, {'page_size': 2})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIsNone(res.data['previous'])
+        ids = [r['id'] for r in res.data['results']]
+        self.assertEqual(ids, [recipes[4].id, recipes[3].id])
+
+        seen = list(ids)
+        next_url = res.data['next']
+        while next_url:
+            with CaptureQueriesContext(connection) as ctx:
+                res = self.client.get(next_url)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertFalse(
+                any('OFFSET' in q['sql'].upper() for q in ctx.captured_queries)
+            )
+            seen += [r['id'] for r in res.data['results']]
+            next_url = res.data['next']
+
+        self.assertEqual(seen, [r.id for r in reversed(recipes)])
+
+    def test_pagination_with_filters(self):
+        """Teste: A paginação respeita os filtros de tags."""
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        tagged = []
+        for _ in range(3):
+            recipe = create_recipe(user=self.user)
+            recipe.tags.add(tag)
+            tagged.append(recipe.id)
+        create_recipe(user=self.user)
+
+        res = self.client.get(RECIPES_URL, {'tags': tag.id, 'page_size': 2})
+        ids = [r['id'] for r in res.data['results']]
+        res = self.client.get(res.data['next'])
+        ids += [r['id'] for r in res.data['results']]
+
+        self.assertEqual(ids, sorted(tagged, reverse=True))
+        self.assertIsNone(res.data['next'])
+
+    def test_search(self):
+        """Teste: A busca considera título, descrição, tags e ingredientes."""
+        by_title = create_recipe(user=self.user, title='Lemon cake')
+        by_description = create_recipe(
+            user=self.user, title='Tart', description='With lemon zest',
+        )
+        by_tag = create_recipe(user=self.user, title='Pie')
+        by_tag.tags.add(Tag.objects.create(user=self.user, name='Lemon'))
+        by_ingredient = create_recipe(user=self.user, title='Soup')
+        by_ingredient.ingredients.add(
+            Ingredient.objects.create(user=self.user, name='Lemon'),
+        )
+        create_recipe(user=self.user, title='Chocolate cake')
+        other_user = get_user_model().objects.create_user(
+            'other@example.com', 'password123',
+        )
+        create_recipe(user=other_user, title='Lemon cake')
+
+        res = self.client.get(RECIPES_URL, {'search': 'lemon'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            {r['id'] for r in res.data['results']},
+            {by_title.id, by_description.id, by_tag.id, by_ingredient.id},
+        )
+
+    def test_search_orders_by_rank(self):
+        """Teste: Receitas com o termo no título vêm primeiro."""
+        in_title = create_recipe(user=self.user, title='Garlic bread')
+        create_recipe(
+            user=self.user, title='Toast', description='Garlic butter',
+        )
+
+        res = self.client.get(RECIPES_URL, {'search': 'garlic'})
+
+        self.assertEqual(len(res.data['results']), 2)
+        self.assertEqual(res.data['results'][0]['id'], in_title.id)
+
+    def test_search_requires_every_term(self):
+        """Teste: Todos os termos precisam aparecer na receita."""
+        match = create_recipe(user=self.user, title='Banana bread')
+        create_recipe(user=self.user, title='Banana split')
+
+        res = self.client.get(RECIPES_URL, {'search': 'banana bread'})
+
+        self.assertEqual([r['id'] for r in res.data['results']], [match.id])
+
+    def test_search_pagination(self):
+        """Teste: A paginação por cursor segue a ordenação por relevância."""
+        recipes = [
+            create_recipe(user=self.user, title='Rice')
+            for _ in range(3)
+        ] + [
+            create_recipe(
+                user=self.user, title='Bowl', description='Rice and beans',
+            )
+            for _ in range(2)
+        ]
+
+        res = self.client.get(RECIPES_URL, {'search': 'rice', 'page_size': 2})
+        ids = [r['id'] for r in res.data['results']]
+        while res.data['next']:
+            res = self.client.get(res.data['next'])
+            ids += [r['id'] for r in res.data['results']]
+
+        self.assertEqual(ids, [
+            recipes[2].id, recipes[1].id, recipes[0].id,
+            recipes[4].id, recipes[3].id,
+        ])
+
+    def test_search_pagination_many_ties(self):
+        """Teste: Mais de 1000 resultados com o mesmo rank são paginados"""
+        Recipe.objects.bulk_create([
+            Recipe(user=self.user, title='Soup', time_minutes=5, price=1)
+            for _ in range(1050)
+        ])
+        recipe_ids = list(Recipe.objects.values_list('id', flat=True))
+        update_search_vectors(recipe_ids)
+
+        res = self.client.get(
+            RECIPES_URL, {'search': 'soup', 'page_size': 100},
+        )
+        ids = [r['id'] for r in res.data['results']]
+        while res.data['next']:
+            res = self.client.get(res.data['next'])
+            ids += [r['id'] for r in res.data['results']]
+
+        self.assertEqual(ids, sorted(recipe_ids, reverse=True))
+
+    def test_filter_by_price_and_time_ranges(self):
+        """Teste: Filtros de faixa de preço e tempo"""
+        match = create_recipe(
+            user=self.user, price=Decimal('8.00'), time_minutes=20,
+        )
+        create_recipe(user=self.user, price=Decimal('12.00'), time_minutes=20)
+        create_recipe(user=self.user, price=Decimal('8.00'), time_minutes=45)
+        create_recipe(user=self.user, price=Decimal('2.00'), time_minutes=10)
+
+        res = self.client.get(RECIPES_URL, {
+            'min_price': '5', 'max_price': '10', 'max_time': 30,
+        })
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([r['id'] for r in res.data['results']], [match.id])
+
+    def test_filter_invalid_range(self):
+        """Teste: Valores inválidos nos filtros de faixa retornam 400"""
+        res = self.client.get(RECIPES_URL, {
+            'max_price': 'cheap', 'min_time': '1.5',
+        })
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(set(res.data), {'max_price', 'min_time'})
+
+    def test_ordering(self):
+        """Teste: Ordenação pelos campos permitidos"""
+        cheap = create_recipe(
+            user=self.user, title='B', price=Decimal('1.00'), time_minutes=30,
+        )
+        pricey = create_recipe(
+            user=self.user, title='C', price=Decimal('9.00'), time_minutes=5,
+        )
+        middle = create_recipe(
+            user=self.user, title='A', price=Decimal('4.00'), time_minutes=15,
+        )
+
+        for ordering, expected in [
+            ('price', [cheap, middle, pricey]),
+            ('-price', [pricey, middle, cheap]),
+            ('time_minutes', [pricey, middle, cheap]),
+            ('title', [middle, cheap, pricey]),
+        ]:
+            res = self.client.get(RECIPES_URL, {'ordering': ordering})
+            self.assertEqual(
+                [r['id'] for r in res.data['results']],
+                [recipe.id for recipe in expected],
+                ordering,
+            )
+
+    def test_ordering_not_allowed(self):
+        """Teste: Campos fora da lista de ordenação retornam 400"""
+        res = self.client.get(RECIPES_URL, {'ordering': 'description'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_ordering_pagination(self):
+        """Teste: A paginação por cursor segue a ordenação, com empates"""
+        prices = ['3.00', '1.00', '2.00', '1.00', '2.00', '1.00']
+        recipes = [
+            create_recipe(user=self.user, price=Decimal(price))
+            for price in prices
+        ]
+        expected = sorted(recipes, key=lambda r: (r.price, r.id))
+
+        res = self.client.get(
+            RECIPES_URL, {'ordering': 'price', 'page_size': 2},
+        )
+        ids = [r['id'] for r in res.data['results']]
+        while res.data['next']:
+            res = self.client.get(res.data['next'])
+            ids += [r['id'] for r in res.data['results']]
+
+        self.assertEqual(ids, [recipe.id for recipe in expected])
+
+    def _walk(self, params):
+        """Segue os links next e retorna os ids de todas as páginas."""
+        res = self.client.get(RECIPES_URL, params)
+        ids = [r['id'] for r in res.data['results']]
+        while res.data['next']:
+            res = self.client.get(res.data['next'])
+            ids += [r['id'] for r in res.data['results']]
+        return ids, res
+
+    def test_ordering_pagination_many_ties(self):
+        """Teste: Mais empates que o limite de offset do DRF são paginados"""
+        Recipe.objects.bulk_create([
+            Recipe(user=self.user, title='Soup', time_minutes=30, price=1)
+            for _ in range(1050)
+        ])
+        expected = list(Recipe.objects.order_by('id').values_list(
+            'id', flat=True,
+        ))
+
+        with CaptureQueriesContext(connection) as ctx:
+            ids, res = self._walk(
+                {'ordering': 'time_minutes', 'page_size': 100},
+            )
+
+        self.assertEqual(ids, expected)
+        self.assertFalse(
+            any('OFFSET' in q['sql'].upper() for q in ctx.captured_queries)
+        )
+
+        back = []
+        while res.data['previous']:
+            res = self.client.get(res.data['previous'])
+            back = [r['id'] for r in res.data['results']] + back
+        self.assertEqual(back, expected[:len(back)])
+        self.assertEqual(len(back), 1000)
+
+    def test_invalid_cursor(self):
+        """Teste: Cursor inválido ou de outra ordenação retorna 404"""
+        create_recipe(user=self.user)
+        create_recipe(user=self.user)
+        res = self.client.get(RECIPES_URL, {'page_size': 1})
+
+        res = self.client.get(res.data['next'] + '&ordering=price')
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        res = self.client.get(RECIPES_URL, {'cursor': 'garbage'})
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class BulkRecipeAPITests(TestCase):
+    """Testes para o endpoint de receitas em lote."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'bulk@example.com',
+            'testpass123',
+        )
+        self.client.force_authenticate(self.user)
+
+    def _payload(self, count, **params):
+        return [
+            {
+                'title': f'Recipe {i}',
+                'time_minutes': 10 + i,
+                'price': '5.25',
+                'tags': [{'name': 'Dinner'}, {'name': f'Tag {i}'}],
+                'ingredients': [{'name': 'Salt'}],
+                **params,
+            }
+            for i in range(count)
+        ]
+
+    def test_bulk_create(self):
+        """Teste: Criar várias receitas resolvendo tags do lote inteiro."""
+        res = self.client.post(BULK_URL, self._payload(5), format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['errors'], [])
+        self.assertEqual(len(res.data['results']), 5)
+        recipes = Recipe.objects.filter(user=self.user)
+        self.assertEqual(recipes.count(), 5)
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 6)
+        self.assertEqual(Ingredient.objects.filter(user=self.user).count(), 1)
+        for recipe in recipes:
+            self.assertEqual(recipe.tags.count(), 2)
+            self.assertEqual(recipe.ingredients.count(), 1)
+
+    def test_bulk_create_reports_item_errors(self):
+        """Teste: Itens inválidos são reportados e os válidos gravados."""
+        payload = self._payload(3)
+        del payload[1]['title']
+
+        res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(len(res.data['errors']), 1)
+        self.assertEqual(res.data['errors'][0]['index'], 1)
+        self.assertIn('title', res.data['errors'][0]['errors'])
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 2)
+
+    def test_bulk_create_requires_list(self):
+        """Teste: O corpo da requisição precisa ser uma lista."""
+        res = self.client.post(BULK_URL, {'title': 'x'}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @skipUnless(
+        connection.features.can_return_rows_from_bulk_insert,
+        'Requires a backend that returns ids from bulk inserts.',
+    )
+    def test_bulk_create_query_count_is_constant(self):
+        """Teste: O número de queries não depende do tamanho do lote."""
+        with CaptureQueriesContext(connection) as small:
+            self.client.post(
+                BULK_URL, self._payload(2, title='Small'), format='json',
+            )
+        with CaptureQueriesContext(connection) as large:
+            self.client.post(
+                BULK_URL, self._payload(50, title='Large'), format='json',
+            )
+
+        self.assertEqual(len(small), len(large))
+
+    def test_bulk_update(self):
+        """Teste: Atualizar várias receitas de uma vez."""
+        tag = Tag.objects.create(user=self.user, name='Old')
+        r1 = create_recipe(user=self.user, title='First')
+        r2 = create_recipe(user=self.user, title='Second')
+        r1.tags.add(tag)
+        other = create_recipe(
+            user=get_user_model().objects.create_user(
+                'other@example.com', 'testpass123',
+            ),
+        )
+        payload = [
+            {'id': r1.id, 'title': 'First updated', 'tags': [{'name': 'New'}]},
+            {'id': r2.id, 'time_minutes': 99},
+            {'id': other.id, 'title': 'Not mine'},
+        ]
+
+        res = self.client.patch(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(res.data['errors'][0]['index'], 2)
+        r1.refresh_from_db()
+        r2.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(r1.title, 'First updated')
+        self.assertEqual([t.name for t in r1.tags.all()], ['New'])
+        self.assertEqual(r2.title, 'Second')
+        self.assertEqual(r2.time_minutes, 99)
+        self.assertEqual(other.title, 'Sample recipe title')
+
+    def test_bulk_delete(self):
+        """Teste: Remover várias receitas do usuário."""
+        r1 = create_recipe(user=self.user)
+        r2 = create_recipe(user=self.user)
+        keep = create_recipe(user=self.user)
+
+        res = self.client.delete(BULK_URL, [r1.id, r2.id, 0], format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(res.data['deleted'], [r2.id, r1.id])
+        self.assertEqual(res.data['errors'][0]['index'], 2)
+        self.assertEqual(
+            list(Recipe.objects.filter(user=self.user)), [keep],
+        )
+
+    def test_bulk_delete_accepts_objects_and_rejects_invalid_ids(self):
+        """Teste: Itens {"id"} são aceitos; bool e outros tipos, recusados."""
+        r1 = create_recipe(user=self.user)
+        r2 = create_recipe(user=self.user)
+
+        res = self.client.delete(
+            BULK_URL, [{'id': r1.id}, True, [r2.id], 'x', {}], format='json',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(res.data['deleted'], [r1.id])
+        self.assertEqual(
+            [error['index'] for error in res.data['errors']], [1, 2, 3, 4],
+        )
+        self.assertIn('integer', str(res.data['errors'][0]['errors']['id']))
+        self.assertTrue(Recipe.objects.filter(id=r2.id).exists())
+
+    def test_bulk_delete_only_invalid_ids(self):
+        """Teste: Um lote só com ids inválidos retorna 400."""
+        recipe = create_recipe(user=self.user)
+
+        res = self.client.delete(
+            BULK_URL, [True, {'id': False}], format='json',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertTrue(Recipe.objects.filter(id=recipe.id).exists())
+
+    def test_bulk_patch_bool_id_not_found(self):
+        """Teste: {"id": true} no PATCH em lote não altera a receita 1."""
+        recipe = create_recipe(user=self.user, title='Keep')
+
+        res = self.client.patch(
+            BULK_URL, [{'id': True, 'title': 'Changed'}], format='json',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.title, 'Keep')
+
+
+class ExportRecipeAPITests(TestCase):
+    """Testes para a exportação das receitas."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'export@example.com',
+            'testpass123',
+        )
+        self.client.force_authenticate(self.user)
+        self.recipe = create_recipe(user=self.user, title='Curry')
+        self.recipe.tags.add(
+            Tag.objects.create(user=self.user, name='Thai'),
+            Tag.objects.create(user=self.user, name='Dinner'),
+        )
+        self.recipe.ingredients.add(
+            Ingredient.objects.create(user=self.user, name='Rice'),
+        )
+        create_recipe(user=self.user, title='Plain')
+        create_recipe(
+            user=get_user_model().objects.create_user(
+                'other@example.com', 'testpass123',
+            ),
+        )
+
+    def _content(self, res):
+        self.assertTrue(res.streaming)
+        return b''.join(res.streaming_content).decode()
+
+    def test_export_ndjson(self):
+        """Teste: Exportar as receitas do usuário em NDJSON."""
+        res = self.client.get(EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in self._content(res).splitlines()]
+        self.assertEqual([r['title'] for r in rows], ['Plain', 'Curry'])
+        self.assertEqual(sorted(rows[1]['tags']), ['Dinner', 'Thai'])
+        self.assertEqual(rows[1]['ingredients'], ['Rice'])
+        self.assertEqual(rows[0]['tags'], [])
+        self.assertEqual(rows[1]['price'], '5.25')
+
+    def test_export_csv(self):
+        """Teste: Exportar as receitas do usuário em CSV."""
+        res = self.client.get(EXPORT_URL, {'export_format': 'csv'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        rows = list(csv.DictReader(io.StringIO(self._content(res))))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1]['title'], 'Curry')
+        self.assertEqual(
+            sorted(rows[1]['tags'].split('|')), ['Dinner', 'Thai'],
+        )
+
+    def test_export_in_chunks(self):
+        """Teste: O número de queries depende só da quantidade de chunks."""
+        with patch.object(RecipeViewSet, 'export_chunk_size', 1):
+            with CaptureQueriesContext(connection) as ctx:
+                res = self.client.get(EXPORT_URL)
+                content = self._content(res)
+
+        self.assertEqual(len(content.splitlines()), 2)
+        # Uma query para as receitas e duas por chunk para tags/ingredientes.
+        self.assertEqual(len(ctx.captured_queries), 1 + 2 * 2)
+
+    def test_export_invalid_format(self):
+        """Teste: Formato inválido retorna erro."""
+        res = self.client.get(EXPORT_URL, {'export_format': 'xml'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+# As tarefas de imagem rodam na hora, sem sobreviver ao fim do teste.
+@override_settings(RECIPE_IMAGE_QUEUE='recipe.images.InlineImageQueue')
 class ImageUploadTests(TestCase):
     """Teste para o upload da API image"""
     def setUp(self):
@@ -340,6 +901,10 @@ class ImageUploadTests(TestCase):
 
     def tearDown(self):
         """É chamado no final do teste com o objetivo de limpar a imagem que foi associada ao teste, uma vez que não queremos acumular imagens teste no servidor."""
+        if self.recipe.image:
+            for names in variant_names(self.recipe.image.name).values():
+                for name in names.values():
+                    default_storage.delete(name)
         self.recipe.image.delete()
 
     def test_upload_image(self):
@@ -357,4 +922,171 @@ class ImageUploadTests(TestCase):
         self.assertIn('image', res.data)
         self.assertTrue(os.path.exists(self.recipe.image.path))
 
+    def test_upload_image_generates_variants(self):
+        """Test resized variants are generated after the upload commits."""
+        url = image_upload_url(self.recipe.id)
+        with tempfile.NamedTemporaryFile(suffix='.jpg') as image_file:
+            img = Image.new('RGB', (1200, 800))
+            img.save(image_file, format='JPEG')
+            image_file.seek(0)
+            with self.captureOnCommitCallbacks(execute=True) as callbacks:
+                res = self.client.post(
+                    url, {'image': image_file}, format='multipart',
+                )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        # As variantes e a nova versão do usuário (recipe.cache).
+        self.assertEqual(len(callbacks), 2)
+        self.recipe.refresh_from_db()
+        names = variant_names(self.recipe.image.name)
+        for variant, size in settings.RECIPE_IMAGE_VARIANTS.items():
+            for name in names[variant].values():
+                with default_storage.open(name) as file:
+                    self.assertEqual(max(Image.open(file).size), size)
+
+        res = self.client.get(detail_url(self.recipe.id))
+        self.assertEqual(
+            set(res.data['image_variants']), set(names),
+        )
+        self.assertTrue(
+            res.data['image_variants']['thumbnail']['jpeg'].endswith(
+                '_thumbnail.jpeg',
+            )
+        )
+
+    def _upload(self, content, suffix='.jpg'):
+        url = image_upload_url(self.recipe.id)
+        with tempfile.NamedTemporaryFile(suffix=suffix) as image_file:
+            image_file.write(content)
+            image_file.seek(0)
+            return self.client.post(
+                url, {'image': image_file}, format='multipart',
+            )
+
+    def _image_bytes(self, color):
+        buffer = io.BytesIO()
+        Image.new('RGB', (10, 10), color).save(buffer, format='JPEG')
+        return buffer.getvalue()
+
+    def _upload_to(self, recipe, content):
+        url = image_upload_url(recipe.id)
+        with tempfile.NamedTemporaryFile(suffix='.JPG') as image_file:
+            image_file.write(content)
+            image_file.seek(0)
+            with self.captureOnCommitCallbacks(execute=True):
+                res = self.client.post(
+                    url, {'image': image_file}, format='multipart',
+                )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        recipe.refresh_from_db()
+        self.addCleanup(default_storage.delete, recipe.image.name)
+        for names in variant_names(recipe.image.name).values():
+            for name in names.values():
+                self.addCleanup(default_storage.delete, name)
+        return recipe.image.name
+
+    def test_upload_same_image_is_stored_once(self):
+        """Test identical images are named by content and stored once."""
+        content = self._image_bytes('red')
+        other = create_recipe(user=self.user)
+
+        name = self._upload_to(self.recipe, content)
+        other_name = self._upload_to(other, content)
+
+        digest = hashlib.sha256(content).hexdigest()
+        self.assertEqual(name, f'uploads/recipe/{digest}.jpg')
+        self.assertEqual(other_name, name)
+        self.assertEqual(
+            default_storage.listdir('uploads/recipe')[1].count(
+                f'{digest}.jpg',
+            ),
+            1,
+        )
+
+    def test_replace_image_keeps_previous_file(self):
+        """Test the previous image is left for gc_recipe_images.
+
+        An identical upload may reuse the file at any moment, so it is
+        never unlinked on the request path.
+        """
+        old_name = self._upload_to(self.recipe, self._image_bytes('red'))
+
+        new_name = self._upload_to(self.recipe, self._image_bytes('blue'))
+
+        self.assertNotEqual(new_name, old_name)
+        self.assertTrue(default_storage.exists(old_name))
+        self.assertTrue(default_storage.exists(new_name))
+
+    def test_delete_recipe_keeps_image(self):
+        """Test deleting a recipe leaves its image for gc_recipe_images."""
+        name = self._upload_to(self.recipe, self._image_bytes('red'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(detail_url(self.recipe.id))
+
+        self.assertTrue(default_storage.exists(name))
+        self.recipe.image = None
+
+    @override_settings(RECIPE_IMAGE_MAX_BYTES=10 * 1024)
+    def test_upload_image_too_large(self):
+        """Test uploads above the byte limit are rejected."""
+        buffer = io.BytesIO()
+        Image.effect_noise((200, 200), 100).save(buffer, format='PNG')
+
+        res = self._upload(buffer.getvalue(), suffix='.png')
+
+        self.assertEqual(
+            res.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        )
+        self.recipe.refresh_from_db()
+        self.assertFalse(self.recipe.image)
+
+    @override_settings(RECIPE_IMAGE_MAX_PIXELS=1000 * 1000)
+    def test_upload_image_too_many_pixels(self):
+        """Test images above the pixel limit are rejected by the header."""
+        buffer = io.BytesIO()
+        Image.new('L', (2000, 2000)).save(buffer, format='PNG')
+
+        res = self._upload(buffer.getvalue(), suffix='.png')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('pixels', str(res.data['image']))
+
+    def test_upload_invalid_image(self):
+        """Test non-image content is rejected."""
+        res = self._upload(b'not an image' * 100)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class BoundedImageUploadHandlerTests(SimpleTestCase):
+    """Testes para o upload handler das imagens."""
+
+    @override_settings(RECIPE_IMAGE_MAX_BYTES=1024)
+    def test_aborts_before_reading_body(self):
+        """Test a large Content-Length aborts before the file is read."""
+        handler = BoundedImageUploadHandler()
+        handler.handle_raw_input(None, {}, 50 * 1024 * 1024, b'boundary')
+
+        with self.assertRaises(StopUpload) as ctx:
+            handler.new_file('image', 'big.jpg', 'image/jpeg', None)
+
+        self.assertTrue(ctx.exception.connection_reset)
+        self.assertEqual(handler.received, 0)
+
+    @override_settings(RECIPE_IMAGE_MAX_BYTES=100 * 1024)
+    def test_aborts_on_first_chunk_over_limit(self):
+        """Test the stream stops at the first chunk over the limit."""
+        handler = BoundedImageUploadHandler()
+        handler.handle_raw_input(None, {}, 1024, b'boundary')
+        handler.new_file('image', 'big.png', 'image/png', None)
+        buffer = io.BytesIO()
+        Image.new('RGB', (10, 10)).save(buffer, format='PNG')
+        chunk = buffer.getvalue().ljust(64 * 1024, b'\0')
+
+        handler.receive_data_chunk(chunk, 0)
+        with self.assertRaises(StopUpload):
+            handler.receive_data_chunk(chunk, len(chunk))
 
+        self.assertEqual(handler.error_status, 413)
+        self.assertEqual(handler.image_size, (10, 10))
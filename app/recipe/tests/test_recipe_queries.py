@@ -0,0 +1,169 @@
+"""
+Testes de regressão para o número de queries da API de receitas.
+"""
+from decimal import Decimal
+
+from core.models import Ingredient, Recipe, Tag
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+RECIPES_URL = reverse('recipe:recipe-list')
+
+# Uma query para as receitas e uma para cada relação aninhada.
+EXPECTED_QUERIES = 3
+
+
+def detail_url(recipe_id):
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+def create_recipes(user, count, tags_per_recipe=3, ingredients_per_recipe=3,
+                   prefix=''):
+    """Cria receitas com tags e ingredientes associados."""
+    recipes = []
+    for i in range(count):
+        recipe = Recipe.objects.create(
+            user=user,
+            title=f'Recipe {i}',
+            time_minutes=10,
+            price=Decimal('5.00'),
+        )
+        for j in range(tags_per_recipe):
+            tag = Tag.objects.create(user=user, name=f'{prefix}Tag {i}-{j}')
+            recipe.tags.add(tag)
+        for j in range(ingredients_per_recipe):
+            ingredient = Ingredient.objects.create(
+                user=user,
+                name=f'{prefix}Ingredient {i}-{j}',
+            )
+            recipe.ingredients.add(ingredient)
+        recipes.append(recipe)
+    return recipes
+
+
+class RecipeQueryCountTests(TestCase):
+    """Garante que list e detail executam um número constante de queries."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'queries@example.com',
+            'testpass123',
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_list_query_count_is_constant(self):
+        """Testa que a listagem não cresce com o número de receitas."""
+        create_recipes(self.user, 1)
+        with self.assertNumQueries(EXPECTED_QUERIES):
+            res = self.client.get(RECIPES_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        create_recipes(self.user, 10, tags_per_recipe=5, prefix='More ')
+        with self.assertNumQueries(EXPECTED_QUERIES):
+            res = self.client.get(RECIPES_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 11)
+        self.assertEqual(len(res.data['results'][0]['tags']), 5)
+
+    def test_list_with_filters_query_count_is_constant(self):
+        """Testa a listagem filtrada por tags e ingredientes."""
+        recipes = create_recipes(self.user, 5)
+        tag_ids = ','.join(str(r.tags.first().id) for r in recipes)
+
+        with self.assertNumQueries(EXPECTED_QUERIES):
+            res = self.client.get(RECIPES_URL, {'tags': tag_ids})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 5)
+
+    def test_detail_query_count_is_constant(self):
+        """Testa que o detalhe não cresce com o número de tags/ingredientes."""
+        small, = create_recipes(self.user, 1, 1, 1, prefix='Small ')
+        large, = create_recipes(self.user, 1, 20, 30, prefix='Large ')
+
+        for recipe in (small, large):
+            with self.assertNumQueries(EXPECTED_QUERIES):
+                res = self.client.get(detail_url(recipe.id))
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(len(res.data['ingredients']), 30)
+        self.assertIn('description', res.data)
+
+    def _create_with_ingredients(self, names, tags=()):
+        """Cria uma receita pela API e retorna as queries executadas."""
+        payload = {
+            'title': 'Bulk recipe',
+            'time_minutes': 10,
+            'price': Decimal('5.00'),
+            'tags': [{'name': name} for name in tags],
+            'ingredients': [{'name': name} for name in names],
+        }
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.post(RECIPES_URL, payload, format='json')
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        return ctx.captured_queries
+
+    def test_create_query_count_independent_of_ingredients(self):
+        """Testa que criar tags/ingredientes aninhados é feito em lote."""
+        Ingredient.objects.create(user=self.user, name='Existing')
+        few = self._create_with_ingredients(
+            ['Existing', 'New 0', 'New 1'], tags=['Tag 0'],
+        )
+        many = self._create_with_ingredients(
+            ['Existing'] + [f'Other {i}' for i in range(30)],
+            tags=[f'Tag {i}' for i in range(10)],
+        )
+
+        self.assertEqual(len(few), len(many))
+        self.assertEqual(
+            Ingredient.objects.filter(user=self.user).count(), 33,
+        )
+
+    def test_create_with_duplicated_names(self):
+        """Testa que nomes repetidos no payload não geram duplicatas."""
+        self._create_with_ingredients(['Salt', 'Salt', 'Pepper'])
+
+        recipe = Recipe.objects.get(user=self.user)
+        self.assertEqual(recipe.ingredients.count(), 2)
+        self.assertEqual(
+            Ingredient.objects.filter(user=self.user, name='Salt').count(), 1,
+        )
+
+    def _add_one_ingredient(self, recipe, name):
+        """Adiciona um ingrediente via PATCH e retorna as queries."""
+        names = [i.name for i in recipe.ingredients.all()] + [name]
+        payload = {'ingredients': [{'name': name} for name in names]}
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.patch(
+                detail_url(recipe.id), payload, format='json',
+            )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['ingredients']), len(names))
+        return ctx.captured_queries
+
+    def test_update_only_writes_changed_links(self):
+        """Testa que o PATCH altera apenas os vínculos que mudaram."""
+        small, = create_recipes(self.user, 1, 0, 5, prefix='Small ')
+        large, = create_recipes(self.user, 1, 0, 50, prefix='Large ')
+        through = Recipe.ingredients.through
+        links_before = set(
+            through.objects.filter(recipe=large).values_list('id', flat=True)
+        )
+
+        small_queries = self._add_one_ingredient(small, 'Extra 1')
+        large_queries = self._add_one_ingredient(large, 'Extra 2')
+
+        self.assertEqual(len(small_queries), len(large_queries))
+        links_after = set(
+            through.objects.filter(recipe=large).values_list('id', flat=True)
+        )
+        self.assertTrue(links_before < links_after)
+        self.assertEqual(len(links_after - links_before), 1)
+        self.assertFalse(
+            any(q['sql'].startswith('DELETE') for q in large_queries)
+        )
@@ -0,0 +1,132 @@
+"""
+Testes das leituras nas réplicas, com dois bancos locais.
+
+A "réplica" é um segundo banco SQLite em memória, sem replicação: o que a
+API devolve mostra de qual banco cada leitura veio. Ele só é registrado,
+criado e migrado enquanto estes testes rodam.
+"""
+from decimal import Decimal
+from unittest.mock import patch
+
+from core.db import router
+from core.models import Recipe, Tag
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import OperationalError, connections
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from user.tokens import issue_token
+
+REPLICA = 'replica_test'
+RECIPES_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+
+
+@override_settings(REPLICA_DATABASES=[REPLICA])
+class ReplicaReadTests(TestCase):
+    """Testa o roteamento das leituras da API para a réplica."""
+
+    @classmethod
+    def setUpClass(cls):
+        # A réplica fica fora do databases da classe até existir: o test
+        # runner lê esse atributo antes para criar os bancos e rodar os
+        # checks.
+        connections.databases[REPLICA] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': REPLICA,
+        }
+        connections.ensure_defaults(REPLICA)
+        connections.prepare_test_settings(REPLICA)
+        connections[REPLICA].creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False,
+        )
+        cls.databases = {'default', REPLICA}
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections[REPLICA].creation.destroy_test_db(REPLICA, verbosity=0)
+        del connections[REPLICA]
+        del connections.databases[REPLICA]
+
+    def setUp(self):
+        cache.clear()
+        router._unavailable.clear()
+        self.user = get_user_model().objects.create_user(
+            email='replica@example.com',
+            password='testpass123',
+        )
+        # O token só existe no primário: a autenticação não usa a réplica.
+        key, _ = issue_token(self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {key}')
+
+        self.user.save(using=REPLICA)
+        Recipe(
+            id=1000, user=self.user, title='From replica', time_minutes=5,
+            price=Decimal('1.00'),
+        ).save(using=REPLICA)
+        Tag(id=1000, user=self.user, name='Replica tag').save(using=REPLICA)
+        Recipe.objects.create(
+            user=self.user, title='From primary', time_minutes=5,
+            price=Decimal('1.00'),
+        )
+
+    def _titles(self):
+        res = self.client.get(RECIPES_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [recipe['title'] for recipe in res.data['results']]
+
+    def test_reads_served_by_replica(self):
+        """Testa que as listagens de receitas e tags vêm da réplica."""
+        self.assertEqual(self._titles(), ['From replica'])
+
+        res = self.client.get(TAGS_URL)
+        self.assertEqual([tag['name'] for tag in res.data], ['Replica tag'])
+
+    def test_reads_pinned_to_primary_after_write(self):
+        """Testa que, após escrever, o usuário lê o que gravou."""
+        res = self.client.post(RECIPES_URL, {
+            'title': 'Just written', 'time_minutes': 5, 'price': '2.00',
+        })
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        self.assertEqual(self._titles(), ['Just written', 'From primary'])
+        self.assertFalse(
+            Recipe.objects.using(REPLICA).filter(title='Just written')
+            .exists()
+        )
+
+        cache.clear()
+        self.assertEqual(self._titles(), ['From replica'])
+
+    @override_settings(REPLICA_PIN_SECONDS=0)
+    def test_pin_expires(self):
+        """Testa que, passada a janela, as leituras voltam para a réplica."""
+        self.client.post(RECIPES_URL, {
+            'title': 'Just written', 'time_minutes': 5, 'price': '2.00',
+        })
+        self.assertEqual(self._titles(), ['From replica'])
+
+    def test_unavailable_replica_falls_back_to_primary(self):
+        """Testa que, se a réplica não conecta, a leitura vai ao primário."""
+        replica = connections[REPLICA]
+        replica.close()
+        with patch.object(
+            replica, 'ensure_connection', side_effect=OperationalError,
+        ) as ensure, self.assertLogs('core.db.router', 'WARNING'):
+            self.assertEqual(self._titles(), ['From primary'])
+            cache.clear()
+            self.assertEqual(self._titles(), ['From primary'])
+
+        # A réplica com falha fica fora do rodízio por um tempo.
+        self.assertEqual(ensure.call_count, 1)
+        self.assertIn(REPLICA, router._unavailable)
+
+    def test_no_replicas_configured(self):
+        """Testa que, sem réplicas, tudo é lido do primário."""
+        with override_settings(REPLICA_DATABASES=[]):
+            self.assertEqual(self._titles(), ['From primary'])
@@ -0,0 +1,226 @@
+"""
+Testes para o cache de respostas das APIs de receita.
+"""
+from decimal import Decimal
+
+from core.models import Ingredient, Recipe, Tag
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TestCase
+from django.urls import reverse
+from recipe.cache import get_user_version, response_cache_stats
+from rest_framework import status
+from rest_framework.test import APIClient
+
+RECIPES_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+
+
+def detail_url(recipe_id):
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+def create_recipe(user, **params):
+    defaults = {
+        'title': 'Sample recipe',
+        'time_minutes': 10,
+        'price': Decimal('5.00'),
+    }
+    defaults.update(params)
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class ResponseCacheTests(TestCase):
+    """Testa o cache por usuário com chaves versionadas."""
+
+    def setUp(self):
+        cache.clear()
+        response_cache_stats.reset()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'cache@example.com',
+            'testpass123',
+        )
+        self.client.force_authenticate(self.user)
+        self.recipe = create_recipe(self.user)
+
+    def test_repeated_get_is_served_from_cache(self):
+        """Testa que a segunda listagem igual não acessa o banco."""
+        first = self.client.get(RECIPES_URL)
+        with self.assertNumQueries(0):
+            second = self.client.get(RECIPES_URL)
+
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(first.data, second.data)
+        stats = response_cache_stats.as_dict()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+
+    def test_query_params_are_part_of_the_key(self):
+        """Testa que parâmetros diferentes não compartilham a resposta."""
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        self.client.get(RECIPES_URL)
+
+        res = self.client.get(RECIPES_URL, {'tags': tag.id})
+
+        self.assertEqual(res.data['results'], [])
+
+    def test_write_through_api_invalidates(self):
+        """Testa que uma escrita pela API torna a resposta antiga inválida."""
+        self.client.get(detail_url(self.recipe.id))
+
+        self.client.patch(detail_url(self.recipe.id), {'title': 'New'})
+        res = self.client.get(detail_url(self.recipe.id))
+
+        self.assertEqual(res.data['title'], 'New')
+
+    def test_related_changes_invalidate(self):
+        """Testa que tags, ingredientes e vínculos invalidam o cache."""
+        self.client.get(RECIPES_URL)
+        self.client.get(TAGS_URL)
+
+        tag = Tag.objects.create(user=self.user, name='Dinner')
+        res = self.client.get(TAGS_URL)
+        self.assertEqual([t['name'] for t in res.data], ['Dinner'])
+
+        self.recipe.tags.add(tag)
+        res = self.client.get(RECIPES_URL)
+        self.assertEqual(res.data['results'][0]['tags'][0]['name'], 'Dinner')
+
+        ingredient = Ingredient.objects.create(user=self.user, name='Salt')
+        self.recipe.ingredients.add(ingredient)
+        ingredient.name = 'Sea salt'
+        ingredient.save()
+        res = self.client.get(RECIPES_URL)
+        self.assertEqual(
+            res.data['results'][0]['ingredients'][0]['name'], 'Sea salt',
+        )
+
+        self.recipe.delete()
+        res = self.client.get(RECIPES_URL)
+        self.assertEqual(res.data['results'], [])
+
+    def test_bulk_write_invalidates(self):
+        """Testa que o endpoint em lote também invalida o cache."""
+        self.client.get(RECIPES_URL)
+
+        payload = [{'title': 'Bulk', 'time_minutes': 5, 'price': '1.00'}]
+        self.client.post(
+            reverse('recipe:recipe-bulk'), payload, format='json',
+        )
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(len(res.data['results']), 2)
+
+    def test_version_bumped_again_after_commit(self):
+        """Testa que a versão muda após o commit da escrita.
+
+        Uma leitura feita antes do commit vê os dados antigos e os guardaria
+        sob a versão gerada dentro da transação.
+        """
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                create_recipe(self.user)
+                during = get_user_version(self.user.id)
+
+        self.assertNotEqual(get_user_version(self.user.id), during)
+
+    def test_cache_is_per_user(self):
+        """Testa que escritas de outro usuário não afetam o cache."""
+        other = get_user_model().objects.create_user(
+            'other@example.com',
+            'testpass123',
+        )
+        self.client.get(RECIPES_URL)
+
+        create_recipe(other)
+        with self.assertNumQueries(0):
+            res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(len(res.data['results']), 1)
+
+
+class ConditionalGetTests(TestCase):
+    """Testa ETag e Last-Modified nas listagens e detalhes."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'etag@example.com',
+            'testpass123',
+        )
+        self.client.force_authenticate(self.user)
+        self.recipe = create_recipe(self.user)
+
+    def test_list_and_detail_have_validators(self):
+        """Testa que as respostas trazem ETag e Last-Modified."""
+        for url in (RECIPES_URL, detail_url(self.recipe.id), TAGS_URL):
+            res = self.client.get(url)
+
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertTrue(res['ETag'].startswith('"'))
+            self.assertIn('GMT', res['Last-Modified'])
+
+    def test_if_none_match_returns_304(self):
+        """Testa que um ETag atual retorna 304 sem consultar o banco."""
+        etag = self.client.get(RECIPES_URL)['ETag']
+
+        with self.assertNumQueries(0):
+            res = self.client.get(RECIPES_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res['ETag'], etag)
+        self.assertFalse(res.content)
+
+        res = self.client.get(
+            RECIPES_URL, HTTP_IF_NONE_MATCH=f'"other", W/{etag}',
+        )
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_if_none_match_star_requires_existing_resource(self):
+        """Testa que "*" só retorna 304 para um recurso que existe."""
+        res = self.client.get(detail_url(99999), HTTP_IF_NONE_MATCH='*')
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+        res = self.client.get(
+            detail_url(self.recipe.id), HTTP_IF_NONE_MATCH='*',
+        )
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertTrue(res['ETag'])
+
+    def test_write_changes_etag(self):
+        """Testa que uma escrita gera outro ETag e o corpo novo."""
+        etag = self.client.get(RECIPES_URL)['ETag']
+
+        create_recipe(self.user, title='Another')
+        res = self.client.get(RECIPES_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
+        self.assertEqual(len(res.data['results']), 2)
+
+    def test_etag_depends_on_query_params(self):
+        """Testa que cada combinação de parâmetros tem o seu ETag."""
+        etag = self.client.get(RECIPES_URL)['ETag']
+
+        res = self.client.get(
+            RECIPES_URL, {'page_size': 1}, HTTP_IF_NONE_MATCH=etag,
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_if_modified_since(self):
+        """Testa If-Modified-Since com a data da última escrita."""
+        last_modified = self.client.get(RECIPES_URL)['Last-Modified']
+
+        res = self.client.get(
+            RECIPES_URL, HTTP_IF_MODIFIED_SINCE=last_modified,
+        )
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        res = self.client.get(
+            RECIPES_URL,
+            HTTP_IF_MODIFIED_SINCE='Mon, 01 Jan 2001 00:00:00 GMT',
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
@@ -0,0 +1,68 @@
+"""
+Testes para a manutenção do vetor de busca das receitas.
+"""
+from decimal import Decimal
+from unittest import skipUnless
+
+from core.models import Ingredient, Recipe, Tag
+from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import SearchQuery
+from django.db import connection
+from django.test import TestCase
+from recipe.serializers import RecipeDetailSerializer
+
+
+@skipUnless(connection.vendor == 'postgresql', 'tsvector is Postgres only.')
+class SearchVectorTests(TestCase):
+    """Teste: O search_vector acompanha as escritas."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'user@example.com', 'password123',
+        )
+        self.recipe = Recipe.objects.create(
+            user=self.user, title='Pie', time_minutes=10,
+            price=Decimal('2.50'),
+        )
+
+    def assertMatches(self, text, recipes):
+        matched = Recipe.objects.filter(
+            search_vector=SearchQuery(text, config='simple'),
+        )
+        self.assertEqual(set(matched), set(recipes))
+
+    def test_vector_updated_on_save(self):
+        self.assertMatches('pie', [self.recipe])
+
+        self.recipe.title = 'Cake'
+        self.recipe.save()
+
+        self.assertMatches('pie', [])
+        self.assertMatches('cake', [self.recipe])
+
+    def test_vector_follows_tags_and_ingredients(self):
+        tag = Tag.objects.create(user=self.user, name='Apple')
+        ingredient = Ingredient.objects.create(user=self.user, name='Flour')
+        self.recipe.tags.add(tag)
+        self.recipe.ingredients.add(ingredient)
+        self.assertMatches('apple & flour', [self.recipe])
+
+        tag.name = 'Pear'
+        tag.save()
+        self.assertMatches('pear', [self.recipe])
+
+        ingredient.delete()
+        self.assertMatches('flour', [])
+
+    def test_vector_set_on_bulk_create(self):
+        serializer = RecipeDetailSerializer(
+            data=[{
+                'title': 'Soup', 'time_minutes': 5, 'price': '1.00',
+                'tags': [{'name': 'Winter'}],
+            }],
+            many=True, context={'user': self.user},
+        )
+        serializer.is_valid(raise_exception=True)
+        recipes = serializer.save()
+
+        self.assertMatches('soup & winter', recipes)
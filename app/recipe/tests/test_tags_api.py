@@ -12,6 +12,7 @@ from rest_framework import status
 from rest_framework.test import APIClient
 
 TAGS_URL = reverse('recipe:tag-list')
+AUTOCOMPLETE_URL = reverse('recipe:tag-autocomplete')
 
 def detail_url(tag_id):
     return reverse('recipe:tag-detail', args=[tag_id])
@@ -80,6 +81,21 @@ class PrivateTagsApiTests(TestCase):
 
         self.assertEqual(tag.name, payload['name'])
 
+    def test_rename_to_existing_name(self):
+        """Testa que renomear para o nome de outra tag retorna 400"""
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        Tag.objects.create(user=self.user, name='Dessert')
+
+        res = self.client.put(detail_url(tag.id), {'name': 'Dessert'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('name', res.data)
+        tag.refresh_from_db()
+        self.assertEqual(tag.name, 'Vegan')
+
+        res = self.client.patch(detail_url(tag.id), {'name': 'Vegan'})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
     def test_delete_tag(self):
         """Testa deletar uma tag"""
         tag = Tag.objects.create(user=self.user, name='Breakfast')
@@ -133,3 +149,77 @@ class PrivateTagsApiTests(TestCase):
 
         self.assertEqual(len(res.data), 1)
 
+    def test_with_counts(self):
+        """Teste: with_counts informa quantas receitas usam cada tag"""
+        breakfast = Tag.objects.create(user=self.user, name='Breakfast')
+        dinner = Tag.objects.create(user=self.user, name='Dinner')
+        lunch = Tag.objects.create(user=self.user, name='Lunch')
+        for title in ['Eggs', 'Pancakes']:
+            recipe = Recipe.objects.create(
+                user=self.user, title=title, time_minutes=5,
+                price=Decimal('4.50'),
+            )
+            recipe.tags.add(breakfast)
+        recipe.tags.add(dinner)
+
+        with self.assertNumQueries(1):
+            res = self.client.get(TAGS_URL, {'with_counts': 1})
+
+        self.assertEqual(res.data, [
+            {'id': lunch.id, 'name': 'Lunch', 'recipe_count': 0},
+            {'id': dinner.id, 'name': 'Dinner', 'recipe_count': 1},
+            {'id': breakfast.id, 'name': 'Breakfast', 'recipe_count': 2},
+        ])
+
+        res = self.client.get(
+            TAGS_URL, {'with_counts': 1, 'assigned_only': 1},
+        )
+
+        self.assertEqual(
+            [(tag['name'], tag['recipe_count']) for tag in res.data],
+            [('Dinner', 1), ('Breakfast', 2)],
+        )
+
+    def test_order_by_popularity(self):
+        """Teste: Ordenação pelo número de receitas"""
+        for name, count in [('Rare', 1), ('Popular', 3), ('Unused', 0)]:
+            tag = Tag.objects.create(user=self.user, name=name)
+            for _ in range(count):
+                recipe = Recipe.objects.create(
+                    user=self.user, title='Recipe', time_minutes=5,
+                    price=Decimal('4.50'),
+                )
+                recipe.tags.add(tag)
+
+        res = self.client.get(TAGS_URL, {'ordering': '-recipe_count'})
+
+        self.assertEqual(
+            [tag['name'] for tag in res.data], ['Popular', 'Rare', 'Unused'],
+        )
+
+    def test_invalid_ordering(self):
+        """Teste: Ordenações fora da lista retornam 400"""
+        res = self.client.get(TAGS_URL, {'ordering': 'user'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_invalid_flags(self):
+        """Teste: with_counts e assigned_only inválidos retornam 400"""
+        for params in ({'with_counts': 'yes'}, {'assigned_only': 2}):
+            res = self.client.get(TAGS_URL, params)
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertEqual(set(res.data), set(params))
+
+    def test_autocomplete(self):
+        """Teste: Sugestões de tags pelo início de qualquer palavra"""
+        vegan = Tag.objects.create(user=self.user, name='Vegan')
+        dessert = Tag.objects.create(user=self.user, name='Vegetarian dessert')
+        Tag.objects.create(user=self.user, name='Dinner')
+
+        res = self.client.get(AUTOCOMPLETE_URL, {'q': 'VEG'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item['id'] for item in res.data], [vegan.id, dessert.id],
+        )
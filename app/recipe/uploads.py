@@ -0,0 +1,95 @@
+"""
+Upload handler para as imagens de receita.
+"""
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.uploadhandler import (StopUpload,
+                                             TemporaryFileUploadHandler)
+from django.utils.translation import gettext as _
+from PIL import Image
+
+# Folga para o cabeçalho multipart e os outros campos do formulário.
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+# Quantos bytes do início do arquivo são usados para ler o cabeçalho.
+IMAGE_HEADER_BYTES = 256 * 1024
+
+
+class BoundedImageUploadHandler(TemporaryFileUploadHandler):
+    """Grava a imagem em disco em chunks, com limites verificados cedo.
+
+    O upload é abortado (sem ler o resto do corpo) assim que passa de
+    RECIPE_IMAGE_MAX_BYTES, ou já pelo Content-Length. As dimensões são
+    lidas só do cabeçalho da imagem, sem decodificá-la, e uploads acima de
+    RECIPE_IMAGE_MAX_PIXELS são rejeitados. Em caso de erro o arquivo é
+    descartado e a mensagem fica em `error`, com o status em `error_status`.
+    """
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.max_bytes = settings.RECIPE_IMAGE_MAX_BYTES
+        self.max_pixels = settings.RECIPE_IMAGE_MAX_PIXELS
+        self.error = None
+        self.error_status = None
+        self.received = 0
+        self.header = b''
+        self.image_size = None
+
+    def _abort(self, message, status=400):
+        self.error = message
+        self.error_status = status
+        if getattr(self, 'file', None) is not None:
+            self.file.close()
+        raise StopUpload(connection_reset=True)
+
+    def handle_raw_input(self, input_data, META, content_length, boundary,
+                         encoding=None):
+        if content_length > self.max_bytes + MULTIPART_OVERHEAD_BYTES:
+            self.error = self._too_large_message()
+            self.error_status = 413
+
+    def new_file(self, *args, **kwargs):
+        if self.error is not None:
+            self._abort(self.error, self.error_status)
+        super().new_file(*args, **kwargs)
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > self.max_bytes:
+            self._abort(self._too_large_message(), 413)
+        if self.image_size is None:
+            self._read_header(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        if self.image_size is None:
+            self._read_header(b'', final=True)
+        return super().file_complete(file_size)
+
+    def _read_header(self, raw_data, final=False):
+        """Identifica a imagem pelos primeiros bytes (Image.open é lazy)."""
+        self.header += raw_data
+        try:
+            with Image.open(BytesIO(self.header)) as image:
+                self.image_size = image.size
+        except Image.DecompressionBombError:
+            self._abort(self._too_many_pixels_message())
+        except Exception:
+            if final or len(self.header) >= IMAGE_HEADER_BYTES:
+                self._abort(_('Upload a valid image.'))
+            return
+
+        self.header = b''
+        width, height = self.image_size
+        if width * height > self.max_pixels:
+            self._abort(self._too_many_pixels_message())
+
+    def _too_large_message(self):
+        return _('Ensure the image has at most %(max)d bytes.') % {
+            'max': self.max_bytes,
+        }
+
+    def _too_many_pixels_message(self):
+        return _('Ensure the image has at most %(max)d pixels.') % {
+            'max': self.max_pixels,
+        }
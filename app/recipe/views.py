@@ -1,12 +1,43 @@
+import csv
+import itertools
+import json
+
 from core.models import Ingredient, Recipe, Tag
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.http import StreamingHttpResponse
+from django.utils.translation import gettext as _
 from drf_spectacular.utils import (OpenApiParameter, OpenApiTypes,
-                                   extend_schema, extend_schema_view)
-from recipe import serializers
+                                   extend_schema, extend_schema_view,
+                                   inline_serializer)
+from recipe import autocomplete, counters, images, serializers
+from recipe.cache import (CachedListMixin, CachedRetrieveMixin,
+                          bump_user_version)
+from recipe.pagination import RecipeCursorPagination
+from recipe.replicas import ReplicaReadMixin
+from recipe.search import search_recipes
+from recipe.uploads import BoundedImageUploadHandler
 from rest_framework import mixins, status, viewsets
-from rest_framework.authentication import TokenAuthentication
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.fields import CharField, DecimalField, IntegerField
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from user.authentication import (CachedTokenAuthentication,
+                                 SignedTokenAuthentication)
+
+EXPORT_FIELDS = [
+    'id', 'title', 'description', 'time_minutes', 'price', 'link',
+    'tags', 'ingredients',
+]
+
+
+class _Echo:
+    """Pseudo-buffer do csv.writer: devolve a linha em vez de guardá-la."""
+
+    def write(self, value):
+        return value
 
 
 @extend_schema_view(
@@ -21,35 +52,207 @@ from rest_framework.response import Response
                 'ingredients',
                 OpenApiTypes.STR,
                 description='Comma separated list of IDs to filter',
-            )
+            ),
+            OpenApiParameter(
+                'match',
+                OpenApiTypes.STR, enum=['any', 'all'],
+                description=(
+                    'any: recipes with at least one of the given tags and '
+                    'ingredients (default); all: recipes with every one of '
+                    'them.'
+                ),
+            ),
+            OpenApiParameter(
+                'search',
+                OpenApiTypes.STR,
+                description=(
+                    'Full-text search over title, description, tag and '
+                    'ingredient names; results are ordered by relevance.'
+                ),
+            ),
+            *[
+                OpenApiParameter(
+                    param, OpenApiTypes.NUMBER,
+                    description=f'Only recipes with {field} {op} the value.',
+                )
+                for param, field, op in [
+                    ('min_price', 'price', '>='),
+                    ('max_price', 'price', '<='),
+                    ('min_time', 'time_minutes', '>='),
+                    ('max_time', 'time_minutes', '<='),
+                ]
+            ],
+            OpenApiParameter(
+                'ordering',
+                OpenApiTypes.STR,
+                enum=[
+                    prefix + field
+                    for field in ['id', 'price', 'time_minutes', 'title']
+                    for prefix in ['', '-']
+                ],
+                description=(
+                    'Sort key, prefixed with "-" for descending order '
+                    '(default: -id, or relevance when searching).'
+                ),
+            ),
         ]
     )
 )
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(ReplicaReadMixin,
+                    CachedListMixin,
+                    CachedRetrieveMixin,
+                    viewsets.ModelViewSet):
+    """Manage recipes in the database."""
     serializer_class = serializers.RecipeDetailSerializer
     queryset = Recipe.objects.all()
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [
+        CachedTokenAuthentication, SignedTokenAuthentication,
+    ]
     permission_classes = [IsAuthenticated]
+    pagination_class = RecipeCursorPagination
+    bulk_max_items = 5000
+    export_chunk_size = 2000
+    export_formats = {
+        'ndjson': 'application/x-ndjson',
+        'csv': 'text/csv',
+    }
+    ordering_fields = ['id', 'price', 'time_minutes', 'title']
+    range_filters = {
+        'min_price': ('price__gte', DecimalField(
+            max_digits=5, decimal_places=2,
+        )),
+        'max_price': ('price__lte', DecimalField(
+            max_digits=5, decimal_places=2,
+        )),
+        'min_time': ('time_minutes__gte', IntegerField()),
+        'max_time': ('time_minutes__lte', IntegerField()),
+    }
+
+    id_field = IntegerField()
 
-    def _params_to_ints(self, qs):
-        """Converte a lista de strings em uma lista de inteiros"""
-        return [int(str_id) for str_id in qs.split(',')]
+    def _params_to_ints(self, param, qs):
+        """Converte a lista de strings em uma lista de inteiros
+
+        Um id inválido resulta em 400, com o erro no nome do parâmetro.
+        """
+        try:
+            return [
+                self.id_field.run_validation(str_id)
+                for str_id in qs.split(',')
+            ]
+        except ValidationError as exc:
+            raise ValidationError({param: exc.detail})
 
     def get_queryset(self):
         """Retornando receitas para os usuários autenticados"""
         tags = self.request.query_params.get('tags')
         ingredients = self.request.query_params.get('ingredients')
+        match = self.request.query_params.get('match', 'any')
+        search = self.request.query_params.get('search', '').strip()
+        if match not in ('any', 'all'):
+            raise ValidationError({'match': _('Must be "any" or "all".')})
+
         queryset = self.queryset
         if tags:
-            tag_ids = self._params_to_ints(tags)
-            queryset = queryset.filter(tags__id__in=tag_ids)
+            tag_ids = self._params_to_ints('tags', tags)
+            queryset = self._filter_by_related(
+                queryset, Recipe.tags.through, 'tag_id', tag_ids, match,
+            )
         if ingredients:
-            ingredient_ids = self._params_to_ints(ingredients)
-            queryset = queryset.filter(ingredients__id__in=ingredient_ids)
-        
-        return queryset.filter(user=self.request.user).order_by('-id').distinct()
-        #   O distinct é necessário, pois podemos obter resultados duplicados
-        #se tiver várias receitas associadas a mesma tag ou ingrediente.
+            ingredient_ids = self._params_to_ints(
+                'ingredients', ingredients,
+            )
+            queryset = self._filter_by_related(
+                queryset, Recipe.ingredients.through, 'ingredient_id',
+                ingredient_ids, match,
+            )
+
+        queryset = self._filter_by_ranges(queryset)
+        queryset = self._optimize_queryset(queryset)
+        queryset = queryset.filter(user=self.request.user)
+        ordering = self._get_ordering()
+        if search:
+            queryset = search_recipes(queryset, search)
+            ordering = ordering or ('-rank', '-id')
+        return queryset.order_by(*(ordering or ('-id',)))
+
+    def _filter_by_ranges(self, queryset):
+        """Aplica os filtros de faixa (min_price, max_time, ...)."""
+        lookups = {}
+        errors = {}
+        for param, (lookup, field) in self.range_filters.items():
+            value = self.request.query_params.get(param)
+            if value is None:
+                continue
+            try:
+                lookups[lookup] = field.run_validation(value)
+            except ValidationError as exc:
+                errors[param] = exc.detail
+        if errors:
+            raise ValidationError(errors)
+        return queryset.filter(**lookups)
+
+    def _get_ordering(self):
+        """Ordenação pedida em ?ordering=, restrita a ordering_fields.
+
+        O id entra como desempate no mesmo sentido do campo, de modo que
+        cada ordenação é atendida por um índice (user, campo, id) e a
+        paginação por cursor tem uma ordem total.
+        """
+        ordering = self.request.query_params.get('ordering')
+        if not ordering:
+            return None
+        field = ordering[1:] if ordering.startswith('-') else ordering
+        if field not in self.ordering_fields:
+            raise ValidationError({'ordering': _(
+                'Must be one of: %(fields)s, optionally prefixed with "-".'
+            ) % {'fields': ', '.join(self.ordering_fields)}})
+        if field == 'id':
+            return (ordering,)
+        return (ordering, '-id' if ordering.startswith('-') else 'id')
+
+    def _filter_by_related(self, queryset, through, column, ids, match):
+        """Filtra receitas pela tabela intermediária usando EXISTS.
+
+        Com JOIN cada vínculo encontrado gera uma linha e era preciso um
+        DISTINCT sobre o resultado inteiro; com EXISTS cada receita aparece
+        no máximo uma vez. No modo 'all' há um EXISTS por id (semântica AND).
+        """
+        links = through.objects.filter(recipe_id=OuterRef('pk'))
+        if match == 'all':
+            for related_id in set(ids):
+                queryset = queryset.filter(
+                    Exists(links.filter(**{column: related_id}))
+                )
+            return queryset
+
+        return queryset.filter(Exists(links.filter(**{f'{column}__in': ids})))
+
+    def _optimize_queryset(self, queryset):
+        """Ajusta o queryset aos campos do serializer usado pela action.
+
+        Os serializers de receita aninham tags e ingredientes; sem prefetch
+        cada receita da página dispara duas queries extras (N+1). Aqui as
+        relações many-to-many serializadas são carregadas com
+        prefetch_related e as colunas lidas são limitadas com only().
+        """
+        serializer_class = self.get_serializer_class()
+        if not issubclass(serializer_class, serializers.RecipeSerializer):
+            return queryset
+
+        fields = set(serializer_class.Meta.fields)
+        m2m_fields = [
+            field.name for field in Recipe._meta.many_to_many
+            if field.name in fields
+        ]
+        concrete_fields = [
+            field.name for field in Recipe._meta.concrete_fields
+            if field.name in fields
+        ]
+        # O user é mantido para que recipe.user_id não gere queries extras.
+        return queryset.only('user', *concrete_fields).prefetch_related(
+            *m2m_fields
+        )
 
     def get_serializer_class(self):
         if self.action == 'list':
@@ -63,18 +266,280 @@ class RecipeViewSet(viewsets.ModelViewSet):
         """Criar uma nova receita."""
         serializer.save(user=self.request.user)
     
+    def initialize_request(self, request, *args, **kwargs):
+        """Usa o upload handler com limites na action upload_image."""
+        request = super().initialize_request(request, *args, **kwargs)
+        if self.action == 'upload_image':
+            self.upload_handler = BoundedImageUploadHandler(request)
+            request.upload_handlers = [self.upload_handler]
+        return request
+
     @action(methods=['POST'], detail=True, url_path='upload-image')
     def upload_image(self, request, pk=None):
         """Upload an image to recipe."""
         recipe = self.get_object()
-        serializer = self.get_serializer(recipe, data=request.data)
+        data = request.data
+        if self.upload_handler.error is not None:
+            return Response(
+                {'image': [self.upload_handler.error]},
+                status=self.upload_handler.error_status,
+            )
+        serializer = self.get_serializer(recipe, data=data)
 
         if serializer.is_valid():
             serializer.save()
+            images.schedule_variants(recipe)
             return Response(serializer.data, status=status.HTTP_200_OK)
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @extend_schema(
+        request=serializers.RecipeDetailSerializer(many=True),
+        responses={
+            (200, 'application/json'): OpenApiTypes.OBJECT,
+            (201, 'application/json'): OpenApiTypes.OBJECT,
+            (207, 'application/json'): OpenApiTypes.OBJECT,
+        },
+        description=(
+            'POST: list of recipes to create. PATCH: list of partial '
+            'recipes, each with its id. DELETE: list of recipe ids. '
+            'Responds with the written recipes (or deleted ids) and the '
+            'errors of each rejected item, by index.'
+        ),
+    )
+    @action(methods=['POST', 'PATCH', 'DELETE'], detail=False, url_path='bulk')
+    def bulk(self, request):
+        """Cria, atualiza ou remove receitas em lote."""
+        items = request.data
+        if not isinstance(items, list):
+            msg = _('Expected a list of items.')
+            return Response(
+                {'non_field_errors': [msg]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if len(items) > self.bulk_max_items:
+            msg = _('Ensure this list has at most %(max)d items.') % {
+                'max': self.bulk_max_items,
+            }
+            return Response(
+                {'non_field_errors': [msg]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        if request.method == 'DELETE':
+            return self._bulk_delete(items)
+        return self._bulk_write(items, partial=request.method == 'PATCH')
+
+    def _bulk_write(self, items, partial):
+        """Valida cada item e grava os válidos de uma vez."""
+        instances = {}
+        if partial:
+            ids = [
+                self._item_id(item.get('id')) for item in items
+                if isinstance(item, dict)
+            ]
+            instances = self.get_queryset().in_bulk(
+                [pk for pk in ids if pk is not None],
+            )
+
+        targets, valid, errors = [], [], []
+        for index, item in enumerate(items):
+            if partial:
+                recipe = instances.get(
+                    self._item_id(item.get('id'))
+                    if isinstance(item, dict) else None
+                )
+                if recipe is None:
+                    errors.append(
+                        {'index': index, 'errors': {'id': [_('Not found.')]}}
+                    )
+                    continue
+                serializer = self.get_serializer(
+                    recipe, data=item, partial=True,
+                )
+            else:
+                recipe = None
+                serializer = self.get_serializer(data=item)
+
+            if serializer.is_valid():
+                targets.append(recipe)
+                valid.append(serializer.validated_data)
+            else:
+                errors.append({'index': index, 'errors': serializer.errors})
+
+        written = []
+        if valid:
+            list_serializer = self.get_serializer(many=True)
+            if partial:
+                written = list_serializer.update(targets, valid)
+            else:
+                written = list_serializer.create(valid)
+
+        recipes = Recipe.objects.filter(
+            id__in=[recipe.id for recipe in written],
+        ).order_by('-id').prefetch_related('tags', 'ingredients')
+        data = {
+            'results': self.get_serializer(recipes, many=True).data,
+            'errors': errors,
+        }
+        success = status.HTTP_200_OK if partial else status.HTTP_201_CREATED
+        return Response(
+            data,
+            status=self._bulk_status(written, errors, success),
+        )
+
+    def _item_id(self, value):
+        """Id de um item do lote, ou None se não for um inteiro.
+
+        bool é subclasse de int, mas true não é o id 1.
+        """
+        if isinstance(value, int) and not isinstance(value, bool):
+            return value
+        return None
+
+    def _bulk_delete(self, items):
+        """Remove as receitas do usuário cujos ids foram informados.
+
+        Cada item é um id ou, como no PATCH, um objeto {"id": ...}.
+        """
+        ids = [
+            self._item_id(item.get('id') if isinstance(item, dict) else item)
+            for item in items
+        ]
+        user = self.request.user
+        with transaction.atomic():
+            # O lock impede que duas remoções simultâneas da mesma receita
+            # descontem os contadores duas vezes.
+            found = set(Recipe.objects.select_for_update().filter(
+                user=user, id__in=[pk for pk in ids if pk is not None],
+            ).values_list('id', flat=True))
+            if found:
+                self._delete_recipes(user, found)
+        errors = [
+            {'index': index, 'errors': {'id': [
+                _('A valid integer is required.') if pk is None
+                else _('Not found.')
+            ]}}
+            for index, pk in enumerate(ids) if pk not in found
+        ]
+        data = {'deleted': sorted(found, reverse=True), 'errors': errors}
+        return Response(
+            data,
+            status=self._bulk_status(found, errors, status.HTTP_200_OK),
+        )
+
+    def _delete_recipes(self, user, recipe_ids):
+        """Remove as receitas sem carregá-las.
+
+        delete() dispararia o pre_delete e o post_delete de cada receita (os
+        contadores custariam duas queries por receita, sem fast delete). Os
+        contadores saem de uma agregação e as linhas são removidas direto,
+        vínculos antes das receitas.
+        """
+        counters.decrement_for_recipes(recipe_ids)
+        for through in counters.COUNTED_LINKS:
+            links = through.objects.filter(recipe_id__in=recipe_ids)
+            links._raw_delete(links.db)
+        recipes = Recipe.objects.filter(id__in=recipe_ids)
+        recipes._raw_delete(recipes.db)
+        bump_user_version(user.id)
+
+    def _bulk_status(self, done, errors, success):
+        """Status da resposta de acordo com o sucesso parcial do lote."""
+        if not errors:
+            return success
+        if done:
+            return status.HTTP_207_MULTI_STATUS
+        return status.HTTP_400_BAD_REQUEST
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                'export_format',
+                OpenApiTypes.STR, enum=['ndjson', 'csv'],
+                description='Output format (default: ndjson).',
+            ),
+        ],
+        responses={
+            (200, 'application/x-ndjson'): OpenApiTypes.STR,
+            (200, 'text/csv'): OpenApiTypes.STR,
+        },
+    )
+    @action(methods=['GET'], detail=False, url_path='export')
+    def export(self, request):
+        """Exporta todas as receitas do usuário em NDJSON ou CSV."""
+        export_format = request.query_params.get('export_format', 'ndjson')
+        if export_format not in self.export_formats:
+            raise ValidationError(
+                {'export_format': _('Must be "ndjson" or "csv".')}
+            )
+
+        rows = self._export_rows(self.get_queryset().prefetch_related(None))
+        if export_format == 'csv':
+            writer = csv.writer(_Echo())
+            lines = itertools.chain(
+                [writer.writerow(EXPORT_FIELDS)],
+                (
+                    writer.writerow([
+                        '|'.join(value) if isinstance(value, list) else value
+                        for value in (row[field] for field in EXPORT_FIELDS)
+                    ])
+                    for row in rows
+                ),
+            )
+        else:
+            lines = (
+                json.dumps(row, cls=DjangoJSONEncoder) + '\n' for row in rows
+            )
+
+        response = StreamingHttpResponse(
+            lines, content_type=self.export_formats[export_format],
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="recipes.{export_format}"'
+        )
+        return response
+
+    def _export_rows(self, queryset):
+        """Gera as receitas como dicts, com memória limitada ao chunk.
+
+        As receitas são lidas com iterator() (cursor do lado do servidor no
+        Postgres) e, a cada chunk, os nomes das tags e ingredientes são
+        buscados com uma query por relação. prefetch_related não funciona
+        com iterator(), por isso a busca é feita manualmente.
+        """
+        recipes = queryset.values(*EXPORT_FIELDS[:-2]).iterator(
+            chunk_size=self.export_chunk_size,
+        )
+        while True:
+            chunk = list(itertools.islice(recipes, self.export_chunk_size))
+            if not chunk:
+                return
+
+            ids = [row['id'] for row in chunk]
+            names = {
+                field: self._related_names(field, ids)
+                for field in ('tags', 'ingredients')
+            }
+            for row in chunk:
+                for field, by_recipe in names.items():
+                    row[field] = by_recipe.get(row['id'], [])
+                yield row
+
+    def _related_names(self, field_name, recipe_ids):
+        """Mapeia id da receita -> nomes relacionados em field_name."""
+        m2m_field = Recipe._meta.get_field(field_name)
+        links = m2m_field.remote_field.through.objects.filter(
+            **{f'{m2m_field.m2m_field_name()}_id__in': recipe_ids}
+        ).values_list(
+            f'{m2m_field.m2m_field_name()}_id',
+            f'{m2m_field.m2m_reverse_field_name()}__name',
+        )
+        names = {}
+        for recipe_id, name in links:
+            names.setdefault(recipe_id, []).append(name)
+        return names
+
 @extend_schema_view(
     list=extend_schema(
         parameters=[
@@ -82,39 +547,133 @@ class RecipeViewSet(viewsets.ModelViewSet):
                 'assigned_only',
                 OpenApiTypes.INT, enum=[0, 1],
                 description='Filter by items assigned to recipes.',
-            )
+            ),
+            OpenApiParameter(
+                'with_counts',
+                OpenApiTypes.INT, enum=[0, 1],
+                description='Include how many recipes use each item.',
+            ),
+            OpenApiParameter(
+                'ordering',
+                OpenApiTypes.STR,
+                enum=['name', '-name', 'recipe_count', '-recipe_count'],
+                description='Sort key (default: -name).',
+            ),
         ]
     )
 )
-class BaseRecipeAttrViewSet(mixins.UpdateModelMixin, 
+class BaseRecipeAttrViewSet(ReplicaReadMixin,
+                            CachedListMixin,
+                            mixins.UpdateModelMixin,
                             mixins.DestroyModelMixin, 
                             mixins.ListModelMixin, 
                             viewsets.GenericViewSet):
     """Viewset base para Tag e Ingredient com intuito de não repitir código"""
 
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [
+        CachedTokenAuthentication, SignedTokenAuthentication,
+    ]
     permission_classes = [IsAuthenticated]
+    autocomplete_limit = 10
+    autocomplete_max_limit = 50
+    orderings = {
+        'name': ('name',),
+        '-name': ('-name',),
+        'recipe_count': ('recipe_count', 'name'),
+        '-recipe_count': ('-recipe_count', '-name'),
+    }
+
+    flag_field = IntegerField(min_value=0, max_value=1)
+
+    def _flag(self, param):
+        """Valor de um parâmetro 0/1; inválido resulta em 400."""
+        value = self.request.query_params.get(param, '0')
+        try:
+            return bool(self.flag_field.run_validation(value))
+        except ValidationError as exc:
+            raise ValidationError({param: exc.detail})
+
+    def _with_counts(self):
+        return self.action == 'list' and self._flag('with_counts')
 
     def get_queryset(self):
-        assigned_only = bool(
-            int(self.request.query_params.get('assigned_only', 0))
+        """Itens do usuário, opcionalmente só os usados.
+
+        assigned_only e a ordenação por popularidade usam o recipe_count
+        mantido em cada item (veja recipe.counters), atendidos pelo índice
+        (user, recipe_count, name) sem consultar a tabela intermediária.
+        """
+        queryset = self.queryset.filter(user=self.request.user)
+        if self._flag('assigned_only'):
+            queryset = queryset.filter(recipe_count__gt=0)
+        return queryset.order_by(*self._get_ordering())
+
+    def _get_ordering(self):
+        ordering = self.request.query_params.get('ordering', '-name')
+        if ordering not in self.orderings:
+            raise ValidationError({'ordering': _(
+                'Must be one of: %(orderings)s.'
+            ) % {'orderings': ', '.join(self.orderings)}})
+        return self.orderings[ordering]
+
+    def get_serializer_class(self):
+        if self._with_counts():
+            return self.count_serializer_class
+        return self.serializer_class
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                'q', OpenApiTypes.STR, required=True,
+                description='Text typed so far.',
+            ),
+            OpenApiParameter(
+                'limit', OpenApiTypes.INT,
+                description='Maximum number of suggestions (default 10).',
+            ),
+        ],
+        # Tags e ingredientes sugerem só {id, name}.
+        responses=inline_serializer(
+            'Suggestion',
+            fields={'id': IntegerField(), 'name': CharField()},
+            many=True,
+        ),
+    )
+    @action(methods=['GET'], detail=False)
+    def autocomplete(self, request):
+        """Sugestões de nomes para o texto digitado, das mais próximas."""
+        return self._cached_response(self._autocomplete, request)
+
+    def _autocomplete(self, request):
+        text = request.query_params.get('q', '').strip()
+        if not text:
+            raise ValidationError({'q': [_('This field is required.')]})
+        try:
+            limit = int(
+                request.query_params.get('limit', self.autocomplete_limit)
+            )
+        except ValueError:
+            raise ValidationError(
+                {'limit': [_('A valid integer is required.')]}
+            )
+        limit = max(1, min(limit, self.autocomplete_max_limit))
+
+        items = autocomplete.suggest(
+            self.queryset, request.user.id, text, limit,
         )
-        queryset = self.queryset
-        if assigned_only:
-            queryset = queryset.filter(recipe__isnull=False)
-        return queryset.filter(
-            user=self.request.user
-        ).order_by('-name').distinct()
+        return Response([{'id': pk, 'name': name} for pk, name in items])
     
 
 class TagViewSet(BaseRecipeAttrViewSet):
     """Manage tags in the database."""
     serializer_class = serializers.TagSerializer
+    count_serializer_class = serializers.TagCountSerializer
     queryset = Tag.objects.all()
 
 
 class IngredientViewSet(BaseRecipeAttrViewSet):
     """Manage ingredients in the database."""
     serializer_class = serializers.IngredientSerializer
+    count_serializer_class = serializers.IngredientCountSerializer
     queryset = Ingredient.objects.all()
 
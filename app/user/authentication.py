@@ -0,0 +1,170 @@
+"""
+Autenticação por token com cache.
+"""
+import copy
+import time
+
+from core.cache import CacheStats, LRUCache
+from core.models import AuthToken
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from user.tokens import hash_key, load_signed_token, slide_expiry
+
+TOKEN_CACHE_PREFIX = 'auth:token:'
+
+local_tokens = LRUCache(
+    maxsize=settings.TOKEN_CACHE_LOCAL_MAXSIZE,
+    ttl=settings.TOKEN_CACHE_LOCAL_TTL,
+)
+token_cache_stats = CacheStats('local_hits', 'shared_hits', 'misses')
+
+# Usuários dos tokens assinados, com a geração de revogação, por id.
+signed_users = LRUCache(
+    maxsize=settings.SIGNED_TOKEN_USER_MAXSIZE,
+    ttl=settings.SIGNED_TOKEN_USER_TTL,
+)
+
+
+def invalidate_token(key_hash):
+    """Remove o token (pelo hash da chave) dos dois níveis de cache."""
+    local_tokens.delete(key_hash)
+    cache.delete(TOKEN_CACHE_PREFIX + key_hash)
+
+
+def _without_password(token):
+    """Cópia do token cujo usuário não carrega o hash da senha.
+
+    A senha vira um campo adiado (deferred): check_password a lê do banco
+    se precisar, e save() grava só os campos carregados, sem apagá-la.
+    """
+    token = copy.copy(token)
+    user = copy.copy(token.user)
+    user.__dict__.pop('password', None)
+    token.user = user
+    return token
+
+
+def cache_token(token, now=None):
+    """Guarda o token nos dois níveis de cache, sem passar da validade.
+
+    O cache compartilhado é externo ao processo, então o hash da senha do
+    usuário não vai junto.
+    """
+    now = now or timezone.now()
+    timeout = min(
+        settings.TOKEN_CACHE_TTL,
+        int((token.expires - now).total_seconds()),
+    )
+    if timeout > 0:
+        token = _without_password(token)
+        cache.set(TOKEN_CACHE_PREFIX + token.key_hash, token, timeout)
+        local_tokens.set(token.key_hash, token)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Autenticação por AuthToken com cache token -> usuário em dois níveis.
+
+    O primeiro nível é um LRU em memória do processo, com TTL curto; o
+    segundo é o cache do Django, compartilhado entre processos quando é um
+    cache central (veja CACHE_BACKEND nas settings). Em ambos é
+    guardado o token com o usuário já carregado, menos o hash da senha,
+    então no caminho quente a requisição é autenticada sem acessar o banco.
+    As chaves do cache são o hash do token, como no banco.
+
+    Os sinais em user.signals invalidam o cache quando o token é removido ou
+    o usuário é alterado (senha, desativação). Em outros processos o LRU
+    local pode servir o valor antigo por até TOKEN_CACHE_LOCAL_TTL segundos.
+
+    Cada uso estende a validade do token (veja user.tokens.slide_expiry).
+    """
+
+    def authenticate_credentials(self, key):
+        key_hash = hash_key(key)
+        now = timezone.now()
+
+        token = local_tokens.get(key_hash)
+        if token is not None:
+            token_cache_stats.incr('local_hits')
+        else:
+            token = cache.get(TOKEN_CACHE_PREFIX + key_hash)
+            if token is not None:
+                token_cache_stats.incr('shared_hits')
+                local_tokens.set(key_hash, token)
+            else:
+                token_cache_stats.incr('misses')
+
+        # A cópia em cache pode ter vencido enquanto outro processo estendia
+        # a validade, então o banco decide antes de recusar o token.
+        if token is None or token.expires <= now:
+            token = self._get_token(key_hash)
+            if token.expires <= now:
+                invalidate_token(key_hash)
+                raise exceptions.AuthenticationFailed(_('Token expired.'))
+            slide_expiry(token, now)
+            cache_token(token, now)
+        elif slide_expiry(token, now):
+            cache_token(token, now)
+
+        return (token.user, token)
+
+    def _get_token(self, key_hash):
+        try:
+            token = AuthToken.objects.select_related('user').get(
+                key_hash=key_hash,
+            )
+        except AuthToken.DoesNotExist:
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed(
+                _('User inactive or deleted.'),
+            )
+        return token
+
+
+class SignedTokenAuthentication(TokenAuthentication):
+    """Autenticação por token assinado, no header "Bearer <token>".
+
+    A assinatura e a validade são conferidas em memória, e o usuário vem de
+    um LRU local, então no caso comum não há nenhum I/O. O token é recusado
+    se a geração embutida for menor que a do usuário (veja
+    user.tokens.revoke_signed_tokens); se for maior, a cópia local está
+    desatualizada e o usuário é recarregado do banco.
+
+    Só ativa com settings.SIGNED_TOKENS; caso contrário o header é ignorado.
+    """
+    keyword = 'Bearer'
+
+    def authenticate(self, request):
+        if not settings.SIGNED_TOKENS:
+            return None
+        return super().authenticate(request)
+
+    def authenticate_credentials(self, key):
+        try:
+            user_id, generation, expires = load_signed_token(key)
+        except signing.BadSignature:
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+        if expires <= time.time():
+            raise exceptions.AuthenticationFailed(_('Token expired.'))
+
+        user = signed_users.get(user_id)
+        if user is None or user.token_generation < generation:
+            user = self._get_user(user_id)
+        if user.token_generation != generation:
+            raise exceptions.AuthenticationFailed(_('Token revoked.'))
+        return (user, key)
+
+    def _get_user(self, user_id):
+        user = get_user_model().objects.filter(pk=user_id).first()
+        if user is None or not user.is_active:
+            raise exceptions.AuthenticationFailed(
+                _('User inactive or deleted.'),
+            )
+        signed_users.set(user_id, user)
+        return user
@@ -0,0 +1,41 @@
+"""
+Hashers de senha com custos configuráveis pelas settings.
+"""
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    """Argon2 com custos vindos de PASSWORD_ARGON2.
+
+    Se os custos mudarem, o hash de cada usuário é refeito no próximo login
+    (must_update compara os parâmetros do hash guardado).
+    """
+
+    @property
+    def time_cost(self):
+        return settings.PASSWORD_ARGON2['time_cost']
+
+    @property
+    def memory_cost(self):
+        return settings.PASSWORD_ARGON2['memory_cost']
+
+    @property
+    def parallelism(self):
+        return settings.PASSWORD_ARGON2['parallelism']
+
+
+class BCryptSHA256PasswordHasher(hashers.BCryptSHA256PasswordHasher):
+    """bcrypt com o número de rounds vindo de PASSWORD_BCRYPT_ROUNDS."""
+
+    @property
+    def rounds(self):
+        return settings.PASSWORD_BCRYPT_ROUNDS
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    """PBKDF2 com as iterações vindas de PASSWORD_PBKDF2_ITERATIONS."""
+
+    @property
+    def iterations(self):
+        return settings.PASSWORD_PBKDF2_ITERATIONS
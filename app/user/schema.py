@@ -0,0 +1,17 @@
+"""
+Extensões do drf-spectacular para a autenticação do usuário.
+"""
+from drf_spectacular.extensions import OpenApiAuthenticationExtension
+
+
+class SignedTokenScheme(OpenApiAuthenticationExtension):
+    """Documenta os tokens assinados como um esquema bearer próprio.
+
+    Sem isto, SignedTokenAuthentication (subclasse de TokenAuthentication)
+    cairia no tokenAuth do drf-spectacular e apareceria duplicado.
+    """
+    target_class = 'user.authentication.SignedTokenAuthentication'
+    name = 'signedTokenAuth'
+
+    def get_security_definition(self, auto_schema):
+        return {'type': 'http', 'scheme': 'bearer'}
@@ -4,6 +4,7 @@ Serializer para a API do usuário.
 from django.contrib.auth import authenticate, get_user_model
 from django.utils.translation import gettext as _
 from rest_framework import serializers
+from user.tokens import revoke_signed_tokens
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -25,6 +26,7 @@ class UserSerializer(serializers.ModelSerializer):
         if password:
             user.set_password(password)
             user.save()
+            revoke_signed_tokens(user)
         
         return user
 
@@ -50,4 +52,16 @@ class AuthTokenSerializer(serializers.Serializer):
             raise serializers.ValidationError(msg, code='authorization')
         
         attrs['user'] = user
-        return attrs
\ No newline at end of file
+        return attrs
+
+
+class TokenSerializer(serializers.Serializer):
+    """Token emitido no login ou na renovação, com a sua validade."""
+    token = serializers.CharField(read_only=True)
+    expires = serializers.DateTimeField(read_only=True)
+
+
+class SignedTokenSerializer(serializers.Serializer):
+    """Token assinado, com a validade em timestamp."""
+    token = serializers.CharField(read_only=True)
+    expires = serializers.IntegerField(read_only=True)
@@ -0,0 +1,31 @@
+"""
+Sinais para manter o cache de autenticação consistente.
+"""
+from core.models import AuthToken
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from user.authentication import invalidate_token, signed_users
+
+
+@receiver(post_delete, sender=AuthToken)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    """Remove do cache o token apagado."""
+    invalidate_token(instance.key_hash)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_user_tokens(sender, instance, created, update_fields,
+                           **kwargs):
+    """Remove do cache os tokens do usuário alterado.
+
+    Cobre troca de senha e desativação, e evita servir dados antigos do
+    usuário. O login atualiza apenas last_login, o que não invalida o cache.
+    """
+    if created or update_fields == frozenset(['last_login']):
+        return
+    signed_users.delete(instance.pk)
+    key_hashes = AuthToken.objects.filter(user=instance) \
+        .values_list('key_hash', flat=True)
+    for key_hash in key_hashes:
+        invalidate_token(key_hash)
@@ -0,0 +1,338 @@
+"""
+Testes para a autenticação por token com cache.
+"""
+import time
+from datetime import timedelta
+from unittest.mock import patch
+
+from core.models import AuthToken
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIClient
+from user.authentication import (TOKEN_CACHE_PREFIX,
+                                 CachedTokenAuthentication,
+                                 SignedTokenAuthentication, local_tokens,
+                                 signed_users, token_cache_stats)
+from user.tokens import (hash_key, issue_signed_token, issue_token,
+                         revoke_signed_tokens)
+
+ME_URL = reverse('user:me')
+TOKEN_URL = reverse('user:token')
+REFRESH_URL = reverse('user:token-refresh')
+SIGNED_TOKEN_URL = reverse('user:token-signed')
+REVOKE_URL = reverse('user:token-signed-revoke')
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    """Testa o cache token -> usuário."""
+
+    def setUp(self):
+        cache.clear()
+        local_tokens.clear()
+        token_cache_stats.reset()
+        self.user = get_user_model().objects.create_user(
+            email='auth@example.com',
+            password='testpass123',
+            name='Auth',
+        )
+        self.key, self.token = issue_token(self.user)
+        self.auth = CachedTokenAuthentication()
+
+    def test_warm_path_has_no_queries(self):
+        """Testa que, com o cache quente, não há queries ao banco."""
+        user, token = self.auth.authenticate_credentials(self.key)
+        self.assertEqual(user, self.user)
+
+        with self.assertNumQueries(0):
+            user, token = self.auth.authenticate_credentials(self.key)
+        self.assertEqual(user, self.user)
+        self.assertEqual(token.key_hash, hash_key(self.key))
+
+        local_tokens.clear()
+        with self.assertNumQueries(0):
+            self.auth.authenticate_credentials(self.key)
+
+        stats = token_cache_stats.as_dict()
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['local_hits'], 1)
+        self.assertEqual(stats['shared_hits'], 1)
+        self.assertAlmostEqual(stats['hit_ratio'], 2 / 3)
+
+    def test_request_authenticated_from_cache(self):
+        """Testa uma requisição autenticada pelo header Authorization."""
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {self.key}')
+
+        res = client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        with self.assertNumQueries(0):
+            res = client.get(ME_URL)
+        self.assertEqual(res.data['email'], self.user.email)
+
+    def test_password_hash_not_cached(self):
+        """Testa que o hash da senha não vai para o cache compartilhado."""
+        self.auth.authenticate_credentials(self.key)
+
+        cached = cache.get(TOKEN_CACHE_PREFIX + self.token.key_hash)
+        self.assertEqual(cached.user, self.user)
+        self.assertIn('password', cached.user.get_deferred_fields())
+        self.assertIn('password', self.user.__dict__)
+
+    def test_update_with_cached_user_keeps_password(self):
+        """Testa que gravar o usuário do cache não apaga a senha."""
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {self.key}')
+        client.get(ME_URL)
+
+        res = client.patch(ME_URL, {'name': 'Renamed'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.name, 'Renamed')
+        self.assertTrue(self.user.check_password('testpass123'))
+
+    def test_deleted_token_is_invalidated(self):
+        """Testa que remover o token invalida o cache."""
+        self.auth.authenticate_credentials(self.key)
+
+        self.token.delete()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.auth.authenticate_credentials(self.key)
+
+    def test_deactivated_user_is_invalidated(self):
+        """Testa que desativar o usuário invalida o cache."""
+        self.auth.authenticate_credentials(self.key)
+
+        self.user.is_active = False
+        self.user.save()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.auth.authenticate_credentials(self.key)
+
+    def test_password_change_is_invalidated(self):
+        """Testa que trocar a senha invalida o cache."""
+        self.auth.authenticate_credentials(self.key)
+
+        self.user.set_password('newpass123')
+        self.user.save()
+
+        with self.assertNumQueries(1):
+            user, token = self.auth.authenticate_credentials(self.key)
+        self.assertTrue(user.check_password('newpass123'))
+
+
+class TokenLifecycleTests(TestCase):
+    """Testa a validade, renovação e rotação dos tokens."""
+
+    def setUp(self):
+        cache.clear()
+        local_tokens.clear()
+        self.user = get_user_model().objects.create_user(
+            email='lifecycle@example.com',
+            password='testpass123',
+        )
+        self.key, self.token = issue_token(self.user)
+        self.auth = CachedTokenAuthentication()
+
+    def test_key_is_stored_hashed(self):
+        """Testa que o banco guarda apenas o hash da chave."""
+        self.assertEqual(self.token.key_hash, hash_key(self.key))
+        self.assertFalse(AuthToken.objects.filter(key_hash=self.key).exists())
+
+    def test_expired_token_rejected(self):
+        """Testa que um token vencido é recusado, mesmo vindo do cache."""
+        self.auth.authenticate_credentials(self.key)
+        expired = timezone.now() - timedelta(seconds=1)
+        AuthToken.objects.filter(pk=self.token.pk).update(expires=expired)
+        local_tokens.get(self.token.key_hash).expires = expired
+
+        with self.assertRaisesMessage(AuthenticationFailed, 'expired'):
+            self.auth.authenticate_credentials(self.key)
+
+    def test_cached_copy_extended_elsewhere_is_accepted(self):
+        """Testa que o banco é consultado antes de recusar pelo cache."""
+        self.auth.authenticate_credentials(self.key)
+        local_tokens.get(self.token.key_hash).expires = timezone.now()
+
+        user, token = self.auth.authenticate_credentials(self.key)
+
+        self.assertEqual(user, self.user)
+        self.assertGreater(token.expires, timezone.now())
+
+    @override_settings(TOKEN_TTL=3600, TOKEN_SLIDE_INTERVAL=60)
+    def test_expiry_slides_on_use(self):
+        """Testa que o uso estende a validade, gravando só quando avança."""
+        old = timezone.now() + timedelta(seconds=600)
+        AuthToken.objects.filter(pk=self.token.pk).update(expires=old)
+
+        user, token = self.auth.authenticate_credentials(self.key)
+
+        self.token.refresh_from_db()
+        self.assertGreater(self.token.expires, old + timedelta(seconds=60))
+        self.assertEqual(token.expires, self.token.expires)
+        with self.assertNumQueries(0):
+            self.auth.authenticate_credentials(self.key)
+
+    @override_settings(
+        TOKEN_TTL=3600, TOKEN_MAX_AGE=1800, TOKEN_SLIDE_INTERVAL=60,
+    )
+    def test_expiry_capped_by_max_age(self):
+        """Testa que a validade para em TOKEN_MAX_AGE desde a emissão."""
+        AuthToken.objects.filter(pk=self.token.pk).update(
+            expires=timezone.now() + timedelta(seconds=10),
+            created=timezone.now() - timedelta(seconds=1700),
+        )
+
+        self.auth.authenticate_credentials(self.key)
+
+        self.token.refresh_from_db()
+        self.assertEqual(
+            self.token.expires,
+            self.token.created + timedelta(seconds=1800),
+        )
+
+    def test_login_issues_new_token(self):
+        """Testa que cada login emite um token diferente, com validade."""
+        client = APIClient()
+        payload = {'email': self.user.email, 'password': 'testpass123'}
+
+        first = client.post(TOKEN_URL, payload)
+        second = client.post(TOKEN_URL, payload)
+
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertIn('expires', first.data)
+        self.assertNotEqual(first.data['token'], second.data['token'])
+        self.assertEqual(self.user.auth_tokens.count(), 3)
+
+    def test_refresh_rotates_token(self):
+        """Testa que o refresh emite um novo token e invalida o antigo."""
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {self.key}')
+        client.get(ME_URL)
+
+        res = client.post(REFRESH_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        key = res.data['token']
+        self.assertNotEqual(key, self.key)
+        res = client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        client.credentials(HTTP_AUTHORIZATION=f'Token {key}')
+        res = client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_refresh_requires_authentication(self):
+        """Testa que o refresh exige um token válido."""
+        res = APIClient().post(REFRESH_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+@override_settings(SIGNED_TOKENS=True)
+class SignedTokenAuthenticationTests(TestCase):
+    """Testa os tokens assinados, validados sem I/O."""
+
+    def setUp(self):
+        cache.clear()
+        signed_users.clear()
+        self.user = get_user_model().objects.create_user(
+            email='signed@example.com',
+            password='testpass123',
+        )
+        self.token, self.expires = issue_signed_token(self.user)
+        self.auth = SignedTokenAuthentication()
+
+    def test_warm_path_has_no_queries(self):
+        """Testa que, com o usuário no LRU, não há queries ao banco."""
+        self.auth.authenticate_credentials(self.token)
+
+        with self.assertNumQueries(0), patch.object(cache, 'get') as get:
+            user, _ = self.auth.authenticate_credentials(self.token)
+        self.assertEqual(user, self.user)
+        get.assert_not_called()
+
+    def test_tampered_token_rejected(self):
+        """Testa que um token com a assinatura alterada é recusado."""
+        with self.assertRaisesMessage(AuthenticationFailed, 'Invalid'):
+            self.auth.authenticate_credentials(self.token[:-1] + 'x')
+
+    def test_expired_token_rejected(self):
+        """Testa que um token vencido é recusado."""
+        with patch('time.time', return_value=self.expires):
+            with self.assertRaisesMessage(AuthenticationFailed, 'expired'):
+                self.auth.authenticate_credentials(self.token)
+
+    def test_revoked_token_rejected(self):
+        """Testa que revogar invalida os tokens já emitidos."""
+        self.auth.authenticate_credentials(self.token)
+
+        revoke_signed_tokens(self.user)
+
+        with self.assertRaisesMessage(AuthenticationFailed, 'revoked'):
+            self.auth.authenticate_credentials(self.token)
+        token, _ = issue_signed_token(self.user)
+        user, _ = self.auth.authenticate_credentials(token)
+        self.assertEqual(user, self.user)
+
+    def test_newer_generation_reloads_user(self):
+        """Testa que um token mais novo que a cópia local recarrega o
+        usuário."""
+        self.auth.authenticate_credentials(self.token)
+        get_user_model().objects.filter(pk=self.user.pk).update(
+            token_generation=1,
+        )
+        self.user.refresh_from_db()
+        token, _ = issue_signed_token(self.user)
+
+        with self.assertNumQueries(1):
+            user, _ = self.auth.authenticate_credentials(token)
+        self.assertEqual(user.token_generation, 1)
+
+    def test_password_change_revokes(self):
+        """Testa que trocar a senha pela API revoga os tokens assinados."""
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+
+        res = client.patch(ME_URL, {'password': 'newpass123'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        res = client.get(RECIPES_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_issue_and_use_on_recipes(self):
+        """Testa o login com token assinado e o uso na API de receitas."""
+        client = APIClient()
+        res = client.post(SIGNED_TOKEN_URL, {
+            'email': self.user.email, 'password': 'testpass123',
+        })
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertGreater(res.data['expires'], time.time())
+
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {res.data["token"]}')
+        res = client.get(RECIPES_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        res = client.post(REVOKE_URL)
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        res = client.get(RECIPES_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(SIGNED_TOKENS=False)
+    def test_disabled(self):
+        """Testa que, desligado, o endpoint some e o header é ignorado."""
+        client = APIClient()
+        res = client.post(SIGNED_TOKEN_URL, {
+            'email': self.user.email, 'password': 'testpass123',
+        })
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        res = client.get(RECIPES_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
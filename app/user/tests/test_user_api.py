@@ -1,9 +1,13 @@
 """
 Testes para API usuários
 """
+from unittest.mock import patch
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
@@ -28,6 +32,8 @@ class PublicUserApiTests(TestCase):
 
     def setUp(self):
         self.client = APIClient()
+        # Os limites de login contam as tentativas no cache.
+        cache.clear()
     
     def test_create_user_success(self):
         """Testando se a criação de um usuário foi um sucesso"""
@@ -71,6 +77,41 @@ class PublicUserApiTests(TestCase):
         self.assertIn('token', res.data)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
 
+    def test_create_token_rehashes_legacy_password(self):
+        """Test logging in rehashes a password with the preferred hasher."""
+        user = create_user(**PAYLOAD)
+        user.password = make_password(
+            PAYLOAD['password'], hasher='pbkdf2_sha256',
+        )
+        user.save()
+
+        res = self.client.post(TOKEN_URL, {
+            'email': PAYLOAD['email'], 'password': PAYLOAD['password'],
+        })
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('argon2$'))
+        self.assertTrue(user.check_password(PAYLOAD['password']))
+
+    @override_settings(PASSWORD_ARGON2={
+        'time_cost': 1, 'memory_cost': 8192, 'parallelism': 1,
+    })
+    def test_create_token_rehashes_when_cost_changes(self):
+        """Test a new Argon2 cost is applied on the next login."""
+        user = create_user(**PAYLOAD)
+        self.assertIn('m=8192,t=1,p=1', user.password)
+
+        with override_settings(PASSWORD_ARGON2={
+            'time_cost': 2, 'memory_cost': 8192, 'parallelism': 1,
+        }):
+            self.client.post(TOKEN_URL, {
+                'email': PAYLOAD['email'], 'password': PAYLOAD['password'],
+            })
+
+        user.refresh_from_db()
+        self.assertIn('m=8192,t=2,p=1', user.password)
+
     def test_create_token_bad_credentials(self):
         """Testa o retorno de erro se as credenciais são inválidas"""
         create_user(email='test@example.com', password='goodpass')
@@ -113,4 +154,92 @@ class PrivateUserApiTests(TestCase):
         self.assertEqual(res.data, {
             'name': self.user.name,
             'email': self.user.email,
-        })
\ No newline at end of file
+        })
+
+
+class LoginThrottleTests(TestCase):
+    """Test the login rate limits."""
+
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+        self.addCleanup(cache.clear)
+        rates = patch(
+            'rest_framework.throttling.SimpleRateThrottle.THROTTLE_RATES',
+            {'login_ip': '5/min', 'login_email': '2/min'},
+        )
+        rates.start()
+        self.addCleanup(rates.stop)
+        create_user(**PAYLOAD)
+
+    def _login(self, email=PAYLOAD['email'], ip='10.0.0.1', **extra):
+        return self.client.post(
+            TOKEN_URL, {'email': email, 'password': 'wrong'},
+            REMOTE_ADDR=ip, **extra,
+        )
+
+    def test_throttled_per_email_before_hashing(self):
+        """Test attempts on one email are limited across IPs."""
+        for ip in ['10.0.0.1', '10.0.0.2']:
+            res = self._login(ip=ip)
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        with patch('user.serializer.authenticate') as authenticate:
+            res = self._login(email=PAYLOAD['email'].upper(), ip='10.0.0.3')
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', res)
+        authenticate.assert_not_called()
+        res = self._login(email='other@example.com')
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_throttled_per_ip(self):
+        """Test attempts from one IP are limited across emails."""
+        for i in range(5):
+            res = self._login(email=f'user{i}@example.com')
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self._login(email='another@example.com')
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        res = self._login(email='another@example.com', ip='10.0.0.9')
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_spoofed_forwarded_for_ignored(self):
+        """Test a rotating X-Forwarded-For does not bypass the IP limit."""
+        for i in range(5):
+            res = self._login(
+                email=f'user{i}@example.com',
+                HTTP_X_FORWARDED_FOR=f'192.0.2.{i}',
+            )
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self._login(
+            email='another@example.com', HTTP_X_FORWARDED_FOR='192.0.2.99',
+        )
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_client_ip_from_trusted_proxy(self):
+        """Test behind NUM_PROXIES the address added by the proxy is used."""
+        rest_framework = {**settings.REST_FRAMEWORK, 'NUM_PROXIES': 1}
+        with override_settings(REST_FRAMEWORK=rest_framework):
+            for i in range(5):
+                res = self._login(
+                    email=f'user{i}@example.com',
+                    HTTP_X_FORWARDED_FOR=f'198.51.100.{i}, 192.0.2.7',
+                )
+                self.assertEqual(
+                    res.status_code, status.HTTP_400_BAD_REQUEST,
+                )
+            throttled = self._login(
+                email='another@example.com',
+                HTTP_X_FORWARDED_FOR='198.51.100.9, 192.0.2.7',
+            )
+            other_client = self._login(
+                email='another@example.com',
+                HTTP_X_FORWARDED_FOR='192.0.2.8',
+            )
+
+        self.assertEqual(
+            throttled.status_code, status.HTTP_429_TOO_MANY_REQUESTS,
+        )
+        self.assertEqual(other_client.status_code, status.HTTP_400_BAD_REQUEST)
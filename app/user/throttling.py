@@ -0,0 +1,37 @@
+"""
+Limites de tentativas de login.
+"""
+import hashlib
+
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class LoginIPRateThrottle(SimpleRateThrottle):
+    """Limita as tentativas de login por endereço IP.
+
+    O IP vem do get_ident do DRF, que só confia no X-Forwarded-For
+    conforme REST_FRAMEWORK['NUM_PROXIES'] (veja as settings).
+    """
+    scope = 'login_ip'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {
+            'scope': self.scope,
+            'ident': self.get_ident(request),
+        }
+
+
+class LoginEmailRateThrottle(SimpleRateThrottle):
+    """Limita as tentativas de login por email, vindas de qualquer IP.
+
+    Barra ataques distribuídos contra uma conta. O email é normalizado e
+    guardado como hash na chave do cache.
+    """
+    scope = 'login_email'
+
+    def get_cache_key(self, request, view):
+        email = request.data.get('email')
+        if not isinstance(email, str) or not email.strip():
+            return None
+        digest = hashlib.sha256(email.strip().lower().encode()).hexdigest()
+        return self.cache_format % {'scope': self.scope, 'ident': digest}
@@ -0,0 +1,103 @@
+"""
+Emissão, renovação e rotação dos tokens de autenticação.
+"""
+import hashlib
+import secrets
+import time
+from datetime import timedelta
+
+from core.models import AuthToken
+from django.conf import settings
+from django.core import signing
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+SIGNED_TOKEN_SALT = 'user.tokens.signed'
+
+
+def hash_key(key):
+    """SHA-256 da chave, que é o que fica guardado no banco."""
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def issue_token(user):
+    """Cria um token para o usuário.
+
+    Retorna (chave, token); a chave só existe neste momento e deve ser
+    entregue ao cliente, já que o banco guarda apenas o hash.
+    """
+    key = secrets.token_hex(20)
+    token = AuthToken.objects.create(
+        key_hash=hash_key(key),
+        user=user,
+        expires=timezone.now() + timedelta(seconds=settings.TOKEN_TTL),
+    )
+    return key, token
+
+
+def rotate_token(token):
+    """Troca o token por um novo, invalidando o antigo."""
+    with transaction.atomic():
+        # O post_delete (user.signals) remove o token antigo do cache.
+        token.delete()
+        return issue_token(token.user)
+
+
+def slide_expiry(token, now=None):
+    """Estende a validade do token usado agora.
+
+    Retorna True se a nova validade foi gravada. Para não escrever no banco a
+    cada requisição, a validade só é atualizada quando avança pelo menos
+    TOKEN_SLIDE_INTERVAL segundos.
+    """
+    now = now or timezone.now()
+    expires = min(
+        now + timedelta(seconds=settings.TOKEN_TTL),
+        token.created + timedelta(seconds=settings.TOKEN_MAX_AGE),
+    )
+    if expires - token.expires < timedelta(
+        seconds=settings.TOKEN_SLIDE_INTERVAL,
+    ):
+        return False
+    AuthToken.objects.filter(
+        pk=token.pk, expires__lt=expires,
+    ).update(expires=expires)
+    token.expires = expires
+    return True
+
+
+def issue_signed_token(user):
+    """Cria um token assinado (HMAC) para o usuário.
+
+    O token carrega o id do usuário, a validade e a geração de revogação
+    atual, e é validado sem consultar o banco nem o cache compartilhado (veja
+    user.authentication.SignedTokenAuthentication). Retorna (token, validade
+    em timestamp).
+    """
+    expires = int(time.time()) + settings.SIGNED_TOKEN_TTL
+    token = signing.dumps(
+        [user.pk, user.token_generation, expires], salt=SIGNED_TOKEN_SALT,
+    )
+    return token, expires
+
+
+def load_signed_token(token):
+    """Retorna (id do usuário, geração, validade) de um token assinado.
+
+    Levanta signing.BadSignature se a assinatura não confere.
+    """
+    user_id, generation, expires = signing.loads(token, salt=SIGNED_TOKEN_SALT)
+    return user_id, generation, expires
+
+
+def revoke_signed_tokens(user):
+    """Revoga todos os tokens assinados já emitidos para o usuário.
+
+    Os outros processos só percebem a revogação quando expira a cópia do
+    usuário no LRU local, após até SIGNED_TOKEN_USER_TTL segundos.
+    """
+    user.token_generation = F('token_generation') + 1
+    # O post_save (user.signals) descarta a cópia do LRU deste processo.
+    user.save(update_fields=['token_generation'])
+    user.refresh_from_db(fields=['token_generation'])
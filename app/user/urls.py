@@ -9,5 +9,20 @@ app_name = 'user'
 urlpatterns = [
     path('create/', views.CreateUserView.as_view(), name='create'),
     path('token/', views.CreateTokenView.as_view(), name='token'),
+    path(
+        'token/refresh/',
+        views.RefreshTokenView.as_view(),
+        name='token-refresh',
+    ),
+    path(
+        'token/signed/',
+        views.CreateSignedTokenView.as_view(),
+        name='token-signed',
+    ),
+    path(
+        'token/signed/revoke/',
+        views.RevokeSignedTokensView.as_view(),
+        name='token-signed-revoke',
+    ),
     path('me/', views.ManageUserView.as_view(), name='me'),
 ]
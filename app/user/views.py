@@ -1,10 +1,26 @@
 """
 Views para o user API.
 """
-from rest_framework import authentication, generics, permissions
+from django.conf import settings
+from drf_spectacular.utils import extend_schema
+from rest_framework import generics, permissions, status
 from rest_framework.authtoken.views import ObtainAuthToken
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
 from rest_framework.settings import api_settings
-from user.serializer import AuthTokenSerializer, UserSerializer
+from rest_framework.views import APIView
+from user.authentication import (CachedTokenAuthentication,
+                                 SignedTokenAuthentication)
+from user.serializer import (AuthTokenSerializer, SignedTokenSerializer,
+                             TokenSerializer, UserSerializer)
+from user.throttling import LoginEmailRateThrottle, LoginIPRateThrottle
+from user.tokens import (issue_signed_token, issue_token,
+                         revoke_signed_tokens, rotate_token)
+
+
+def token_response(key, token):
+    """Resposta com a chave do token e a sua validade."""
+    return Response({'token': key, 'expires': token.expires})
 
 
 class CreateUserView(generics.CreateAPIView):
@@ -12,14 +28,84 @@ class CreateUserView(generics.CreateAPIView):
     serializer_class = UserSerializer
 
 class CreateTokenView(ObtainAuthToken):
-    """Criando um novo token para o usuário"""
+    """Criando um novo token para o usuário.
+
+    Os limites de tentativas são verificados antes do serializer, então
+    requisições barradas não chegam a calcular o hash da senha.
+    """
     serializer_class = AuthTokenSerializer
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
+    throttle_classes = [LoginIPRateThrottle, LoginEmailRateThrottle]
+
+    @extend_schema(request=AuthTokenSerializer, responses=TokenSerializer)
+    def post(self, request, *args, **kwargs):
+        """Emite um novo token a cada login."""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return token_response(*issue_token(serializer.validated_data['user']))
+
+
+class RefreshTokenView(APIView):
+    """Troca o token usado na requisição por um novo.
+
+    O token antigo deixa de valer imediatamente.
+    """
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+    @extend_schema(request=None, responses=TokenSerializer)
+    def post(self, request, *args, **kwargs):
+        """Emite um novo token e revoga o da requisição."""
+        return token_response(*rotate_token(request.auth))
+
+
+class SignedTokensEnabledMixin:
+    """Responde 404 enquanto settings.SIGNED_TOKENS estiver desligado."""
+
+    def initial(self, request, *args, **kwargs):
+        if not settings.SIGNED_TOKENS:
+            raise NotFound()
+        super().initial(request, *args, **kwargs)
+
+
+class CreateSignedTokenView(SignedTokensEnabledMixin, CreateTokenView):
+    """Criando um token assinado, validado sem acesso ao banco.
+
+    Usado no header "Bearer <token>"; vale por SIGNED_TOKEN_TTL segundos.
+    """
+
+    @extend_schema(
+        request=AuthTokenSerializer, responses=SignedTokenSerializer,
+    )
+    def post(self, request, *args, **kwargs):
+        """Emite um token assinado, com a validade em timestamp."""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        token, expires = issue_signed_token(
+            serializer.validated_data['user'],
+        )
+        return Response({'token': token, 'expires': expires})
+
+
+class RevokeSignedTokensView(SignedTokensEnabledMixin, APIView):
+    """Revoga todos os tokens assinados do usuário autenticado."""
+    authentication_classes = [
+        CachedTokenAuthentication, SignedTokenAuthentication,
+    ]
+    permission_classes = [permissions.IsAuthenticated]
+
+    @extend_schema(request=None, responses={204: None})
+    def post(self, request, *args, **kwargs):
+        """Revoga os tokens assinados já emitidos para o usuário."""
+        revoke_signed_tokens(request.user)
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
 class ManageUserView(generics.RetrieveUpdateAPIView):
     """Manage the authenticated user."""
     serializer_class = UserSerializer
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = [
+        CachedTokenAuthentication, SignedTokenAuthentication,
+    ]
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self):